@@ -0,0 +1,11 @@
+__author__ = "Marcis Greenwood"
+__email__ = "greenwood.marcis@hotmail.com"
+__license__ = "proprietary"
+"This software is proprietary and protected by copyright laws. You are granted a non-transferable license to use this software solely for your own internal purposes. Any attempt to modify, distribute, or reverse engineer this software without prior written consent from Marcis Greenwood is strictly prohibited."
+
+import sys
+
+from src.batch.batch_optimizer import main
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,16 +3,49 @@ __email__ = "greenwood.marcis@hotmail.com"
 __license__ = "proprietary"
 "This software is proprietary and protected by copyright laws. You are granted a non-transferable license to use this software solely for your own internal purposes. Any attempt to modify, distribute, or reverse engineer this software without prior written consent from Marcis Greenwood is strictly prohibited."
 
-from src.UI.app import start_dashboard
-from src.conf_setup import logger, APP_NAME
-from src.data.loaders.data_loader import DataLoaderCSV
+import argparse
+import sys
 
-if __name__ == '__main__':
+from src.startup_profile import StartupProfiler
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Strategy Portfolio Analyzer Dashboard')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Report import & load times for each Startup phase and module, then exit without serving')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Web workers. > 1 serves with gunicorn(waitress threads on Windows) & runs the .csv ingest '
+                             'in its own process. Default: WEB_WORKERS')
+    return parser.parse_args(argv)
+
+
+def main(argv: list = None) -> int:
+    args = parse_args(argv)
+    profiler = StartupProfiler(enabled=args.profile_startup)
+    # Dashboard modules are only imported once we're about to serve, so the data layers can be profiled on their own
+    with profiler.timed('Import Analysis API'):
+        from src.conf_setup import logger, APP_NAME, WEB_WORKERS, CSV_MONITOR_SECS
+        from src.data.loaders.data_loader import DataLoaderCSV
     logger.info(f'{APP_NAME}: Started')
-    data_loader = DataLoaderCSV()
-    data_loader.load_strat_csvs()
-    # Monitor for CSVS every this amount of seconds in a separate thread
-    data_loader.monitor_csvs(seconds=120)
-    # The following 2 lines are for testing and can be removed in the future
-    start_dashboard()
-    logger.info(f'{APP_NAME}: Ended')
\ No newline at end of file
+    with profiler.timed('Load Strategy Databases'):
+        data_loader = DataLoaderCSV()
+    with profiler.timed('Load new CSVs'):
+        data_loader.load_strat_csvs()
+    with profiler.timed('Import Dashboard'):
+        from src.UI.app import start_dashboard, create_layout
+    if args.profile_startup:
+        with profiler.timed('Build Dashboard Layout'):
+            create_layout()
+        logger.info(profiler.report())
+        return 0
+    workers = WEB_WORKERS if args.workers is None else args.workers
+    if workers <= 1:
+        # Monitor for CSVS every this amount of seconds in a separate thread. With more workers it's its own process
+        data_loader.monitor_csvs(seconds=CSV_MONITOR_SECS)
+    start_dashboard(workers=workers)
+    logger.info(f'{APP_NAME}: Ended')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,16 @@
 import uuid
 from dash import html, dcc, Dash, callback, Input, Output
 import dash_bootstrap_components as dbc
+import plotly.io as pio
 
 from src.UI.tabs import portfolio_tab
 from src.UI.tabs import live_portfolio_tab
-from src.conf_setup import logger, APP_NAME
+from src.UI.tabs import rollup_tab
+from src.UI.tabs import trade_analytics_tab
+from src.conf_setup import logger, APP_NAME, WEB_HOST, WEB_PORT, WEB_WORKERS
+
+# Encode callback payloads(Graphs' numeric arrays) with orjson instead of json. Raises if orjson isn't installed
+pio.json.config.default_engine = 'orjson'
 
 # suppress_callback_exceptions=True is necessary for multi file dash apps
 app = Dash(name=__name__, suppress_callback_exceptions=True, external_stylesheets=[dbc.themes.BOOTSTRAP], title=APP_NAME)
@@ -16,7 +22,9 @@ def create_layout() -> html.Div:
         html.H1(children='Strategy Portfolio Optimizer', style={'textAlign': 'center'}),
         dcc.Tabs(children=[
             dcc.Tab(children=live_portfolio_tab.load_page(), label=live_portfolio_tab.TAB_LABEL),
-            dcc.Tab(children=portfolio_tab.load_page(), label=portfolio_tab.TAB_LABEL)
+            dcc.Tab(children=portfolio_tab.load_page(), label=portfolio_tab.TAB_LABEL),
+            dcc.Tab(children=rollup_tab.load_page(), label=rollup_tab.TAB_LABEL),
+            dcc.Tab(children=trade_analytics_tab.load_page(), label=trade_analytics_tab.TAB_LABEL)
         ])
     ])
 
@@ -24,9 +32,21 @@ def create_layout() -> html.Div:
 app.layout = create_layout
 
 
-def start_dashboard():
+def start_dashboard(workers: int = WEB_WORKERS, host: str = WEB_HOST, port: int = WEB_PORT):
+    """
+    Serve the Dashboard. Blocks until shut down
+    :param workers: [Optional] 1 = Dash's single process server. > 1 = that many WSGI workers. gunicorn processes, or
+    waitress threads on Windows. Raises an ImportError if that server isn't installed
+    :param host: [Optional] Host to bind to
+    :param port: [Optional] Port to bind to
+    """
+    if workers > 1:
+        from src.UI.wsgi import start_wsgi
+        start_wsgi(workers=workers, host=host, port=port)
+        logger.info("Dashboard: Ended")
+        return
     logger.info("Dashboard: Starting")
-    app.run(host='127.0.0.1', port=5050, debug=False)
+    app.run(host=host, port=port, debug=False)
     logger.info("Dashboard: Ended")
 
 @callback(
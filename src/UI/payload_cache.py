@@ -0,0 +1,77 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Hashable
+
+import plotly.graph_objs as go
+from dash import dcc
+
+from src.conf_setup import logger
+from src.data.types.trades_snapshot import TradesSnapshot
+
+
+class PayloadCache:
+    """
+    In process LRU of finished Dash callback payloads(Statistics Table rows & Graphs), keyed by the Portfolio & the
+    version of every Strategy's Trades in it. New Trades give a new key, so a stale payload is never served.
+    Figures are stored already validated as plain dicts of numpy arrays, so a hit skips building the Portfolio & the
+    plotly objects, & Dash only has to encode it. plotly's JSON engine is set to orjson in app.py for that.
+    """
+
+    # Amount of payloads kept per process. Each is roughly 1 Portfolio's Graph & Table
+    MAX_ENTRIES: int = 64
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        """
+        :param max_entries: [Optional] Amount of payloads kept before the least recently used is dropped
+        """
+        self.max_entries = max_entries
+        self._payloads: OrderedDict[Hashable, tuple] = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def portfolio_key(kind: str, strat_names: list, snapshot: TradesSnapshot, **params) -> tuple:
+        """
+        :param kind: Which payload. Ex: 'calc' or 'live'
+        :param strat_names: Strategy Names in the Portfolio. Order doesn't matter
+        :param snapshot: TradesSnapshot the payload is built from
+        :param params: Anything else that changes the payload. Ex: start_date='2024-01-01', rolling_window=30
+        :return: A hashable key
+        """
+        strat_names = tuple(sorted(strat_names))
+        strat_versions = tuple(snapshot.get_strat_version(strat_name) for strat_name in strat_names)
+        return kind, strat_names, strat_versions, tuple(sorted(params.items()))
+
+    def get_or_create(self, key: Hashable, create: Callable[[], tuple]) -> tuple:
+        """
+        :param key: A key from portfolio_key()
+        :param create: Builds the payload on a miss. Ex: lambda: (table_rows, graph_components)
+        :return: The cached or newly built payload. Must NOT be modified, it's shared by every request
+        """
+        with self._lock:
+            payload = self._payloads.get(key)
+            if payload is not None:
+                self._payloads.move_to_end(key)
+                return payload
+        start_time = time.time()
+        payload = tuple(self._freeze(outputs) for outputs in create())
+        with self._lock:
+            self._payloads[key] = payload
+            self._payloads.move_to_end(key)
+            while len(self._payloads) > self.max_entries:
+                self._payloads.popitem(last=False)
+        logger.debug(f"Payload Cache: Built {key[0]} payload for {len(key[1])} Strategies in {round(time.time() - start_time, 4)} Seconds")
+        return payload
+
+    @staticmethod
+    def _freeze(outputs):
+        """
+        Validate every Graph's figure once & keep it as a plain dict, so it's never validated again
+        :param outputs: 1 callback output. Ex: A list of Dash components or Table rows
+        :return: The same output with figures as dicts
+        """
+        if isinstance(outputs, list):
+            for component in outputs:
+                if isinstance(component, dcc.Graph) and getattr(component, 'figure', None) is not None:
+                    component.figure = go.Figure(component.figure).to_plotly_json()
+        return outputs
@@ -1,8 +1,13 @@
-from dash import dcc, html, Input, Output, State, callback, MATCH
+from dash import dcc, html, dash_table, Input, Output, State, callback, MATCH
 from dash.exceptions import PreventUpdate
+import pandas as pd
+import plotly.graph_objs as go
 
+from src.UI.payload_cache import PayloadCache
 from src.UI.utils import create_equity_graph
 from src.conf_setup.live_settings import LiveSettings
+from src.data.analyzers.live_state import LiveState
+from src.data.analyzers.stop_loss_grid import StopLossGrid
 from src.data.types.data_trades import DataTrades
 from src.utils import get_cur_date
 
@@ -17,10 +22,28 @@ LIVE_GRAPHS_ID = 'live-graphs'
 LIVE_EQUITY_GRAPH_ID = 'live-equity-graph'
 GRAPH_HEIGHT = 750
 UPDATE_GRAPH_SECS = 180
+# Stop Loss What-If Settings
+ID_SL_WHATIF_STRAT = 'sl-whatif-strategy'
+ID_SL_WHATIF_SLIDER = 'sl-whatif-slider'
+ID_SL_WHATIF_TABLE = 'sl-whatif-table'
+ID_SL_WHATIF_GRAPH = 'sl-whatif-graph'
+SL_WHATIF_GRAPH_HEIGHT = 400
+
+ID_LIVE_STATE_TABLE = 'live-state-table'
+ID_LIVE_ALERTS = 'live-alerts'
+ID_LIVE_STATE_UPDATE = 'live-state-update'
+# Only reads the Live State file saved by the ingest, so it can run much more often than the graph update
+UPDATE_STATE_SECS = 5
+LIVE_STATE_COLS = ['Strategy', 'Live Date', 'Trades', 'PnL', 'Peak', 'Drawdown', 'Stop Loss', 'Distance to SL',
+                   'Breached', 'Last Exit']
+MAX_ALERTS = 10
 
 data_trades = DataTrades()
 
 LIVE_SETTINGS = LiveSettings()
+LIVE_STATE = LiveState(live_settings=LIVE_SETTINGS)
+# Live Equity Graphs already built in this process. Each update Interval is a lookup until new Trades come in
+PAYLOAD_CACHE = PayloadCache(max_entries=8)
 
 
 def get_graphs() -> html.Div: return html.Div(id=LIVE_GRAPHS_ID)
@@ -54,6 +77,22 @@ def get_strat_sl(strat_name: str, live_date: str = None) -> float:
     """
     return LIVE_SETTINGS.get_strat_sl(name=strat_name) or data_trades.get_strat_stats(strat_name=strat_name).get_daily_max_dd(end_date=live_date)
 
+def get_live_graph() -> list:
+    """
+    Live Equity Graph of the Live Strategies. Served from PAYLOAD_CACHE until new Trades come in or a Live Date changes
+    :return: A list containing the Live Equity Graph. Must NOT be modified
+    """
+    snapshot = data_trades.get_snapshot()
+    strat_name_dt = LIVE_SETTINGS.get_strat_name_date()
+    payload_key = PAYLOAD_CACHE.portfolio_key('live', list(strat_name_dt.keys()), snapshot,
+                                              live_dates=tuple(sorted((name, str(live_date)) for name, live_date in
+                                                                      strat_name_dt.items())))
+
+    def create_payload() -> tuple[list]:
+        p_calc = data_trades.get_live_portfolio_stats(strat_name_dt=strat_name_dt, snapshot=snapshot)
+        return (create_equity_graph(p_obj=p_calc, id_name=LIVE_EQUITY_GRAPH_ID, height=GRAPH_HEIGHT),)
+    return PAYLOAD_CACHE.get_or_create(key=payload_key, create=create_payload)[0]
+
 def get_live_strat_dropdown() -> html.Div:
     """:return: Return Strategy Drop Down Menu and Optimize Portfolio button"""
     return html.Div(children=[
@@ -76,9 +115,46 @@ def get_live_strat_dropdown() -> html.Div:
     ])
 
 
+def get_sl_whatif() -> html.Div:
+    """:return: A Div to try Stop Loss levels on a Strategy's full history with a slider"""
+    strat_names = get_strat_list(False) or get_strat_list(True)
+    return html.Div(children=[
+        html.H5('Stop Loss What-If'),
+        dcc.Dropdown(id=ID_SL_WHATIF_STRAT, options=strat_names, value=strat_names[0] if strat_names else None,
+                     clearable=False),
+        dcc.Slider(id=ID_SL_WHATIF_SLIDER, min=-1, max=0, value=0, updatemode='drag',
+                   tooltip={'placement': 'bottom', 'always_visible': True}),
+        dash_table.DataTable(
+            id=ID_SL_WHATIF_TABLE,
+            columns=[dict(id=col, name=col) for col in StopLossGrid.COLUMNS],
+            style_cell={'textAlign': 'right'},
+            style_header={'fontWeight': 'bold'},
+        ),
+        dcc.Graph(id=ID_SL_WHATIF_GRAPH)
+    ])
+
+
+def get_live_state() -> html.Div:
+    """:return: A Div with the Live Strategies' running totals & Stop Loss breach alerts, updated every UPDATE_STATE_SECS"""
+    return html.Div(children=[
+        html.H5('Live State'),
+        html.Div(id=ID_LIVE_ALERTS),
+        dash_table.DataTable(
+            id=ID_LIVE_STATE_TABLE,
+            columns=[dict(id=col, name=col) for col in LIVE_STATE_COLS],
+            sort_action='native',
+            style_cell={'textAlign': 'right'},
+            style_header={'fontWeight': 'bold'},
+            style_data_conditional=[{'if': {'filter_query': '{Breached} = "Yes"'},
+                                     'backgroundColor': '#f8d7da', 'color': '#721c24'}],
+        ),
+        dcc.Interval(id=ID_LIVE_STATE_UPDATE, interval=UPDATE_STATE_SECS*1000, n_intervals=0)
+    ])
+
+
 def load_page() -> list:
     """Returns PortfolioTab's layout"""
-    return [HEADER, get_live_strat_dropdown(), get_graphs(), get_graph_updates()]
+    return [HEADER, get_live_strat_dropdown(), get_live_state(), get_graphs(), get_graph_updates(), get_sl_whatif()]
 
 
 """****************** Callbacks ******************"""
@@ -112,10 +188,7 @@ def save_settings(n_clicks: int, children: list):
                     tmp_date_settings.setdefault(strat_name, {})['STOP_LOSS'] = stop_loss
         LIVE_SETTINGS.save_settings(tmp_date_settings)
     if len(LIVE_SETTINGS.live_strategies) > 0:
-        # Create Live Equity graph
-        strat_name_dt = LIVE_SETTINGS.get_strat_name_date()
-        p_calc = data_trades.get_live_portfolio_stats(strat_name_dt=strat_name_dt)
-        return create_equity_graph(p_obj=p_calc, id_name=LIVE_EQUITY_GRAPH_ID, height=GRAPH_HEIGHT)
+        return get_live_graph()
     raise PreventUpdate
 
 @callback(
@@ -129,10 +202,7 @@ def update_live_graph(n_intervals: int):
     :param n_intervals: [PlaceHolder] Amount of times update Interval for graph has been called
     """
     if len(LIVE_SETTINGS.live_strategies) > 0:
-        # Create Live Equity graph
-        strat_name_dt = LIVE_SETTINGS.get_strat_name_date()
-        p_calc = data_trades.get_live_portfolio_stats(strat_name_dt=strat_name_dt)
-        return create_equity_graph(p_obj=p_calc, id_name=LIVE_EQUITY_GRAPH_ID, height=GRAPH_HEIGHT)
+        return get_live_graph()
     raise PreventUpdate
 
 
@@ -179,3 +249,91 @@ def update_sl_input(live_date: str, input_id: dict):
     :param input_id: A dictionary of the id with type and index. index = strategy name
     """
     return get_strat_sl(strat_name=input_id['index'], live_date=live_date)
+
+
+@callback(
+    [Output(ID_SL_WHATIF_SLIDER, 'min'), Output(ID_SL_WHATIF_SLIDER, 'max'), Output(ID_SL_WHATIF_SLIDER, 'step'),
+     Output(ID_SL_WHATIF_SLIDER, 'value'), Output(ID_SL_WHATIF_GRAPH, 'figure')],
+    Input(ID_SL_WHATIF_STRAT, 'value'),
+)
+def update_sl_whatif_strat(strat_name: str) -> tuple:
+    """
+    Build the Stop Loss grid of the chosen Strategy's full history & set the slider's range around its Max Drawdown
+    :param strat_name: Strategy Name from the What-If dropdown
+    :return: Slider min, max, step & value(the Strategy's current Stop Loss) & a Graph of the whole grid
+    """
+    if not strat_name:
+        raise PreventUpdate
+    sl_grid = data_trades.get_strat_stats(strat_name=strat_name).get_stop_loss_grid()
+    levels = sl_grid.default_levels()
+    if len(levels) == 0:
+        raise PreventUpdate
+    stop_loss = get_strat_sl(strat_name=strat_name, live_date=LIVE_SETTINGS.get_strat_date(name=strat_name))
+    grid_df = sl_grid.evaluate(stop_losses=levels)
+    figure = go.Figure(
+        data=[go.Scatter(x=grid_df['Stop Loss'], y=grid_df['Net Profit'], mode='lines+markers', name='Net Profit'),
+              go.Scatter(x=grid_df['Stop Loss'], y=grid_df['Max Drawdown'], mode='lines', name='Max Drawdown'),
+              go.Scatter(x=grid_df['Stop Loss'], y=grid_df['Trading Days to Breach'], mode='lines', yaxis='y2',
+                         name='Trading Days to Breach', line=dict(dash='dot'))],
+        layout=go.Layout(title=f'{strat_name} Stop Loss What-If', xaxis={'title': 'Stop Loss $USD'},
+                         yaxis={'title': 'Profit and Loss $USD'},
+                         yaxis2={'title': 'Trading Days', 'overlaying': 'y', 'side': 'right', 'showgrid': False},
+                         height=SL_WHATIF_GRAPH_HEIGHT, hovermode='x unified', plot_bgcolor='rgba(0, 0, 0, 0)',
+                         paper_bgcolor='rgba(0, 0, 0, 0)'))
+    stop_loss = float(stop_loss) if stop_loss else float(levels[0])
+    slider_min = min(float(levels.min()), stop_loss)
+    slider_max = max(float(levels.max()), stop_loss)
+    return slider_min, slider_max, round((slider_max - slider_min) / 200, 2) or None, stop_loss, figure
+
+
+@callback(
+    Output(ID_SL_WHATIF_TABLE, 'data'),
+    Input(ID_SL_WHATIF_SLIDER, 'value'),
+    State(ID_SL_WHATIF_STRAT, 'value'),
+    prevent_initial_call=True
+)
+def update_sl_whatif_value(stop_loss: float, strat_name: str) -> list:
+    """
+    Called on every move of the slider. Only searches the cached grid, so it keeps up while dragging
+    :param stop_loss: Stop Loss level from the slider
+    :param strat_name: Strategy Name from the What-If dropdown
+    :return: Table rows of the Strategy's full history with this Stop Loss & without 1
+    """
+    if not strat_name or stop_loss is None:
+        raise PreventUpdate
+    sl_grid = data_trades.get_strat_stats(strat_name=strat_name).get_stop_loss_grid()
+    whatif_df = sl_grid.evaluate(stop_losses=[stop_loss, float('inf')])
+    return [{'Stop Loss': stop_loss_label, 'Net Profit': f"${row['Net Profit']:,.2f}",
+             'Max Drawdown': f"${row['Max Drawdown']:,.2f}", 'Breached': 'Yes' if row['Breached'] else 'No',
+             'Breach Date': str(row['Breach Date'].date()) if row['Breached'] else '',
+             'Trading Days to Breach': int(row['Trading Days to Breach']) if row['Breached'] else ''}
+            for stop_loss_label, (_, row) in zip((f"${stop_loss:,.2f}", 'None'), whatif_df.iterrows())]
+
+
+@callback(
+    [Output(ID_LIVE_STATE_TABLE, 'data'), Output(ID_LIVE_ALERTS, 'children')],
+    Input(ID_LIVE_STATE_UPDATE, 'n_intervals'),
+)
+def update_live_state(n_intervals: int) -> tuple[list, list]:
+    """
+    Show the running totals the ingest saved after its last check of the csv directory
+    :param n_intervals: [PlaceHolder] Amount of times the Live State update Interval has been called
+    :return: Table rows of every Live Strategy & an alert for each of the most recent Stop Loss breaches
+    """
+    states_df = LIVE_STATE.get_states()
+    rows = [{'Strategy': strat_name, 'Live Date': str(state['LIVE_DATE'].date()), 'Trades': int(state['TRADES']),
+             'PnL': f"${state['PNL']:,.2f}", 'Peak': f"${state['PEAK']:,.2f}",
+             'Drawdown': f"${state['DRAWDOWN']:,.2f}",
+             'Stop Loss': f"${state['STOP_LOSS']:,.2f}" if state['STOP_LOSS'] else '',
+             'Distance to SL': f"${state['SL_DISTANCE']:,.2f}" if state['STOP_LOSS'] else '',
+             'Breached': 'Yes' if state['BREACHED'] else 'No',
+             'Last Exit': str(state['LAST_EXIT']) if not pd.isna(state['LAST_EXIT']) else ''}
+            for strat_name, state in states_df.sort_index().iterrows()]
+    breached_strats = set(states_df.index[states_df['BREACHED'].astype(bool)])
+    alerts = [html.Div(children=f"{event['TIME']:%Y-%m-%d %H:%M:%S} STOP LOSS BREACHED: {event['STRATEGY']} "
+                                f"Drawdown ${event['DRAWDOWN']:,.2f} crossed Stop Loss ${event['STOP_LOSS']:,.2f} "
+                                f"on the Trade that exited {event['EXIT_TIME']}",
+                       style={'color': '#721c24', 'fontWeight': 'bold'})
+              for _, event in LIVE_STATE.get_events().head(MAX_ALERTS).iterrows()
+              if event['STRATEGY'] in breached_strats]
+    return rows, alerts
@@ -1,13 +1,18 @@
-from dash import html, dcc, Input, Output, State, callback
+from dash import html, dcc, dash_table, Input, Output, State, callback, ctx
 from dash.dcc import RadioItems
 from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
 from datetime import date, datetime
 
-from src.UI.utils import create_equity_graph, get_portfolio_stats_table, update_opt_table_stats
+from src.UI.payload_cache import PayloadCache
+from src.UI.utils import create_equity_graph, get_portfolio_stats_table, update_opt_table_stats, \
+    create_walk_forward_graph, create_pareto_graph, create_calendar_heatmaps, create_cluster_heatmap
 from src.conf_setup import logger
+from src.data.analyzers.opt_constraints import OptConstraints
 from src.data.analyzers.portfolio_calculator import PortfolioCalculator
+from src.data.analyzers.strategy_clusters import StrategyClusters
 from src.data.types.data_trades import DataTrades
+from src.data.types.trades_snapshot import TradesSnapshot
 
 """Portfolio Tab Dash Page"""
 
@@ -20,24 +25,69 @@ TABLE_WIDTH = '25%'
 # Equity Graph Information
 GRAPH_HEIGHT = 750
 CALC_EQUITY_GRAPH_ID = 'calc-equity-curve'
+CALC_CALENDAR_GRAPH_ID = 'calc-calendar'
+CALENDAR_GRAPH_HEIGHT = 450
 # Strategy Dropdown Menu
 OPT_PERSISTENCE = { 'persistence': True, 'persistence_type': 'local' }
 # Optimize Option IDs
-OPT_IDS = {'ACCOUNT_SIZE': 'opt-account-size', 'DATE_RANGE': 'analysis-opt-date-range'}
+OPT_IDS = {'ACCOUNT_SIZE': 'opt-account-size', 'DATE_RANGE': 'analysis-opt-date-range',
+           'WF_WINDOW': 'opt-wf-window', 'WF_STEP': 'opt-wf-step', 'MIN_SIZE': 'opt-min-size',
+           'MAX_SIZE': 'opt-max-size', 'MAX_PER_INSTRUMENT': 'opt-max-per-instrument',
+           'MAX_PER_ACCOUNT': 'opt-max-per-account', 'REQUIRED': 'opt-required', 'EXCLUDED': 'opt-excluded',
+           'WEIGHT_OBJECTIVE': 'opt-weight-objective', 'WEIGHT_BUDGET': 'opt-weight-budget',
+           'WEIGHT_BUDGET_VALUE': 'opt-weight-budget-value', 'MAX_WEIGHT': 'opt-max-weight',
+           'WHOLE_CONTRACTS': 'opt-whole-contracts', 'CLUSTER_THRESHOLD': 'opt-cluster-threshold',
+           'CLUSTER_MODE': 'opt-cluster-mode', 'MAX_PER_CLUSTER': 'opt-max-per-cluster'}
+# Weight Optimization Options
+WEIGHT_OBJECTIVE_OPTS = [{'label': 'Return/DD', 'value': 'return_to_dd'}, {'label': 'Net Profit', 'value': 'net_profit'}]
+WEIGHT_BUDGET_OPTS = [{'label': 'Max DD.', 'value': 'max_drawdown'},
+                      {'label': 'Capital Required', 'value': 'req_cap_daytrade'}]
+MAX_WEIGHT = 5
+# Optimization Constraint States, in OptConstraints argument order
+OPT_CONSTRAINT_STATES = [State(OPT_IDS[opt_id], 'value') for opt_id in
+                         ('MIN_SIZE', 'MAX_SIZE', 'MAX_PER_INSTRUMENT', 'MAX_PER_ACCOUNT', 'REQUIRED', 'EXCLUDED')]
+# Strategy Clusters. '' = Off. Otherwise a StrategyClusters mode applied before Optimize & Pareto Front
+CLUSTER_MODE_OPTS = [{'label': 'Off', 'value': ''}, {'label': 'Best of each', 'value': 'best'},
+                     {'label': 'Max per Cluster', 'value': 'cap'}]
+CLUSTER_THRESHOLD = 0.7
+CLUSTER_TABLE_ID = 'cluster-table'
+CLUSTER_SUMMARY_ID = 'cluster-summary'
+CLUSTER_GRAPHS_ID = 'cluster-graphs'
+CLUSTER_GRAPH_ID = 'cluster-corr-graph'
+CLUSTER_GRAPH_HEIGHT = 600
+# Cluster States, in apply_strat_clusters() argument order. The table holds the clusters & any edits made to them
+CLUSTER_STATES = [State(OPT_IDS['CLUSTER_THRESHOLD'], 'value'), State(OPT_IDS['CLUSTER_MODE'], 'value'),
+                  State(OPT_IDS['MAX_PER_CLUSTER'], 'value'), State(CLUSTER_TABLE_ID, 'data')]
+# Default Walk Forward In-Sample window & Out-of-Sample step in trading days
+WF_WINDOW_DAYS = 250
+WF_STEP_DAYS = 60
+# Rolling Metric trace options for the Equity Graph. 0 = Off
+ROLLING_WINDOW_ID = 'rolling-window'
+ROLLING_WINDOW_OPTS = [{'label': 'Rolling: Off', 'value': 0}] + [{'label': f'{window}D', 'value': window}
+                                                               for window in PortfolioCalculator.ROLLING_WINDOWS]
+
+# Optimized Portfolios of the browser session. Only Strategy Names & dates, so any web worker can rebuild them
+OPT_STORE_ID = 'opt-portfolios'
+# Pareto front scatter & its Portfolios of the browser session
+PARETO_STORE_ID = 'pareto-portfolios'
+PARETO_GRAPHS_ID = 'pareto-graphs'
+PARETO_GRAPH_ID = 'pareto-front-graph'
+PARETO_GRAPH_HEIGHT = 600
 
 data_trades = DataTrades()
+# Statistics Tables & Equity Graphs already built in this process. Switching between Optimized Portfolios is a lookup
+PAYLOAD_CACHE = PayloadCache()
 current_time: datetime = datetime.now()
-# Optimized Strategy Holder as we can't pass Complex Classes in dcc.Store
-opt_strategies: dict[str, dict] = {}
 
 
 def load_page() -> list:
     """Returns PortfolioTab's layout"""
-    return [HEADER, get_strat_dropdown_button(), get_opt_params(),
+    return [HEADER, dcc.Store(id=OPT_STORE_ID, storage_type='memory'), dcc.Store(id=PARETO_STORE_ID, storage_type='memory'),
+            get_strat_dropdown_button(), get_opt_params(),
             get_portfolio_stats_table(id_name=STAT_TABLE_ID, style_table={
                 'margin-left': MARGIN_LEFT,
                 'width': TABLE_WIDTH
-            }), get_graphs()]
+            }), get_graphs(), html.Div(id=PARETO_GRAPHS_ID), get_cluster_div()]
 
 
 def get_opt_params() -> html.Div:
@@ -54,35 +104,76 @@ def get_opt_params() -> html.Div:
                 **OPT_PERSISTENCE
             ),
             dbc.Tooltip(id='opt-account-size-tt', target=OPT_IDS['ACCOUNT_SIZE'], placement="top", children='0 = Disabled. Otherwise Portfolio Calculator will try to build a Portfolio that fits this Account Size based on the Max Drawdown.'),
+            html.Br(),
+            'Walk Forward Window: ',
+            dcc.Input(id=OPT_IDS['WF_WINDOW'], type='number', value=WF_WINDOW_DAYS, step=1, min=1, **OPT_PERSISTENCE),
+            ' Step: ',
+            dcc.Input(id=OPT_IDS['WF_STEP'], type='number', value=WF_STEP_DAYS, step=1, min=1, **OPT_PERSISTENCE),
+            dbc.Tooltip(id='opt-wf-tt', target=OPT_IDS['WF_WINDOW'], placement="top", children='Trading days each Walk Forward window Optimizes over(In-Sample). Step = Trading days the chosen Portfolio is then traded(Out-of-Sample) before rolling forward.'),
+            html.Br(),
+            'Strategies Min: ',
+            dcc.Input(id=OPT_IDS['MIN_SIZE'], type='number', value=1, step=1, min=1, **OPT_PERSISTENCE),
+            ' Max: ',
+            dcc.Input(id=OPT_IDS['MAX_SIZE'], type='number', value=None, step=1, min=1, placeholder='ALL',
+                      **OPT_PERSISTENCE),
+            dbc.Tooltip(id='opt-size-tt', target=OPT_IDS['MAX_SIZE'], placement="top", children='Fewest & most Strategies in an Optimized Portfolio. Empty Max = ALL.'),
+            html.Br(),
+            'Max per Instrument: ',
+            dcc.Input(id=OPT_IDS['MAX_PER_INSTRUMENT'], type='number', value=None, step=1, min=1,
+                      placeholder='No limit', **OPT_PERSISTENCE),
+            ' Account: ',
+            dcc.Input(id=OPT_IDS['MAX_PER_ACCOUNT'], type='number', value=None, step=1, min=1,
+                      placeholder='No limit', **OPT_PERSISTENCE),
+            dbc.Tooltip(id='opt-group-tt', target=OPT_IDS['MAX_PER_INSTRUMENT'], placement="top", children='Most Strategies trading the same Instrument or in the same Account. Empty = No limit.'),
+            'Required Strategies:',
+            dcc.Dropdown(id=OPT_IDS['REQUIRED'], options=get_strat_list(), value=[], multi=True, **OPT_PERSISTENCE),
+            'Excluded Strategies:',
+            dcc.Dropdown(id=OPT_IDS['EXCLUDED'], options=get_strat_list(), value=[], multi=True, **OPT_PERSISTENCE),
+            'Cluster Correlation: ',
+            dcc.Input(id=OPT_IDS['CLUSTER_THRESHOLD'], type='number', value=CLUSTER_THRESHOLD, step=0.05, min=-1, max=1,
+                      **OPT_PERSISTENCE),
+            html.Button('Cluster', id='cluster-button', n_clicks=0),
+            dbc.Tooltip(id='opt-cluster-tt', target=OPT_IDS['CLUSTER_THRESHOLD'], placement="top", children='Strategies whose Daily PnL correlate at least this much on average are clustered. Cluster shows them below, where a Strategy can be moved by editing its Cluster.'),
+            RadioItems(id=OPT_IDS['CLUSTER_MODE'], options=CLUSTER_MODE_OPTS, value='', inline=True, **OPT_PERSISTENCE),
+            'Max per Cluster: ',
+            dcc.Input(id=OPT_IDS['MAX_PER_CLUSTER'], type='number', value=1, step=1, min=1, **OPT_PERSISTENCE),
+            dbc.Tooltip(id='opt-cluster-mode-tt', target=OPT_IDS['CLUSTER_MODE'], placement="top", children='Applied before Optimize & Pareto Front. Best of each = Only each cluster\'s best Return/DD Strategy. Max per Cluster = At most that many Strategies from the same cluster.'),
+            html.H6('Weight Parameters:'),
+            'Maximize: ',
+            RadioItems(id=OPT_IDS['WEIGHT_OBJECTIVE'], options=WEIGHT_OBJECTIVE_OPTS, value='return_to_dd', inline=True,
+                       **OPT_PERSISTENCE),
+            'Budget: ',
+            RadioItems(id=OPT_IDS['WEIGHT_BUDGET'], options=WEIGHT_BUDGET_OPTS, value='max_drawdown', inline=True,
+                       **OPT_PERSISTENCE),
+            '$',
+            dcc.Input(id=OPT_IDS['WEIGHT_BUDGET_VALUE'], type='number', value=0.00, step=0.01, min=0, **OPT_PERSISTENCE),
+            dbc.Tooltip(id='opt-weight-budget-tt', target=OPT_IDS['WEIGHT_BUDGET_VALUE'], placement="top", children='0 = No budget. Otherwise Optimize Weights only picks contract sizes whose Max Drawdown or Capital Required fits this budget.'),
+            html.Br(),
+            'Max Contracts: ',
+            dcc.Input(id=OPT_IDS['MAX_WEIGHT'], type='number', value=MAX_WEIGHT, step=0.1, min=0.1, **OPT_PERSISTENCE),
+            dcc.Checklist(id=OPT_IDS['WHOLE_CONTRACTS'], options=[{'label': 'Whole Contracts', 'value': 'whole'}],
+                          value=['whole'], inline=True, **OPT_PERSISTENCE),
     ], style={'margin-left': MARGIN_LEFT})
 
 
-def get_opt_strats(sess_id: str, option: str = None) -> PortfolioCalculator | dict:
-    """
-    Get Optimized Strategy Option
-    :param sess_id: String for the 'session_id'
-    :param option: [Optional] String Representing the Option Name for the Radio Button. Default is ALL options
-    :return: A PortfolioCalculator Object with the optimized Strategies or Dict of optimized Strats if option = None
-    """
-    return opt_strategies[sess_id] if option is None else opt_strategies[sess_id][option]
-
-
-def reset_opt_strats(sess_id: str):
-    """
-    Clear old Optimization Results for the session_id if it exists. For when we click the Optimization Button a 2nd time
-    :param sess_id: Session ID string
-    """
-    opt_strategies.get(sess_id, {}).clear()
-
-
-def set_opt_strats(sess_id: str, option: str, p_calc: PortfolioCalculator):
-    """
-    Setter for Optimization Results for the session_id if it exists
-    :param sess_id: String for the 'session_id'
-    :param option: String Representing the Option Name for the Radio Button
-    :param p_calc: PortfolioCalculator Object that stores the Optimized Portfolio of Strategies
-    """
-    opt_strategies.setdefault(sess_id, {})[option] = p_calc
+def get_cluster_div() -> html.Div:
+    """:return: A Div with the reduction summary, an editable Table of each Strategy's cluster & a correlation Heatmap"""
+    return html.Div([
+        html.H6('Strategy Clusters:'),
+        html.Div(id=CLUSTER_SUMMARY_ID),
+        dash_table.DataTable(
+            id=CLUSTER_TABLE_ID,
+            columns=[dict(id=col, name=col, editable=col == 'Cluster',
+                          type='text' if col in ('Strategy', 'Representative') else 'numeric')
+                     for col in StrategyClusters.COLUMNS],
+            data=[],
+            sort_action='native',
+            style_cell={'textAlign': 'right'},
+            style_header={'fontWeight': 'bold'},
+            style_data_conditional=[{'if': {'column_id': 'Cluster'}, 'backgroundColor': 'rgba(0, 116, 217, 0.1)'}],
+        ),
+        html.Div(id=CLUSTER_GRAPHS_ID)
+    ])
 
 
 def get_date_picker():
@@ -100,16 +191,18 @@ def get_graphs() -> html.Div: return html.Div(id='calc-graphs')
 
 
 def get_portfolio_obj(p_obj: list | PortfolioCalculator, start_date: str = None,
-                      end_date: str = None) -> PortfolioCalculator:
+                      end_date: str = None, snapshot: TradesSnapshot = None) -> PortfolioCalculator:
     """
     Retrieves the portfolio calculator object based on selected strategies and date range.
     :param p_obj: An Optimized PortfolioCalculator Object or a List of Strategies
     :param start_date: [Optional] Date to start selection of statistics. Default: ALL Dates
     :param end_date: [Optional] Date to end selection of statistics. Default: ALL Dates
+    :param snapshot: [Optional] TradesSnapshot to read from. Default: The current snapshot
     :return: PortfolioCalculator based on options passed. If already a PortfolioCalculator object, then just return strats_obj.
     """
     if isinstance(p_obj, list):
-        return data_trades.get_calc_portfolio_stats(strat_names=p_obj, start_date=start_date, end_date=end_date)
+        return data_trades.get_calc_portfolio_stats(strat_names=p_obj, start_date=start_date, end_date=end_date,
+                                                    snapshot=snapshot)
     elif isinstance(p_obj, PortfolioCalculator):
         return p_obj
     else:
@@ -117,9 +210,87 @@ def get_portfolio_obj(p_obj: list | PortfolioCalculator, start_date: str = None,
             f"Failed to retrieve a PortfolioCalculator Object for parameters passed\n{p_obj}\nstart_date: {start_date}\nend_date: {end_date}")
 
 
+def get_portfolio_payload(strat_names: list, start_date: str = None, end_date: str = None,
+                          rolling_window: int = 0) -> tuple[list, list]:
+    """
+    Statistics Table rows & Equity Graph of a Portfolio. Served from PAYLOAD_CACHE until 1 of its Strategies changes
+    :param strat_names: A list of Strategy Names
+    :param start_date: [Optional] Date to start selection of statistics. Default: ALL Dates
+    :param end_date: [Optional] Date to end selection of statistics. Default: ALL Dates
+    :param rolling_window: [Optional] Trading days to add Rolling Metric traces for. Default: 0(Off)
+    :return: (Statistics Table rows, Equity Graph components). Must NOT be modified
+    """
+    snapshot = data_trades.get_snapshot()
+    payload_key = PAYLOAD_CACHE.portfolio_key('calc', strat_names, snapshot, start_date=start_date, end_date=end_date,
+                                              rolling_window=rolling_window or 0)
+
+    def create_payload() -> tuple[list, list]:
+        p_calc = get_portfolio_obj(p_obj=strat_names, start_date=start_date, end_date=end_date, snapshot=snapshot)
+        return update_opt_table_stats(p_obj=p_calc), create_equity_graph(p_obj=p_calc, id_name=CALC_EQUITY_GRAPH_ID,
+                                                                         height=GRAPH_HEIGHT,
+                                                                         rolling_window=rolling_window) + \
+            get_calendar_graphs(strat_names=strat_names, start_date=start_date, end_date=end_date, snapshot=snapshot)
+    return PAYLOAD_CACHE.get_or_create(key=payload_key, create=create_payload)
+
+
+def get_calendar_graphs(strat_names: list, start_date: str = None, end_date: str = None,
+                        snapshot: TradesSnapshot = None, weights: dict[str, float] = None) -> list:
+    """
+    :param strat_names: A list of Strategy Names
+    :param start_date: [Optional] Date in the 1st month to show. Whole months are used. Default: ALL Dates
+    :param end_date: [Optional] Date in the last month to show. Whole months are used. Default: ALL Dates
+    :param snapshot: [Optional] TradesSnapshot to read from. Default: The current snapshot
+    :param weights: [Optional] Contract multiplier of each Strategy {'strat_name': 2}. Default: 1 each
+    :return: Monthly, Weekday & Hour of day PnL Heatmaps of the Portfolio
+    """
+    cube = data_trades.get_calendar_cube(strat_names=strat_names, weights=weights, snapshot=snapshot)
+    return create_calendar_heatmaps(cube=cube, id_name=CALC_CALENDAR_GRAPH_ID, start_date=start_date,
+                                    end_date=end_date, height=CALENDAR_GRAPH_HEIGHT)
+
+
 def get_strat_list() -> list: return sorted(data_trades.strats_to_list())
 
 
+def get_opt_constraints(min_size: int = 1, max_size: int = None, max_per_instrument: int = None,
+                        max_per_account: int = None, required: list = None, excluded: list = None) -> OptConstraints:
+    """:return: OptConstraints from the Optimization Parameters. Values come in OPT_CONSTRAINT_STATES order"""
+    return OptConstraints(min_size=min_size, max_size=max_size, max_per_instrument=max_per_instrument,
+                          max_per_account=max_per_account, required=required, excluded=excluded)
+
+
+def get_cluster_overrides(cluster_rows: list) -> dict[str, int]:
+    """:return: {'strat_name': cluster number} from the Cluster Table rows, including any edits. Blank cells are skipped"""
+    overrides = {}
+    for row in cluster_rows or []:
+        try:
+            overrides[row['Strategy']] = int(row['Cluster'])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return overrides
+
+
+def apply_strat_clusters(constraints: OptConstraints, start_date: str = None, end_date: str = None,
+                         threshold: float = CLUSTER_THRESHOLD, mode: str = '', max_per_cluster: int = 1,
+                         cluster_rows: list = None) -> OptConstraints:
+    """
+    Add the Strategy Clusters to the Optimization Constraints. Values come in CLUSTER_STATES order
+    :param constraints: OptConstraints from the Optimization Parameters
+    :param start_date: [Optional] Starting date of the Daily PnL used to pick representatives. Default: ALL Dates
+    :param end_date: [Optional] End Date of the Daily PnL used to pick representatives. Default: ALL Dates
+    :param threshold: [Optional] Cluster Correlation of Strategies that aren't in the Cluster Table
+    :param mode: [Optional] '' = Off. Otherwise a StrategyClusters.MODES mode
+    :param max_per_cluster: [Optional] Most Strategies from the same cluster in 'cap' mode
+    :param cluster_rows: [Optional] Cluster Table rows. Their clusters are used instead of clustering again
+    :return: OptConstraints with the clusters applied
+    """
+    if not mode:
+        return constraints
+    clusters = data_trades.get_strat_clusters(threshold=CLUSTER_THRESHOLD if threshold is None else threshold,
+                                              start_date=start_date, end_date=end_date,
+                                              overrides=get_cluster_overrides(cluster_rows=cluster_rows))
+    return clusters.to_constraints(constraints=constraints, mode=mode, max_per_cluster=max_per_cluster or 1)
+
+
 def get_strat_dropdown_button() -> html.Div:
     """:return: Return Strategy Drop Down Menu and Optimize Portfolio button"""
     return html.Div(children=[
@@ -138,6 +309,10 @@ def get_strat_dropdown_button() -> html.Div:
             get_date_picker(),
             html.Button('Analysis', id='analysis-button', n_clicks=0),
             html.Button('Optimize', id='optimize-button', n_clicks=0),
+            html.Button('Walk Forward', id='walk-forward-button', n_clicks=0),
+            html.Button('Optimize Weights', id='optimize-weights-button', n_clicks=0),
+            html.Button('Pareto Front', id='pareto-button', n_clicks=0),
+            RadioItems(id=ROLLING_WINDOW_ID, options=ROLLING_WINDOW_OPTS, value=0, inline=True, **OPT_PERSISTENCE),
             html.Div(id='dyn-opt-radio-opts')
         ],
             style={'margin-left': MARGIN_LEFT}
@@ -149,29 +324,38 @@ def get_strat_dropdown_button() -> html.Div:
 
 
 @callback(
-    Output('dyn-opt-radio-opts', 'children'),
+    [Output('dyn-opt-radio-opts', 'children'), Output(OPT_STORE_ID, 'data')],
     Input('optimize-button', 'n_clicks'),
-    State('session-id', 'data'),
     State(OPT_IDS['DATE_RANGE'], 'start_date'),
     State(OPT_IDS['DATE_RANGE'], 'end_date'),
     State(OPT_IDS['ACCOUNT_SIZE'], 'value'),
+    *CLUSTER_STATES,
+    *OPT_CONSTRAINT_STATES,
     prevent_initial_call=True
 )
-def update_opt_button(n_clicks: int, session_id: str, start_date: str = None, end_date: str = None, account_size: float = 0.0) -> RadioItems:
+def update_opt_button(n_clicks: int, start_date: str = None, end_date: str = None, account_size: float = 0.0,
+                      cluster_threshold: float = CLUSTER_THRESHOLD, cluster_mode: str = '', max_per_cluster: int = 1,
+                      cluster_rows: list = None, *constraint_values) -> tuple[RadioItems, dict]:
     """
-    Optimization Button - Finds best Optimizations, creates Radio buttons for them, & stores them in a global dict under
-    the session-id
+    Optimization Button - Finds best Optimizations, creates Radio buttons for them, & stores them in the browser
+    session's dcc.Store, so whichever web worker gets the Radio button click can rebuild them
     :param n_clicks: Amount of clicks from Optimization Button
-    :param session_id: Session ID of the Session
     :param start_date: [Optional] Starting date to select from dataframe. Default: ALL Dates
     :param end_date: [Optional] End Date to select from dataframe. Default: ALL Dates
     :param account_size: [Optional] Amount of money in our Trading Account that we can withstand Drawdown
-    :return: Output from hitting the Optimize Button
+    :param cluster_threshold: [Optional] Cluster Correlation
+    :param cluster_mode: [Optional] '' = Off. Otherwise a StrategyClusters.MODES mode
+    :param max_per_cluster: [Optional] Most Strategies from the same cluster in 'cap' mode
+    :param cluster_rows: [Optional] Cluster Table rows, including any edits
+    :param constraint_values: Optimization Constraints in OPT_CONSTRAINT_STATES order
+    :return: Output from hitting the Optimize Button & the Optimized Portfolios {'opt_1': {'strat_names': [], ...}}
     """
-    # Clear any Old Optimized Strategies from Memory
-    reset_opt_strats(sess_id=session_id)
-    top_performers = data_trades.optimize_portfolio(start_date=start_date, end_date=end_date, account_size=account_size)
+    constraints = apply_strat_clusters(get_opt_constraints(*constraint_values), start_date, end_date, cluster_threshold,
+                                       cluster_mode, max_per_cluster, cluster_rows)
+    top_performers = data_trades.optimize_portfolio(start_date=start_date, end_date=end_date, account_size=account_size,
+                                                    constraints=constraints)
     opt_options = []
+    opt_portfolios = {}
     logger.debug("Top Strategy Performers:")
     for count, top_pc in enumerate(top_performers, 1):
         opt_options.append(
@@ -179,10 +363,88 @@ def update_opt_button(n_clicks: int, session_id: str, start_date: str = None, en
                 'label': f'{count}. Return/DD: {top_pc.return_to_dd}, Profit: ${top_pc.net_profit:,.2f}, Strategies: {len(top_pc.strat_names)}',
                 'value': f'opt_{count}'})
         # Add to Optimized Strategies Dictionary
-        set_opt_strats(session_id, f'opt_{count}', top_pc)
+        opt_portfolios[f'opt_{count}'] = {'strat_names': top_pc.strat_names, 'start_date': start_date,
+                                          'end_date': end_date}
         logger.debug(
             f"{count}. Return to DD: {top_pc.return_to_dd}. Strategy Names: {top_pc.strat_names}, Option: opt_{count}")
-    return RadioItems(options=opt_options, id='opt-radio-items')
+    return RadioItems(options=opt_options, id='opt-radio-items'), opt_portfolios
+
+
+@callback(
+    [Output(STAT_TABLE_ID, "data", allow_duplicate=True), Output('calc-graphs', 'children', allow_duplicate=True)],
+    Input('walk-forward-button', 'n_clicks'),
+    State(OPT_IDS['DATE_RANGE'], 'start_date'),
+    State(OPT_IDS['DATE_RANGE'], 'end_date'),
+    State(OPT_IDS['ACCOUNT_SIZE'], 'value'),
+    State(OPT_IDS['WF_WINDOW'], 'value'),
+    State(OPT_IDS['WF_STEP'], 'value'),
+    *OPT_CONSTRAINT_STATES,
+    prevent_initial_call=True
+)
+def update_walk_forward_click(n_clicks: int, start_date: str = None, end_date: str = None, account_size: float = 0.0,
+                              window: int = WF_WINDOW_DAYS, step: int = WF_STEP_DAYS,
+                              *constraint_values) -> tuple[list, list]:
+    """
+    Walk Forward Button - Runs a rolling In-Sample/Out-of-Sample Optimization over ALL Strategies
+    :param n_clicks: Amount of clicks from Walk Forward Button
+    :param start_date: [Optional] Starting date to select from dataframe. Default: ALL Dates
+    :param end_date: [Optional] End Date to select from dataframe. Default: ALL Dates
+    :param account_size: [Optional] Amount of money in our Trading Account that we can withstand Drawdown
+    :param window: In-Sample trading days for each window
+    :param step: Out-of-Sample trading days for each window
+    :param constraint_values: Optimization Constraints in OPT_CONSTRAINT_STATES order
+    :return: Out-of-Sample Statistics Table & the stitched Out-of-Sample Equity Graph with a Table of each window
+    """
+    if not window or not step:
+        raise PreventUpdate
+    wf_obj = data_trades.walk_forward(window=window, step=step, account_size=account_size, start_date=start_date,
+                                      end_date=end_date, constraints=get_opt_constraints(*constraint_values))
+    return update_opt_table_stats(p_obj=wf_obj), create_walk_forward_graph(wf_obj=wf_obj, id_name=CALC_EQUITY_GRAPH_ID,
+                                                                           height=GRAPH_HEIGHT)
+
+
+@callback(
+    [Output(STAT_TABLE_ID, "data", allow_duplicate=True), Output('calc-graphs', 'children', allow_duplicate=True)],
+    Input('optimize-weights-button', 'n_clicks'),
+    State('strategy-dropdown', 'value'),
+    State(OPT_IDS['DATE_RANGE'], 'start_date'),
+    State(OPT_IDS['DATE_RANGE'], 'end_date'),
+    State(OPT_IDS['WEIGHT_OBJECTIVE'], 'value'),
+    State(OPT_IDS['WEIGHT_BUDGET'], 'value'),
+    State(OPT_IDS['WEIGHT_BUDGET_VALUE'], 'value'),
+    State(OPT_IDS['MAX_WEIGHT'], 'value'),
+    State(OPT_IDS['WHOLE_CONTRACTS'], 'value'),
+    State(ROLLING_WINDOW_ID, 'value'),
+    prevent_initial_call=True
+)
+def update_opt_weights_click(n_clicks: int, strats_chosen: list, start_date: str = None, end_date: str = None,
+                             objective: str = 'return_to_dd', budget: str = 'max_drawdown', budget_value: float = 0.0,
+                             max_weight: float = MAX_WEIGHT, whole_contracts: list = None,
+                             rolling_window: int = 0) -> tuple[list, list]:
+    """
+    Optimize Weights Button - Sizes each chosen Strategy with a contract multiplier within the budget
+    :param n_clicks: Amount of clicks from Optimize Weights Button
+    :param strats_chosen: A list of strings of Strategies Chosen
+    :param start_date: [Optional] Starting date to select from dataframe. Default: ALL Dates
+    :param end_date: [Optional] End Date to select from dataframe. Default: ALL Dates
+    :param objective: 'return_to_dd' or 'net_profit' to maximize
+    :param budget: 'max_drawdown' or 'req_cap_daytrade' to keep within budget_value
+    :param budget_value: Most Max Drawdown or Capital Required allowed. 0 = No budget
+    :param max_weight: Most contracts per Strategy
+    :param whole_contracts: ['whole'] = Whole contracts. [] = Continuous multipliers
+    :param rolling_window: [Optional] Trading days to add Rolling Metric traces for. Default: 0(Off)
+    :return: The weighted Portfolio's Statistics Table & Equity Graph. Each Strategy's trace shows its contracts
+    """
+    if not strats_chosen or not max_weight:
+        raise PreventUpdate
+    p_calc = data_trades.optimize_weights(strat_names=strats_chosen, objective=objective, budget=budget,
+                                          budget_value=budget_value, max_weight=max_weight,
+                                          integer='whole' in (whole_contracts or []), start_date=start_date,
+                                          end_date=end_date)
+    return update_opt_table_stats(p_obj=p_calc), create_equity_graph(p_obj=p_calc, id_name=CALC_EQUITY_GRAPH_ID,
+                                                                     height=GRAPH_HEIGHT, rolling_window=rolling_window) + \
+        get_calendar_graphs(strat_names=p_calc.strat_names, start_date=start_date, end_date=end_date,
+                            weights=p_calc.weights)
 
 
 @callback(
@@ -191,40 +453,154 @@ def update_opt_button(n_clicks: int, session_id: str, start_date: str = None, en
     State('strategy-dropdown', 'value'),
     State(OPT_IDS['DATE_RANGE'], 'start_date'),
     State(OPT_IDS['DATE_RANGE'], 'end_date'),
+    State(ROLLING_WINDOW_ID, 'value'),
     prevent_initial_call='initial_duplicate'
 )
-def update_analysis_click(n_clicks: int, strats_chosen: list, start_date: str, end_date: str) -> tuple[list, list]:
+def update_analysis_click(n_clicks: int, strats_chosen: list, start_date: str, end_date: str,
+                          rolling_window: int = 0) -> tuple[list, list]:
     """
     Update the Statistics Table when a New Strategy Combination is chosen or the optimize button is hit
     :param n_clicks: Amount of times button is clicked
     :param strats_chosen: A list of strings of Strategies Chosen
     :param start_date: [Optional] Date to start selection of statistics. Default: ALL Dates
     :param end_date: [Optional] Date to end selection of statistics. Default: ALL Dates
+    :param rolling_window: [Optional] Trading days to add Rolling Metric traces for. Default: 0(Off)
     :return: A list containing dicts to update each row in the Statistics Table
     """
-    p_calc = get_portfolio_obj(p_obj=strats_chosen, start_date=start_date, end_date=end_date)
-    return update_opt_table_stats(p_obj=p_calc), create_equity_graph(p_obj=p_calc, id_name=CALC_EQUITY_GRAPH_ID,
-                                                                     height=GRAPH_HEIGHT)
+    return get_portfolio_payload(strat_names=strats_chosen or [], start_date=start_date, end_date=end_date,
+                                 rolling_window=rolling_window)
 
 
 @callback(
     [Output('strategy-dropdown', 'value'), Output(STAT_TABLE_ID, "data", allow_duplicate=True),
      Output('calc-graphs', 'children', allow_duplicate=True)],
     Input('opt-radio-items', 'value'),
-    State('session-id', 'data'),
+    State(OPT_STORE_ID, 'data'),
+    State(ROLLING_WINDOW_ID, 'value'),
     prevent_initial_call=True
 )
-def sel_radio_opt(option: str, session_id: str) -> tuple[list, list, list]:
+def sel_radio_opt(option: str, opt_portfolios: dict, rolling_window: int = 0) -> tuple[list, list, list]:
     """
     Called when a Radio Button is Selected from "Optimized Strategies"
     :param option: Name of Option
-    :param session_id: Current Session ID
+    :param opt_portfolios: Optimized Portfolios from update_opt_button() {'opt_1': {'strat_names': [], ...}}
+    :param rolling_window: [Optional] Trading days to add Rolling Metric traces for. Default: 0(Off)
     :return: (A list of Strategy Names), Statistics Table
     """
-    if option is not None:
-        p_calc = get_opt_strats(session_id, option)
-        return sorted(p_calc.strat_names), update_opt_table_stats(p_obj=p_calc), create_equity_graph(p_obj=p_calc,
-                                                                                                     id_name=CALC_EQUITY_GRAPH_ID,
-                                                                                                     height=GRAPH_HEIGHT)
+    if option is not None and option in (opt_portfolios or {}):
+        opt_portfolio = opt_portfolios[option]
+        table_stats, graphs = get_portfolio_payload(strat_names=opt_portfolio['strat_names'],
+                                                    start_date=opt_portfolio['start_date'],
+                                                    end_date=opt_portfolio['end_date'], rolling_window=rolling_window)
+        return sorted(opt_portfolio['strat_names']), table_stats, graphs
     else:  # No reason to update anything on Initial loading of Optimize Radio buttons when value = None
         raise PreventUpdate
+
+
+@callback(
+    [Output(PARETO_GRAPHS_ID, 'children'), Output(PARETO_STORE_ID, 'data')],
+    Input('pareto-button', 'n_clicks'),
+    State(OPT_IDS['DATE_RANGE'], 'start_date'),
+    State(OPT_IDS['DATE_RANGE'], 'end_date'),
+    State(OPT_IDS['ACCOUNT_SIZE'], 'value'),
+    *CLUSTER_STATES,
+    *OPT_CONSTRAINT_STATES,
+    prevent_initial_call=True
+)
+def update_pareto_click(n_clicks: int, start_date: str = None, end_date: str = None, account_size: float = 0.0,
+                        cluster_threshold: float = CLUSTER_THRESHOLD, cluster_mode: str = '', max_per_cluster: int = 1,
+                        cluster_rows: list = None, *constraint_values) -> tuple[list, dict]:
+    """
+    Pareto Front Button - Finds every Portfolio no other beats on Net Profit, Max DD., Capital Required & Daily Win
+    Rate at once, instead of only the top Return/DD
+    :param n_clicks: Amount of clicks from Pareto Front Button
+    :param start_date: [Optional] Starting date to select from dataframe. Default: ALL Dates
+    :param end_date: [Optional] End Date to select from dataframe. Default: ALL Dates
+    :param account_size: [Optional] Amount of money in our Trading Account that we can withstand Drawdown
+    :param cluster_threshold: [Optional] Cluster Correlation
+    :param cluster_mode: [Optional] '' = Off. Otherwise a StrategyClusters.MODES mode
+    :param max_per_cluster: [Optional] Most Strategies from the same cluster in 'cap' mode
+    :param cluster_rows: [Optional] Cluster Table rows, including any edits
+    :param constraint_values: Optimization Constraints in OPT_CONSTRAINT_STATES order
+    :return: The Pareto front scatter & its Portfolios {'portfolios': [[Strategy Names]], 'start_date': ...}
+    """
+    constraints = apply_strat_clusters(get_opt_constraints(*constraint_values), start_date, end_date, cluster_threshold,
+                                       cluster_mode, max_per_cluster, cluster_rows)
+    front = data_trades.optimize_pareto(start_date=start_date, end_date=end_date, account_size=account_size,
+                                        constraints=constraints)
+    pareto_portfolios = {'portfolios': [portfolio['strategies'] for portfolio in front], 'start_date': start_date,
+                         'end_date': end_date}
+    return create_pareto_graph(front=front, id_name=PARETO_GRAPH_ID, height=PARETO_GRAPH_HEIGHT), pareto_portfolios
+
+
+@callback(
+    [Output('strategy-dropdown', 'value', allow_duplicate=True), Output(STAT_TABLE_ID, "data", allow_duplicate=True),
+     Output('calc-graphs', 'children', allow_duplicate=True)],
+    Input(PARETO_GRAPH_ID, 'clickData'),
+    State(PARETO_STORE_ID, 'data'),
+    State(ROLLING_WINDOW_ID, 'value'),
+    prevent_initial_call=True
+)
+def sel_pareto_point(click_data: dict, pareto_portfolios: dict, rolling_window: int = 0) -> tuple[list, list, list]:
+    """
+    Called when a point on the Pareto front scatter is clicked
+    :param click_data: The clicked point. Its customdata is the Portfolio's position in pareto_portfolios
+    :param pareto_portfolios: Pareto front Portfolios from update_pareto_click()
+    :param rolling_window: [Optional] Trading days to add Rolling Metric traces for. Default: 0(Off)
+    :return: (A list of Strategy Names), Statistics Table, Equity Graph
+    """
+    if not click_data or not pareto_portfolios:
+        raise PreventUpdate
+    portfolio_idx = click_data['points'][0].get('customdata')
+    if portfolio_idx is None or not 0 <= portfolio_idx < len(pareto_portfolios['portfolios']):
+        raise PreventUpdate
+    strat_names = pareto_portfolios['portfolios'][portfolio_idx]
+    table_stats, graphs = get_portfolio_payload(strat_names=strat_names, start_date=pareto_portfolios['start_date'],
+                                                end_date=pareto_portfolios['end_date'], rolling_window=rolling_window)
+    return sorted(strat_names), table_stats, graphs
+
+
+@callback(
+    [Output(CLUSTER_TABLE_ID, 'data'), Output(CLUSTER_SUMMARY_ID, 'children'), Output(CLUSTER_GRAPHS_ID, 'children')],
+    Input('cluster-button', 'n_clicks'),
+    Input(CLUSTER_TABLE_ID, 'data_timestamp'),
+    State(OPT_IDS['DATE_RANGE'], 'start_date'),
+    State(OPT_IDS['DATE_RANGE'], 'end_date'),
+    *CLUSTER_STATES,
+    *OPT_CONSTRAINT_STATES,
+    prevent_initial_call=True
+)
+def update_cluster_click(n_clicks: int, data_timestamp: int, start_date: str = None, end_date: str = None,
+                        cluster_threshold: float = CLUSTER_THRESHOLD, cluster_mode: str = '', max_per_cluster: int = 1,
+                        cluster_rows: list = None, *constraint_values) -> tuple[list, str, list]:
+    """
+    Cluster Button - Clusters ALL Strategies by Daily PnL correlation over the Optimization dates. Editing a Cluster in
+    the Table moves that Strategy, & the representatives, summary & Heatmap are rebuilt with the edit
+    :param n_clicks: Amount of clicks from Cluster Button
+    :param data_timestamp: [PlaceHolder] When the Cluster Table was last edited
+    :param start_date: [Optional] Starting date to select from dataframe. Default: ALL Dates
+    :param end_date: [Optional] End Date to select from dataframe. Default: ALL Dates
+    :param cluster_threshold: [Optional] Cluster Correlation
+    :param cluster_mode: [Optional] '' = Off. Otherwise a StrategyClusters.MODES mode
+    :param max_per_cluster: [Optional] Most Strategies from the same cluster in 'cap' mode
+    :param cluster_rows: [Optional] Cluster Table rows, including any edits
+    :param constraint_values: Optimization Constraints in OPT_CONSTRAINT_STATES order
+    :return: Cluster Table rows, the search reduction summary & the correlation Heatmap
+    """
+    # The button clusters from scratch. A Table edit keeps every cluster in the Table
+    edited = ctx.triggered_id == CLUSTER_TABLE_ID
+    clusters = data_trades.get_strat_clusters(threshold=CLUSTER_THRESHOLD if cluster_threshold is None
+                                              else cluster_threshold, start_date=start_date, end_date=end_date,
+                                              overrides=get_cluster_overrides(cluster_rows=cluster_rows) if edited
+                                              else None)
+    constraints = get_opt_constraints(*constraint_values)
+    reduction = clusters.get_reduction(constraints=constraints, mode=cluster_mode or 'best',
+                                       max_per_cluster=max_per_cluster or 1)
+    mode_label = next(opt['label'] for opt in CLUSTER_MODE_OPTS if opt['value'] == (cluster_mode or 'best'))
+    summary = (f"{reduction['strategies']} Strategies in {reduction['clusters']} clusters. {mode_label}: "
+               f"{reduction['after']:,} of {reduction['before']:,} possible Portfolios ({reduction['pct']}% fewer)"
+               f"{'' if cluster_mode else '. Clusters are Off'}")
+    cluster_df = clusters.get_table(constraints=constraints)
+    cluster_df['Representative'] = cluster_df['Representative'].map({True: 'Yes', False: ''})
+    return (cluster_df.astype(object).where(cluster_df.notna(), None).to_dict('records'), summary,
+            create_cluster_heatmap(clusters=clusters, id_name=CLUSTER_GRAPH_ID, height=CLUSTER_GRAPH_HEIGHT))
@@ -0,0 +1,200 @@
+from dash import html, dcc, dash_table, Input, Output, State, callback
+from dash.dcc import RadioItems
+from dash.exceptions import PreventUpdate
+
+from src.UI.utils import create_equity_graph, get_portfolio_stats_table, update_opt_table_stats
+from src.conf_setup.strategy_tags import StrategyTags
+from src.data.analyzers.daily_rollups import DailyRollups
+from src.data.types.data_trades import DataTrades
+
+"""Rollup Tab Dash Page"""
+
+TAB_LABEL = 'Rollups'
+HEADER = html.H3(children=TAB_LABEL, style={"textAlign": "center"}, )
+PERSISTENCE = {'persistence': True, 'persistence_type': 'local'}
+ID_GROUP = 'rollup-group'
+ID_DATE_RANGE = 'rollup-date-range'
+ID_SUMMARY_TABLE = 'rollup-summary-table'
+ID_STAT_TABLE = 'rollup-stat-table'
+ID_MEMBER_TABLE = 'rollup-member-table'
+ID_GRAPHS = 'rollup-graphs'
+ID_EQUITY_GRAPH = 'rollup-equity-curve'
+ID_TAG_STRAT = 'rollup-tag-strategy'
+ID_TAG_INPUT = 'rollup-tag-input'
+ID_TAG_SAVE = 'rollup-tag-save-button'
+GROUP_OPTS = [{'label': group_col, 'value': group_col} for group_col in DailyRollups.GROUP_COLS]
+MARGIN_LEFT = '75%'
+TABLE_WIDTH = '25%'
+GRAPH_HEIGHT = 600
+
+data_trades = DataTrades()
+
+
+def load_page() -> list:
+    """Returns RollupTab's layout"""
+    return [HEADER, get_rollup_options(), get_summary_table(), get_tag_editor(),
+            get_portfolio_stats_table(id_name=ID_STAT_TABLE, style_table={'margin-left': MARGIN_LEFT,
+                                                                           'width': TABLE_WIDTH}),
+            html.Div(id=ID_GRAPHS), get_member_table()]
+
+
+def get_rollup_options() -> html.Div:
+    """:return: Group to Rollup by & the dates to calculate over"""
+    return html.Div(children=[
+        RadioItems(id=ID_GROUP, options=GROUP_OPTS, value=DailyRollups.GROUP_COLS[0], inline=True, **PERSISTENCE),
+        dcc.DatePickerRange(id=ID_DATE_RANGE, clearable=True, **PERSISTENCE),
+    ])
+
+
+def get_summary_table() -> dash_table.DataTable:
+    """:return: A sortable Table of every Rollup in the group. Select a row to drill down into it"""
+    return dash_table.DataTable(
+        id=ID_SUMMARY_TABLE,
+        columns=[dict(id=col, name=col) for col in DailyRollups.SUMMARY_COLS],
+        sort_action='native',
+        row_selectable='single',
+        style_cell={'textAlign': 'right'},
+        style_header={'fontWeight': 'bold'},
+    )
+
+
+def get_member_table() -> dash_table.DataTable:
+    """:return: A sortable Table of each member Strategy's part of the selected Rollup"""
+    return dash_table.DataTable(
+        id=ID_MEMBER_TABLE,
+        columns=[dict(id=col, name=col) for col in ['Strategy'] + DailyRollups.SUMMARY_COLS[2:]],
+        sort_action='native',
+        style_cell={'textAlign': 'right'},
+        style_header={'fontWeight': 'bold'},
+    )
+
+
+def get_tag_editor() -> html.Div:
+    """:return: Inputs to set a Strategy's Tags. Tags are Rollups too"""
+    strat_names = sorted(data_trades.strats_to_list())
+    return html.Div(children=[
+        "Strategy Tags:",
+        dcc.Dropdown(id=ID_TAG_STRAT, options=strat_names, value=strat_names[0] if strat_names else None,
+                     clearable=False),
+        dcc.Input(id=ID_TAG_INPUT, type='text', placeholder='Comma separated Tags. Ex: Trend, Overnight', debounce=True),
+        html.Button('Save Tags', id=ID_TAG_SAVE, n_clicks=0),
+    ])
+
+
+def format_stats(rollup_ss) -> dict:
+    """:return: Formatted SUMMARY_COLS Statistics of a RollupStats"""
+    return {'Net Profit': f"${rollup_ss.net_profit:,.2f}", 'Max Drawdown': f"${rollup_ss.max_drawdown:,.2f}",
+            'Return to Drawdown': f"{rollup_ss.return_to_dd:,.2f}",
+            'Capital Required': f"${rollup_ss.req_cap_daytrade:,.2f}",
+            'Daily Win Rate': f"{rollup_ss.daily_win_rate:,.2f}%"}
+
+
+def get_summary_rows(group_col: str, start_date: str = None, end_date: str = None) -> list:
+    """
+    :param group_col: 1 of DailyRollups.GROUP_COLS
+    :param start_date: [Optional] Date to start selection of statistics. Default: ALL Dates
+    :param end_date: [Optional] Date to end selection of statistics. Default: ALL Dates
+    :return: Summary Table rows of every Rollup in the group
+    """
+    summary_df = data_trades.get_rollups().get_summary(group_col=group_col, start_date=start_date, end_date=end_date)
+    summary_df['Rollup'] = summary_df['Rollup'].astype(str)
+    return summary_df.to_dict('records')
+
+
+"""****************** Callbacks ******************"""
+
+
+@callback(
+    [Output(ID_SUMMARY_TABLE, 'data'), Output(ID_SUMMARY_TABLE, 'selected_rows')],
+    Input(ID_GROUP, 'value'),
+    Input(ID_DATE_RANGE, 'start_date'),
+    Input(ID_DATE_RANGE, 'end_date'),
+)
+def update_summary(group_col: str, start_date: str = None, end_date: str = None) -> tuple[list, list]:
+    """
+    Show the Statistics of every Rollup in the group
+    :param group_col: 1 of DailyRollups.GROUP_COLS
+    :param start_date: [Optional] Date to start selection of statistics. Default: ALL Dates
+    :param end_date: [Optional] Date to end selection of statistics. Default: ALL Dates
+    :return: Summary Table rows & no row selected
+    """
+    if group_col not in DailyRollups.GROUP_COLS:
+        raise PreventUpdate
+    return get_summary_rows(group_col=group_col, start_date=start_date, end_date=end_date), []
+
+
+@callback(
+    [Output(ID_STAT_TABLE, 'data'), Output(ID_GRAPHS, 'children'), Output(ID_MEMBER_TABLE, 'data')],
+    Input(ID_SUMMARY_TABLE, 'derived_virtual_selected_rows'),
+    State(ID_SUMMARY_TABLE, 'derived_virtual_data'),
+    State(ID_GROUP, 'value'),
+    State(ID_DATE_RANGE, 'start_date'),
+    State(ID_DATE_RANGE, 'end_date'),
+    prevent_initial_call=True
+)
+def update_drill_down(selected_rows: list, rows: list, group_col: str, start_date: str = None,
+                      end_date: str = None) -> tuple[list, list, list]:
+    """
+    Drill down into the selected Rollup: its Statistics, its Equity Curve with each member Strategy's & their Statistics
+    :param selected_rows: Position of the selected row in the sorted Summary Table
+    :param rows: The sorted Summary Table rows
+    :param group_col: 1 of DailyRollups.GROUP_COLS
+    :param start_date: [Optional] Date to start selection of statistics. Default: ALL Dates
+    :param end_date: [Optional] Date to end selection of statistics. Default: ALL Dates
+    :return: Statistics Table, Equity Graph & member Table
+    """
+    if not selected_rows or not rows:
+        return [], [], []
+    rollups = data_trades.get_rollups()
+    value = rows[selected_rows[0]]['Rollup']
+    # Table values are strings. Find the Rollup's original value
+    value = next((group for group in rollups.get_groups(group_col=group_col) if str(group) == value), value)
+    rollup_ss = rollups.get_rollup_stats(group_col=group_col, value=value, start_date=start_date, end_date=end_date)
+    if rollup_ss.trade_count == 0:
+        return [], [], []
+    member_rows = [{'Strategy': member_ss.name, **format_stats(member_ss)} for member_ss in rollup_ss.sel_strats_ss]
+    return (update_opt_table_stats(p_obj=rollup_ss),
+            create_equity_graph(p_obj=rollup_ss, id_name=ID_EQUITY_GRAPH, height=GRAPH_HEIGHT), member_rows)
+
+
+@callback(
+    Output(ID_TAG_INPUT, 'value'),
+    Input(ID_TAG_STRAT, 'value'),
+)
+def update_tag_input(strat_name: str) -> str:
+    """:return: The chosen Strategy's saved Tags"""
+    if not strat_name:
+        raise PreventUpdate
+    return ', '.join(data_trades.get_strat_tags().get_tags(name=strat_name))
+
+
+@callback(
+    [Output(ID_SUMMARY_TABLE, 'data', allow_duplicate=True),
+     Output(ID_SUMMARY_TABLE, 'selected_rows', allow_duplicate=True)],
+    Input(ID_TAG_SAVE, 'n_clicks'),
+    State(ID_TAG_STRAT, 'value'),
+    State(ID_TAG_INPUT, 'value'),
+    State(ID_GROUP, 'value'),
+    State(ID_DATE_RANGE, 'start_date'),
+    State(ID_DATE_RANGE, 'end_date'),
+    prevent_initial_call=True
+)
+def save_tags(n_clicks: int, strat_name: str, tags: str, group_col: str, start_date: str = None,
+              end_date: str = None) -> tuple[list, list]:
+    """
+    Save the chosen Strategy's Tags & show the Rollups again, so new Tags show up right away
+    :param n_clicks: Amount of clicks from Save Tags Button
+    :param strat_name: The chosen Strategy
+    :param tags: Comma separated Tags. Empty removes every Tag
+    :param group_col: 1 of DailyRollups.GROUP_COLS
+    :param start_date: [Optional] Date to start selection of statistics. Default: ALL Dates
+    :param end_date: [Optional] Date to end selection of statistics. Default: ALL Dates
+    :return: Summary Table rows & no row selected
+    """
+    if not strat_name or group_col not in DailyRollups.GROUP_COLS:
+        raise PreventUpdate
+    strat_tags = data_trades.get_strat_tags()
+    all_tags = strat_tags.get_strat_tags()
+    all_tags[strat_name] = (tags or '').split(StrategyTags.SEPARATOR)
+    strat_tags.save_tags(strat_tags=all_tags)
+    return get_summary_rows(group_col=group_col, start_date=start_date, end_date=end_date), []
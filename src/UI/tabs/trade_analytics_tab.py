@@ -0,0 +1,54 @@
+from dash import html, dcc, dash_table, Input, Output, callback
+
+from src.data.analyzers.trade_analytics import TradeAnalytics
+from src.data.types.data_trades import DataTrades
+
+"""Trade Analytics Tab Dash Page"""
+
+TAB_LABEL = 'Trade Analytics'
+HEADER = html.H3(children=TAB_LABEL, style={"textAlign": "center"}, )
+ID_ANALYTICS_TABLE = 'trade-analytics-table'
+ID_ANALYTICS_UPDATE = 'trade-analytics-update'
+# Rows are cached by data version, so each update is a lookup until new Trades come in
+UPDATE_TABLE_SECS = 60
+# Columns shown as percentages
+PCT_COLS = ['Win Rate', 'Long Win Rate', 'Short Win Rate', 'MFE Capture', 'Commission Drag']
+
+data_trades = DataTrades()
+
+
+def load_page() -> list:
+    """Returns TradeAnalyticsTab's layout"""
+    return [HEADER, get_analytics_table(),
+            dcc.Interval(id=ID_ANALYTICS_UPDATE, interval=UPDATE_TABLE_SECS*1000, n_intervals=0)]
+
+
+def get_analytics_table() -> dash_table.DataTable:
+    """:return: A sortable & filterable Table of every Strategy's Trade Statistics"""
+    return dash_table.DataTable(
+        id=ID_ANALYTICS_TABLE,
+        columns=[dict(id=col, name=f"{col} %" if col in PCT_COLS else col, type='text' if col == 'Strategy'
+                      else 'numeric') for col in TradeAnalytics.COLUMNS],
+        sort_action='native',
+        filter_action='native',
+        fixed_columns={'headers': True, 'data': 1},
+        style_table={'minWidth': '100%', 'overflowX': 'auto'},
+        style_cell={'textAlign': 'right', 'minWidth': '90px'},
+        style_header={'fontWeight': 'bold', 'whiteSpace': 'normal'},
+    )
+
+
+"""****************** Callbacks ******************"""
+
+
+@callback(
+    Output(ID_ANALYTICS_TABLE, 'data'),
+    Input(ID_ANALYTICS_UPDATE, 'n_intervals'),
+)
+def update_analytics_table(n_intervals: int) -> list:
+    """
+    :param n_intervals: [PlaceHolder] Amount of times the update Interval has been called
+    :return: Trade Statistics rows of every Strategy. Ratios without a denominator are blank
+    """
+    analytics_df = data_trades.get_trade_analytics()
+    return analytics_df.astype(object).where(analytics_df.notna(), None).to_dict('records')
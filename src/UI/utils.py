@@ -3,23 +3,30 @@ from tracemalloc import Statistic
 import plotly.graph_objs as go
 from dash import dcc, html, dash_table
 
+from src.conf_setup import logger
+from src.data.analyzers.calendar_cubes import CalendarCube
 from src.data.analyzers.portfolio_calculator import PortfolioCalculator
+from src.data.analyzers.strategy_clusters import StrategyClusters
+from src.data.analyzers.walk_forward import WalkForward
 
 
-def create_equity_graph(p_obj: PortfolioCalculator, id_name: str, height: int = 750) -> list:
+def create_equity_graph(p_obj: PortfolioCalculator, id_name: str, height: int = 750, rolling_window: int = 0) -> list:
     """
     Create an Equity Graph based on a Portfolio Calculator object
     :param p_obj: PortfolioCalculator object of different strategies
     :param id_name: A name to give the id of the graph for Dash
     :param height: [Optional] The height in pixels Default: 750
+    :param rolling_window: [Optional] Add Rolling Metric traces over this many trading days. Default: 0(disabled)
     :return: A list containing a Dash Graph that can be outputted to a Div's children
     """
+    # Weighted Portfolios show each Strategy's contract multiplier. Ex: 'Strat1 x2'
+    weights = p_obj.weights or {}
     traces = [
         go.Scatter(
             x=sel_strat_ss.strats_df.index,  # Datetime is the Index
             y=sel_strat_ss.strats_df['Cum. net profit'],
             mode='lines+markers',
-            name=sel_strat_ss.name,
+            name=f"{sel_strat_ss.name} x{weights[sel_strat_ss.name]:.3g}" if sel_strat_ss.name in weights else sel_strat_ss.name,
         )
         for sel_strat_ss in p_obj.sel_strats_ss
     ]
@@ -32,6 +39,8 @@ def create_equity_graph(p_obj: PortfolioCalculator, id_name: str, height: int =
             name='Total',
             line=dict(dash='dash')  # Different line style for combined strategy
         ))
+    if rolling_window and len(p_obj.sel_strats_ss) > 0:
+        traces.extend(create_rolling_traces(p_obj=p_obj, window=rolling_window))
 
     return [
         dcc.Graph(
@@ -42,6 +51,8 @@ def create_equity_graph(p_obj: PortfolioCalculator, id_name: str, height: int =
                     title='Algorithmic Strategy Portfolio Equity Curve(s)',
                     xaxis={'title': 'Date'},
                     yaxis={'title': 'Profit and Loss $USD'},
+                    yaxis2={'title': 'Return to Drawdown / Win Rate %', 'overlaying': 'y', 'side': 'right',
+                            'showgrid': False},
                     height=height,
                     hovermode='x unified',
                     plot_bgcolor='rgba(0, 0, 0, 0)',
@@ -51,6 +62,198 @@ def create_equity_graph(p_obj: PortfolioCalculator, id_name: str, height: int =
         )
     ]
 
+def create_rolling_traces(p_obj: PortfolioCalculator, window: int) -> list:
+    """
+    Rolling Metric traces for every Strategy in the Portfolio & the Total. Dollar metrics share the Equity axis, ratios
+    go on a 2nd axis & start hidden so the Equity Curves stay readable
+    :param p_obj: PortfolioCalculator object of different strategies
+    :param window: Window size in trading days
+    :return: A list of Scatter traces
+    """
+    rolling_dfs = {sel_strat_ss.name: sel_strat_ss.get_rolling_metrics(windows=(window,))
+                   for sel_strat_ss in p_obj.sel_strats_ss}
+    if len(p_obj.sel_strats_ss) > 1:
+        rolling_dfs['Total'] = p_obj.get_rolling_metrics(windows=(window,))
+    metric_styles = {'net_profit': ('Net Profit', 'y', True), 'max_drawdown': ('Max DD.', 'y', True),
+                     'return_to_dd': ('Return/DD', 'y2', 'legendonly'),
+                     'daily_win_rate': ('Win Rate %', 'y2', 'legendonly')}
+    return [
+        go.Scatter(
+            x=rolling_df.index,
+            y=rolling_df[f'{metric} {window}D'],
+            mode='lines',
+            name=f'{name} {window}D {label}',
+            legendgroup=name,
+            yaxis=yaxis,
+            visible=visible,
+            line=dict(dash='dot', width=1)
+        )
+        for name, rolling_df in rolling_dfs.items() if len(rolling_df) > 0
+        for metric, (label, yaxis, visible) in metric_styles.items()
+    ]
+
+def create_walk_forward_graph(wf_obj: WalkForward, id_name: str, height: int = 750) -> list:
+    """
+    Create the stitched Out-of-Sample Equity Graph & a Table of each window's chosen Portfolio
+    :param wf_obj: A WalkForward object that has been ran
+    :param id_name: A name to give the id of the graph for Dash. The table gets '-table' added to it
+    :param height: [Optional] The height in pixels Default: 750
+    :return: A list containing a Dash Graph & DataTable that can be outputted to a Div's children
+    """
+    traces = []
+    if wf_obj.trade_count > 0:
+        traces.append(go.Scatter(
+            x=wf_obj.strats_df.index,
+            y=wf_obj.strats_df['Cum. net profit'],
+            mode='lines+markers',
+            name=wf_obj.name,
+        ))
+    # Mark where each Out-of-Sample window starts trading a newly chosen Portfolio
+    shapes = [dict(type='line', xref='x', yref='paper', x0=str(oos_start), x1=str(oos_start), y0=0, y1=1,
+                   line=dict(dash='dot', width=1)) for oos_start in wf_obj.windows['OOS Start']]
+    windows_df = wf_obj.windows.assign(**{'Strategies': wf_obj.windows['Strategies'].map(', '.join)})
+    return [
+        dcc.Graph(
+            id=id_name,
+            figure={
+                'data': traces,
+                'layout': go.Layout(
+                    title='Walk Forward Out-of-Sample Equity Curve',
+                    xaxis={'title': 'Date'},
+                    yaxis={'title': 'Profit and Loss $USD'},
+                    height=height,
+                    hovermode='x unified',
+                    shapes=shapes,
+                    plot_bgcolor='rgba(0, 0, 0, 0)',
+                    paper_bgcolor='rgba(0, 0, 0, 0)'
+                )
+            }
+        ),
+        dash_table.DataTable(
+            id=f'{id_name}-table',
+            data=windows_df.astype(str).to_dict('records'),
+            columns=[dict(id=col, name=col) for col in WalkForward.WINDOW_COLS],
+            style_cell={'textAlign': 'right'},
+            style_header={'fontWeight': 'bold'},
+        )
+    ]
+
+def create_pareto_graph(front: list[dict], id_name: str, height: int = 750) -> list:
+    """
+    Create a scatter of every Portfolio on the Pareto front. Each point's customdata is its position in front, so a
+    click can load that Portfolio
+    :param front: Pareto front records from AnalyzeDataTrades.optimize_pareto()
+    :param id_name: A name to give the id of the graph for Dash
+    :param height: [Optional] The height in pixels Default: 750
+    :return: A list containing a Dash Graph that can be outputted to a Div's children
+    """
+    trace = go.Scatter(
+        x=[-portfolio['max_drawdown'] for portfolio in front],
+        y=[portfolio['net_profit'] for portfolio in front],
+        mode='markers',
+        customdata=list(range(len(front))),
+        text=[f"Capital Required: ${portfolio['req_cap_daytrade']:,.2f}<br>Daily Win Rate: "
+              f"{portfolio['daily_win_rate']:.2f}%<br>Return/DD: {portfolio['return_to_dd']}<br>"
+              f"Strategies: {', '.join(portfolio['strategies'])}" for portfolio in front],
+        hovertemplate='Max DD.: $%{x:,.2f}<br>Net Profit: $%{y:,.2f}<br>%{text}<extra></extra>',
+        marker=dict(size=12, color=[portfolio['req_cap_daytrade'] for portfolio in front], colorscale='Viridis',
+                    showscale=True, colorbar=dict(title='Capital Required')),
+    )
+    return [
+        dcc.Graph(
+            id=id_name,
+            figure={
+                'data': [trace],
+                'layout': go.Layout(
+                    title=f'Pareto Front: {len(front)} Portfolios. Click 1 to load it',
+                    xaxis={'title': 'Max Drawdown $USD'},
+                    yaxis={'title': 'Net Profit $USD'},
+                    height=height,
+                    hovermode='closest',
+                    plot_bgcolor='rgba(0, 0, 0, 0)',
+                    paper_bgcolor='rgba(0, 0, 0, 0)'
+                )
+            }
+        )
+    ]
+
+def create_calendar_heatmaps(cube: CalendarCube, id_name: str, start_date: str = None, end_date: str = None,
+                             height: int = 450) -> list:
+    """
+    Create PnL Heatmaps by year & month, & by weekday & hour of day of Exit & Entry time. Built from a CalendarCube,
+    so no Trades are grouped
+    :param cube: CalendarCube of the Portfolio
+    :param id_name: A name to give the id of the graphs for Dash. Each graph gets '-monthly', '-exit' or '-entry' added
+    :param start_date: [Optional] Date in the 1st month to show. Whole months are used. Default: ALL Dates
+    :param end_date: [Optional] Date in the last month to show. Whole months are used. Default: ALL Dates
+    :param height: [Optional] The height in pixels of each graph Default: 450
+    :return: A list containing Dash Graphs that can be outputted to a Div's children
+    """
+    if len(cube) == 0:
+        return []
+    monthly_df = cube.get_monthly_grid(start_date=start_date, end_date=end_date)
+    graphs = [(f'{id_name}-monthly', 'Monthly PnL', go.Heatmap(
+        z=monthly_df.values, x=list(monthly_df.columns), y=[str(year) for year in monthly_df.index],
+        colorscale='RdYlGn', zmid=0, texttemplate='%{z:,.0f}', hoverongaps=False,
+        hovertemplate='%{y} %{x}: $%{z:,.2f}<extra></extra>'), {'title': 'Month'}, {'title': 'Year', 'type': 'category'})]
+    for prefix in ('exit', 'entry'):
+        pnl_df = cube.get_weekday_hour(prefix=prefix, start_date=start_date, end_date=end_date)
+        trades_df = cube.get_weekday_hour(prefix=prefix, trades=True, start_date=start_date, end_date=end_date)
+        graphs.append((f'{id_name}-{prefix}', f'PnL by Weekday & {prefix.title()} Hour', go.Heatmap(
+            z=pnl_df.values, x=list(pnl_df.columns), y=list(pnl_df.index), customdata=trades_df.values,
+            colorscale='RdYlGn', zmid=0,
+            hovertemplate='%{y} %{x}:00: $%{z:,.2f}<br>Trades: %{customdata:,.0f}<extra></extra>'),
+            {'title': f'{prefix.title()} Hour', 'dtick': 1}, {'title': 'Weekday', 'autorange': 'reversed'}))
+    return [
+        dcc.Graph(
+            id=graph_id,
+            figure={
+                'data': [heatmap],
+                'layout': go.Layout(
+                    title=title,
+                    xaxis=xaxis,
+                    yaxis=yaxis,
+                    height=height,
+                    plot_bgcolor='rgba(0, 0, 0, 0)',
+                    paper_bgcolor='rgba(0, 0, 0, 0)'
+                )
+            }
+        )
+        for graph_id, title, heatmap, xaxis, yaxis in graphs
+    ]
+
+def create_cluster_heatmap(clusters: StrategyClusters, id_name: str, height: int = 600) -> list:
+    """
+    Create a Daily PnL correlation Heatmap with the Strategies ordered by cluster, so each cluster is a block
+    :param clusters: StrategyClusters of the Strategies
+    :param id_name: A name to give the id of the graph for Dash
+    :param height: [Optional] The height in pixels of the graph Default: 600
+    :return: A list containing a Dash Graph that can be outputted to a Div's children
+    """
+    if len(clusters.strat_names) == 0:
+        return []
+    order = sorted(range(len(clusters.strat_names)),
+                   key=lambda idx: (clusters.clusters[clusters.strat_names[idx]], clusters.strat_names[idx]))
+    labels = [f"{clusters.strat_names[idx]} ({clusters.clusters[clusters.strat_names[idx]]})" for idx in order]
+    return [
+        dcc.Graph(
+            id=id_name,
+            figure={
+                'data': [go.Heatmap(z=clusters.corr[order][:, order], x=labels, y=labels, colorscale='RdBu',
+                                    reversescale=True, zmin=-1, zmax=1,
+                                    hovertemplate='%{y} & %{x}: %{z:.2f}<extra></extra>')],
+                'layout': go.Layout(
+                    title='Daily PnL Correlation by Cluster',
+                    xaxis={'type': 'category'},
+                    yaxis={'type': 'category', 'autorange': 'reversed'},
+                    height=height,
+                    plot_bgcolor='rgba(0, 0, 0, 0)',
+                    paper_bgcolor='rgba(0, 0, 0, 0)'
+                )
+            }
+        )
+    ]
+
 def get_portfolio_stats_table(id_name: str, style_table: dict) -> html.Div:
     """
     Create a Portfolio Statistics Table containing things like Net Profit, Max DD., Daily Win Rate
@@ -64,9 +267,14 @@ def get_portfolio_stats_table(id_name: str, style_table: dict) -> html.Div:
             data=[
                 dict(Statistic='Net Profit', Value='$0.00'),
                 dict(Statistic='Max Drawdown', Value='$0.00'),
+                dict(Statistic='Intraday Max Drawdown (MAE)', Value='$0.00'),
                 dict(Statistic='Return to Drawdown', Value=0.00),
                 dict(Statistic='Daily Win Rate', Value=0.00),
-                dict(Statistic='Capital Required Day Trade Margin', Value=0.00)
+                dict(Statistic='Capital Required Day Trade Margin', Value=0.00),
+                dict(Statistic='Intraday Capital Required (MAE)', Value='$0.00'),
+                dict(Statistic='Monte Carlo Max Drawdown (95%)', Value='$0.00'),
+                dict(Statistic='Monte Carlo Capital Required (95%)', Value='$0.00'),
+                dict(Statistic='Monte Carlo Capital Required (99%)', Value='$0.00')
             ],
             columns=[
                 dict(id='Statistic', name='Statistic'),
@@ -94,10 +302,23 @@ def update_opt_table_stats(p_obj: PortfolioCalculator) -> list:
     :param p_obj: A PortfolioCalculator Object
     :return: A list of dicts for the Statistics Table
     """
+    mc_sim = p_obj.get_monte_carlo()
+    try:
+        intraday = p_obj.get_intraday()
+        # Only Portfolios built from Trades have Intraday results. Ex: A Walk Forward curve is stitched from Daily PnL
+        has_intraday = intraday.trade_count > 0
+    except ValueError as ve:
+        logger.error(f"Intraday Statistics left out of the Statistics Table. Exception: {ve}")
+        intraday, has_intraday = None, False
     return [
         dict(Statistic='Net Profit', Value=f"${p_obj.net_profit:,.2f}"),
         dict(Statistic='Max Drawdown', Value=f"${p_obj.max_drawdown:,.2f}"),
+        dict(Statistic='Intraday Max Drawdown (MAE)', Value=f"${intraday.max_drawdown:,.2f}" if has_intraday else 'N/A'),
         dict(Statistic='Return to Drawdown', Value=f"{p_obj.return_to_dd:,.2f}"),
         dict(Statistic='Daily Win Rate', Value=f"{p_obj.daily_win_rate:,.2f}%"),
-        dict(Statistic='Capital Required Day Trade Margin', Value=f"${p_obj.req_cap_daytrade:,.2f}")
+        dict(Statistic='Capital Required Day Trade Margin', Value=f"${p_obj.req_cap_daytrade:,.2f}"),
+        dict(Statistic='Intraday Capital Required (MAE)', Value=f"${intraday.req_cap_daytrade:,.2f}" if has_intraday else 'N/A'),
+        dict(Statistic='Monte Carlo Max Drawdown (95%)', Value=f"${mc_sim.max_dd_pcts[95]:,.2f}"),
+        dict(Statistic='Monte Carlo Capital Required (95%)', Value=f"${mc_sim.req_cap_pcts[95]:,.2f}"),
+        dict(Statistic='Monte Carlo Capital Required (99%)', Value=f"${mc_sim.req_cap_pcts[99]:,.2f}")
     ]
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+Production Dashboard serving with more than 1 WSGI worker. Linux/macOS serve from that many gunicorn worker processes.
+gunicorn doesn't support Windows, so there waitress serves them as that many threads of 1 web process. The server is
+only imported when more than 1 worker is asked for. Both are in requirements.txt for their platform.
+1 ingest process runs DataLoaderCSV.monitor_csvs & publishes each new Strategy Database version. Every web worker
+process watches for new versions & reloads only the Strategies that changed.
+Can also be served by an external gunicorn: gunicorn -w 4 -b 127.0.0.1:5050 "src.UI.wsgi:create_server()"
+Then run the ingest on its own with: python -c "from src.UI.wsgi import run_ingest; run_ingest()"
+"""
+import multiprocessing
+import os
+
+from src.conf_setup import logger, CSV_MONITOR_SECS, DB_REFRESH_SECS, WEB_HOST, WEB_PORT, WEB_WORKERS, \
+    WEB_TIMEOUT_SECS
+from src.data.loaders.data_loader import DataLoaderCSV
+from src.data.types.data_trades import DataTrades
+
+
+def create_server():
+    """
+    Called in each web worker process. Loads the Strategy Databases if they weren't inherited from the parent process,
+    starts watching for new versions & returns the Dash app's Flask server
+    :return: The WSGI app
+    """
+    data_loader = DataLoaderCSV(load_dbs=len(DataTrades().strats_to_list()) == 0)
+    # Catch up on anything the ingest published before this worker started
+    data_loader.refresh_strat_dbs()
+    data_loader.monitor_dbs(seconds=DB_REFRESH_SECS)
+    from src.UI.app import app
+    return app.server
+
+
+def run_ingest(seconds: int = CSV_MONITOR_SECS):
+    """
+    The only process that loads .csv files & saves Strategy Databases. Blocks forever
+    :param seconds: [Optional] Seconds between checks of the csv directory
+    """
+    logger.info("Ingest: Starting")
+    DataLoaderCSV()._monitor_csvs(seconds=seconds)
+
+
+def start_wsgi(workers: int = WEB_WORKERS, host: str = WEB_HOST, port: int = WEB_PORT,
+               csv_monitor_secs: int = CSV_MONITOR_SECS):
+    """
+    Start the ingest process & serve the Dashboard from [workers] gunicorn worker processes, or waitress threads on
+    Windows. Blocks until shut down. Raises an ImportError if the platform's server isn't installed
+    :param workers: [Optional] Amount of web workers
+    :param host: [Optional] Host to bind to
+    :param port: [Optional] Port to bind to
+    :param csv_monitor_secs: [Optional] Seconds between checks of the csv directory in the ingest process
+    """
+    server_name = 'waitress' if os.name == 'nt' else 'gunicorn'
+    # Only pay for the server's import when it's asked for. Imported before the ingest starts, so a missing server
+    # stops here instead of serving fewer workers than asked for
+    try:
+        if os.name == 'nt':
+            from waitress import serve
+        else:
+            from gunicorn.app.base import BaseApplication
+    except ImportError as ie:
+        raise ImportError(f"Dashboard: {workers} workers need {server_name}(pip install -r requirements.txt). Serve "
+                          f"with 1 worker to use Dash's single process server instead. Exception: {ie}") from ie
+
+    # Spawned instead of forked, so it never inherits a lock held by another thread
+    ingest_process = multiprocessing.get_context('spawn').Process(
+        target=run_ingest, name='ingest', kwargs={'seconds': csv_monitor_secs}, daemon=True)
+    ingest_process.start()
+    logger.info(f"Dashboard: Starting {workers} {server_name} WSGI workers on {host}:{port}. "
+                f"Ingest PID: {ingest_process.pid}")
+    try:
+        if os.name == 'nt':
+            serve(create_server(), host=host, port=port, threads=workers)
+        else:
+            class DashboardApplication(BaseApplication):
+                def load_config(self):
+                    for key, value in {'bind': f"{host}:{port}", 'workers': workers, 'worker_class': 'sync',
+                                       'timeout': WEB_TIMEOUT_SECS, 'preload_app': False}.items():
+                        self.cfg.set(key, value)
+
+                def load(self):
+                    return create_server()
+
+            DashboardApplication().run()
+    finally:
+        ingest_process.terminate()
@@ -0,0 +1,237 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+import pandas as pd
+
+from src.batch.report_generator import ReportGenerator
+from src.conf_setup import logger, APP_NAME, DATA_OUT_DIR, REPORTS_DIR
+from src.data.analyzers.opt_constraints import OptConstraints
+from src.data.analyzers.strategy_clusters import StrategyClusters
+from src.data.loaders.data_loader import DataLoaderCSV
+from src.data.types.data_trades import DataTrades
+
+"""Headless Batch Optimization for scheduled(cron) runs. No Dashboard, web server or CSV monitor thread"""
+
+# Exit Codes
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_BAD_ARGS = 2
+EXIT_NO_DATA = 3
+
+
+class BatchOptimizer:
+    """Runs many Optimizations(date ranges x account sizes) against 1 loaded dataset & writes the results"""
+
+    RESULT_COLS: list = ['run', 'start_date', 'end_date', 'account_size', 'rank', 'strategies', 'strategy_ct',
+                         'net_profit', 'max_drawdown', 'return_to_dd', 'daily_win_rate', 'req_cap_daytrade']
+
+    def __init__(self, data_trades: DataTrades, strat_names: list = None, top_ct: int = 5, workers: int = 0,
+                 constraints: OptConstraints = None, cluster_mode: str = None, cluster_threshold: float = 0.7,
+                 max_per_cluster: int = 1):
+        """
+        :param data_trades: Loaded DataTrades. Every run reads the same snapshot of it
+        :param strat_names: [Optional] A list of Strategy names to be Optimized. Default uses ALL Strategies
+        :param top_ct: [Optional] Number of top best Portfolios to keep per run
+        :param workers: [Optional] Amount of Processes to score combinations in. 0 = this process
+        :param constraints: [Optional] Only build Portfolios that meet these limits. Default: Every combination
+        :param cluster_mode: [Optional] A StrategyClusters.MODES mode applied to each date range. Default: None = Off
+        :param cluster_threshold: [Optional] Daily PnL correlation Strategies in a cluster have on average
+        :param max_per_cluster: [Optional] Most Strategies from the same cluster in 'cap' mode
+        """
+        self.data_trades = data_trades
+        self.snapshot = data_trades.get_snapshot()
+        self.strat_names = strat_names or data_trades.strats_to_list(snapshot=self.snapshot)
+        self.top_ct = top_ct
+        self.workers = workers
+        self.constraints = constraints
+        self.cluster_mode = cluster_mode
+        self.cluster_threshold = cluster_threshold
+        self.max_per_cluster = max_per_cluster
+
+    def run(self, date_ranges: list[tuple], account_sizes: list[float]) -> pd.DataFrame:
+        """
+        Run every date range & account size combination
+        :param date_ranges: A list of (start_date, end_date) tuples. None = ALL Dates Ex: [('2024-01-01', None)]
+        :param account_sizes: A list of Account Sizes. 0 = disabled
+        :return: A Dataframe of every run's top Portfolios with RESULT_COLS columns
+        """
+        # Build the aligned PnL once & reuse it for every run instead of reloading per run
+        pnl_matrix = self.data_trades.get_pnl_matrix(strat_names=self.strat_names, snapshot=self.snapshot)
+        result_rows = []
+        run_num = 0
+        for start_date, end_date in date_ranges:
+            constraints = self.constraints
+            if self.cluster_mode:
+                # Clusters & their best Strategies only use the Daily PnL of the date range being Optimized
+                constraints = StrategyClusters(pnl_matrix=pnl_matrix, threshold=self.cluster_threshold,
+                                               start_date=start_date, end_date=end_date).to_constraints(
+                    constraints=constraints, mode=self.cluster_mode, max_per_cluster=self.max_per_cluster)
+            for account_size in account_sizes:
+                run_num += 1
+                start_time = time.time()
+                top_performers = self.data_trades.optimize_portfolio(
+                    strat_names=self.strat_names, account_size=account_size, start_date=start_date,
+                    end_date=end_date, top_ct=self.top_ct, snapshot=self.snapshot, workers=self.workers,
+                    pnl_matrix=pnl_matrix, constraints=constraints)
+                for rank, top_pc in enumerate(top_performers, 1):
+                    result_rows.append([run_num, start_date, end_date, account_size, rank, ','.join(top_pc.strat_names),
+                                        len(top_pc.strat_names), top_pc.net_profit, top_pc.max_drawdown,
+                                        top_pc.return_to_dd, top_pc.daily_win_rate, top_pc.req_cap_daytrade])
+                logger.info(f"Batch run {run_num}: {start_date} - {end_date}, Account Size: ${account_size:,.2f}. "
+                            f"Found {len(top_performers)} Portfolios in {round(time.time() - start_time, 4)} Seconds")
+        return pd.DataFrame(data=result_rows, columns=self.RESULT_COLS)
+
+    @staticmethod
+    def save_results(results_df: pd.DataFrame, out_dir: str = DATA_OUT_DIR, formats: tuple = ('parquet',)) -> list[str]:
+        """
+        Save results to files named by the time of the run
+        :param results_df: Dataframe from run()
+        :param out_dir: [Optional] Directory to save to. Default: data/out
+        :param formats: [Optional] Any of 'parquet', 'json'
+        :return: A list of files written
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        base_name = os.path.join(out_dir, f"optimize_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        files_written = []
+        if 'parquet' in formats:
+            results_df.to_parquet(path=f"{base_name}.parquet")
+            files_written.append(f"{base_name}.parquet")
+        if 'json' in formats:
+            with open(f"{base_name}.json", 'w') as fh:
+                json.dump(obj=results_df.to_dict(orient='records'), fp=fh, indent=2, default=str)
+            files_written.append(f"{base_name}.json")
+        return files_written
+
+    @staticmethod
+    def get_reports(results_df: pd.DataFrame) -> list[dict]:
+        """
+        :param results_df: Dataframe from run()
+        :return: 1 ReportGenerator report per Optimized Portfolio
+        """
+        return [{'name': f"Run {row.run} Rank {row.rank} {row.start_date or 'Start'} - {row.end_date or 'End'} "
+                         f"Account {row.account_size:,.0f}",
+                 'strat_names': row.strategies.split(','), 'start_date': row.start_date, 'end_date': row.end_date}
+                for row in results_df.itertuples(index=False)]
+
+
+def parse_date_range(value: str) -> tuple:
+    """
+    Parse a --date-range argument
+    :param value: 'START:END' where either side can be empty for ALL Dates Ex: 2024-01-01:2024-06-30 or 2024-01-01:
+    :return: Tuple of (start_date, end_date)
+    """
+    if ':' not in value:
+        raise argparse.ArgumentTypeError(f"Date range [{value}] must look like START:END Ex: 2024-01-01:2024-06-30")
+    start_date, end_date = (part.strip() or None for part in value.split(':', 1))
+    for part in (start_date, end_date):
+        if part is not None:
+            try:
+                datetime.strptime(part, '%Y-%m-%d')
+            except ValueError:
+                raise argparse.ArgumentTypeError(f"Date [{part}] in [{value}] must be YYYY-MM-DD")
+    return start_date, end_date
+
+
+def get_load_range(date_ranges: list[tuple]) -> tuple:
+    """
+    :param date_ranges: A list of (start_date, end_date) tuples. None = ALL Dates
+    :return: (start_date, end_date) covering every date range. None = ALL Dates
+    """
+    start_dates = [start_date for start_date, _ in date_ranges]
+    end_dates = [end_date for _, end_date in date_ranges]
+    return (None if None in start_dates else min(start_dates)), (None if None in end_dates else max(end_dates))
+
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='batch.py', description=f'{APP_NAME}: Headless Batch Portfolio Optimization',
+        epilog=f'Exit codes: {EXIT_OK} = OK, {EXIT_ERROR} = Error, {EXIT_BAD_ARGS} = Bad arguments, '
+               f'{EXIT_NO_DATA} = No Strategies to Optimize')
+    parser.add_argument('--strategies', nargs='+', default=None, help='Strategy names to Optimize. Default: ALL')
+    parser.add_argument('--date-range', dest='date_ranges', action='append', type=parse_date_range,
+                        help='START:END, either side can be empty. Can be given many times. Default: ALL Dates')
+    parser.add_argument('--account-size', dest='account_sizes', action='append', type=float,
+                        help='Account Size to fit. 0 = disabled. Can be given many times. Default: 0')
+    parser.add_argument('--top-ct', type=int, default=5, help='Top Portfolios to keep per run. Default: 5')
+    parser.add_argument('--workers', type=int, default=0, help='Processes to Optimize in. Default: 0 = this process')
+    parser.add_argument('--min-size', type=int, default=1, help='Fewest Strategies in a Portfolio. Default: 1')
+    parser.add_argument('--max-size', type=int, default=None, help='Most Strategies in a Portfolio. Default: ALL')
+    parser.add_argument('--max-per-instrument', type=int, default=None,
+                        help='Most Strategies trading the same Instrument. Default: No limit')
+    parser.add_argument('--max-per-account', type=int, default=None,
+                        help='Most Strategies trading in the same Account. Default: No limit')
+    parser.add_argument('--require', dest='required', nargs='+', default=None,
+                        help='Strategy names every Portfolio must have')
+    parser.add_argument('--exclude', dest='excluded', nargs='+', default=None,
+                        help='Strategy names no Portfolio may have')
+    parser.add_argument('--cluster-mode', choices=StrategyClusters.MODES, default=None,
+                        help="Cluster Strategies by Daily PnL correlation 1st. 'best' = Only each cluster's best "
+                             "Return/DD Strategy. 'cap' = At most --max-per-cluster from a cluster. Default: Off")
+    parser.add_argument('--cluster-threshold', type=float, default=0.7,
+                        help='Daily PnL correlation Strategies in a cluster have on average. Default: 0.7')
+    parser.add_argument('--max-per-cluster', type=int, default=1,
+                        help="Most Strategies from the same cluster in 'cap' mode. Default: 1")
+    parser.add_argument('--out-dir', default=DATA_OUT_DIR, help=f'Directory for results. Default: {DATA_OUT_DIR}')
+    parser.add_argument('--format', dest='formats', nargs='+', choices=['parquet', 'json'], default=['parquet'],
+                        help='Result file formats. Default: parquet')
+    parser.add_argument('--reports', nargs='+', choices=['optimizer', 'accounts'], default=[],
+                        help='Write HTML reports of each Optimized Portfolio and/or each Account. Default: None')
+    parser.add_argument('--report-dir', default=REPORTS_DIR, help=f'Directory for HTML reports. Default: {REPORTS_DIR}')
+    parser.add_argument('--no-ingest', action='store_true', help="Don't load new .csv files from data/in 1st")
+    return parser.parse_args(argv)
+
+
+def main(argv: list = None) -> int:
+    """
+    Batch Optimization entry point
+    :param argv: [Optional] Command line arguments. Default: sys.argv
+    :return: Exit Code for cron
+    """
+    try:
+        args = parse_args(argv)
+    except SystemExit as se:
+        return EXIT_OK if se.code == 0 else EXIT_BAD_ARGS
+    try:
+        logger.info(f'{APP_NAME}: Batch Optimization Started')
+        date_ranges = args.date_ranges or [(None, None)]
+        if args.no_ingest:
+            # Nothing is saved, so only read the Trades the date ranges need from each Strategy Database
+            start_date, end_date = get_load_range(date_ranges=date_ranges)
+            data_loader = DataLoaderCSV(start_date=start_date, end_date=end_date)
+        else:
+            data_loader = DataLoaderCSV()
+            data_loader.load_strat_csvs()
+        data_trades = data_loader.data_trades
+        loaded_strats = data_trades.strats_to_list()
+        missing_strats = sorted(set(args.strategies or []).union(args.required or [], args.excluded or [])
+                                - set(loaded_strats))
+        if missing_strats:
+            logger.error(f"Strategies not found in our database: {missing_strats}")
+            return EXIT_NO_DATA
+        if len(loaded_strats) == 0:
+            logger.error("No Strategies loaded to Optimize")
+            return EXIT_NO_DATA
+        constraints = OptConstraints(min_size=args.min_size, max_size=args.max_size,
+                                     max_per_instrument=args.max_per_instrument, max_per_account=args.max_per_account,
+                                     required=args.required, excluded=args.excluded)
+        batch_opt = BatchOptimizer(data_trades=data_trades, strat_names=args.strategies, top_ct=args.top_ct,
+                                   workers=args.workers, constraints=constraints, cluster_mode=args.cluster_mode,
+                                   cluster_threshold=args.cluster_threshold, max_per_cluster=args.max_per_cluster)
+        results_df = batch_opt.run(date_ranges=date_ranges,
+                                   account_sizes=args.account_sizes or [0.0])
+        files_written = BatchOptimizer.save_results(results_df=results_df, out_dir=args.out_dir,
+                                                    formats=tuple(args.formats))
+        if args.reports:
+            reports = BatchOptimizer.get_reports(results_df=results_df) if 'optimizer' in args.reports else []
+            if 'accounts' in args.reports:
+                reports.extend(ReportGenerator.account_reports(data_trades=data_trades, strat_names=args.strategies,
+                                                               snapshot=batch_opt.snapshot))
+            ReportGenerator(data_trades=data_trades, snapshot=batch_opt.snapshot, out_dir=args.report_dir,
+                            workers=args.workers).run(reports=reports)
+        logger.info(f'{APP_NAME}: Batch Optimization Ended. Saved {len(results_df)} results to {files_written}')
+        return EXIT_OK
+    except Exception as e:
+        logger.exception(f"Batch Optimization failed. Exception: {e}")
+        return EXIT_ERROR
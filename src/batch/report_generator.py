@@ -0,0 +1,222 @@
+import html
+import os
+import re
+import time
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+from src.conf_setup import logger, APP_NAME, REPORTS_DIR
+from src.data.analyzers.StrategyStats import StrategyStats
+from src.data.analyzers.portfolio_calculator import PortfolioCalculator
+from src.data.types.data_trades import DataTrades
+from src.data.types.trades_snapshot import TradesSnapshot
+
+"""Static HTML Portfolio reports, rendered in a Process Pool & sharing 1 local plotly.js bundle. No network needed"""
+
+# Each Process Pool worker gets its own copy of every Strategy's StrategyStats once, instead of with every report
+_worker_strat_stats: dict[str, StrategyStats] = {}
+
+
+def _init_worker(strat_stats: dict[str, StrategyStats]):
+    global _worker_strat_stats
+    _worker_strat_stats = strat_stats
+
+
+def _render_report(report: dict, out_dir: str, max_points: int,
+                   strat_stats: dict[str, StrategyStats] = None) -> tuple[str, float]:
+    """
+    Build 1 Portfolio & write its report. Module level, so it can be pickled to a Process Pool
+    :param report: {'name': 'Report Title', 'strat_names': [], 'start_date': None, 'end_date': None, 'weights': None}
+    :param out_dir: Directory to write to. The plotly.js bundle must already be in it
+    :param max_points: Most points kept per trace
+    :param strat_stats: [Optional] {'strat_name': StrategyStats}. Default: The Process Pool worker's
+    :return: (File written, Seconds it took)
+    """
+    # Only the report workers need Dash's Table helpers
+    from src.UI.utils import update_opt_table_stats
+    start_time = time.time()
+    strat_stats = strat_stats or _worker_strat_stats
+    p_calc = PortfolioCalculator(sel_strats_ss=[strat_stats[strat_name] for strat_name in report['strat_names']],
+                                 start_date=report.get('start_date'), end_date=report.get('end_date'),
+                                 weights=report.get('weights'))
+    file_path = os.path.join(out_dir, ReportGenerator.file_name(report=report))
+    with open(file_path, 'w', encoding='utf-8') as fh:
+        fh.write(ReportGenerator.to_html(title=report['name'], p_calc=p_calc,
+                                         table_stats=update_opt_table_stats(p_obj=p_calc), max_points=max_points))
+    return file_path, time.time() - start_time
+
+
+class ReportGenerator:
+    """
+    Writes a static HTML report for each of many Portfolios: its Statistics Table, Equity Curves & Drawdown chart.
+    Reports are rendered in parallel worker processes, every trace is downsampled to MAX_POINTS & each report loads
+    1 shared local plotly.js bundle instead of embedding or downloading its own copy.
+    """
+
+    # Shared plotly.js bundle written once to the reports directory. include_plotlyjs='directory' loads it by this name
+    PLOTLY_BUNDLE: str = 'plotly.min.js'
+    # Most points kept per trace. Each bucket of the curve keeps its low & high, so Drawdowns stay visible
+    MAX_POINTS: int = 1000
+    GRAPH_HEIGHT: int = 600
+
+    def __init__(self, data_trades: DataTrades, snapshot: TradesSnapshot = None, out_dir: str = REPORTS_DIR,
+                 workers: int = 0, max_points: int = MAX_POINTS):
+        """
+        :param data_trades: Loaded DataTrades. Every report reads the same snapshot of it
+        :param snapshot: [Optional] TradesSnapshot to read from. Default: The current snapshot
+        :param out_dir: [Optional] Directory to write reports to. Default: reports
+        :param workers: [Optional] Amount of Processes to render in. 0 = this process
+        :param max_points: [Optional] Most points kept per trace
+        """
+        self.data_trades = data_trades
+        self.snapshot = snapshot or data_trades.get_snapshot()
+        self.out_dir = out_dir
+        self.workers = workers
+        self.max_points = max_points
+
+    def run(self, reports: list[dict]) -> list[str]:
+        """
+        Write every report. A report that fails is logged & skipped, so it doesn't stop the rest
+        :param reports: A list of {'name': 'Report Title', 'strat_names': [], 'start_date': None, 'end_date': None,
+        'weights': None}
+        :return: A list of files written
+        """
+        start_time = time.time()
+        os.makedirs(self.out_dir, exist_ok=True)
+        self.write_bundle()
+        # Reports with a Strategy that isn't loaded fail on their own, without stopping the rest
+        strat_names = sorted({strat_name for report in reports for strat_name in report['strat_names']
+                              if strat_name in self.snapshot.trade_data})
+        strat_stats = {strat_name: self.data_trades.get_strat_stats(strat_name=strat_name, snapshot=self.snapshot)
+                       for strat_name in strat_names}
+        files_written = []
+        if self.workers > 1 and len(reports) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(strat_stats,)) as executor:
+                futures = [(report, executor.submit(_render_report, report, self.out_dir, self.max_points))
+                           for report in reports]
+                for report, future in futures:
+                    files_written.extend(self._get_result(report=report, result=future.result))
+        else:
+            for report in reports:
+                files_written.extend(self._get_result(report=report, result=lambda: _render_report(
+                    report=report, out_dir=self.out_dir, max_points=self.max_points, strat_stats=strat_stats)))
+        logger.info(f"Reports: Wrote {len(files_written)} of {len(reports)} reports to {self.out_dir} in "
+                    f"{round(time.time() - start_time, 4)} Seconds")
+        return files_written
+
+    @staticmethod
+    def _get_result(report: dict, result) -> list[str]:
+        """:return: [File written] or [] if the report failed"""
+        try:
+            file_path, elapsed = result()
+            logger.debug(f"Reports: Wrote {file_path} in {round(elapsed, 4)} Seconds")
+            return [file_path]
+        except Exception as e:
+            logger.exception(f"Reports: Failed to write report {report['name']}. Exception: {e}")
+            return []
+
+    def write_bundle(self) -> str:
+        """
+        Write the plotly.js bundle every report loads, only if it's missing or from another plotly version
+        :return: Path of the bundle
+        """
+        from plotly.offline import get_plotlyjs
+        bundle_path = os.path.join(self.out_dir, self.PLOTLY_BUNDLE)
+        plotly_js = get_plotlyjs()
+        if not os.path.exists(bundle_path) or os.path.getsize(bundle_path) != len(plotly_js.encode('utf-8')):
+            with open(bundle_path, 'w', encoding='utf-8') as fh:
+                fh.write(plotly_js)
+        return bundle_path
+
+    @staticmethod
+    def file_name(report: dict) -> str:
+        """:return: A file name made from the report's name. Ex: 'Opt 1: NQ' -> 'Opt_1_NQ.html'"""
+        return f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', report['name']).strip('_') or 'report'}.html"
+
+    @staticmethod
+    def downsample(series: pd.Series, max_points: int = MAX_POINTS) -> pd.Series:
+        """
+        Keep the 1st, last, lowest & highest point of each bucket, so peaks & Drawdowns survive
+        :param series: A curve. Ex: 'Cum. net profit'
+        :param max_points: [Optional] Most points to keep
+        :return: At most max_points of the curve, in order
+        """
+        if len(series) <= max_points:
+            return series
+        values = series.to_numpy(dtype=np.float64)
+        n_buckets = max(max_points // 4, 1)
+        buckets = np.arange(len(values)) * n_buckets // len(values)
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(values)] - 1
+        grouped = pd.Series(values).groupby(buckets)
+        keep_idx = np.unique(np.concatenate([starts, ends, grouped.idxmin().to_numpy(),
+                                             grouped.idxmax().to_numpy()]))
+        return series.iloc[keep_idx]
+
+    @classmethod
+    def to_html(cls, title: str, p_calc: PortfolioCalculator, table_stats: list[dict],
+                max_points: int = MAX_POINTS) -> str:
+        """
+        :param title: Report Title
+        :param p_calc: The Portfolio
+        :param table_stats: Statistics Table rows from update_opt_table_stats()
+        :param max_points: [Optional] Most points kept per trace
+        :return: A whole HTML page that loads the shared plotly.js bundle from its own directory
+        """
+        weights = p_calc.weights or {}
+        curves = {f"{strat_ss.name} x{weights[strat_ss.name]:.3g}" if strat_ss.name in weights else strat_ss.name:
+                  strat_ss.strats_df['Cum. net profit'] for strat_ss in p_calc.sel_strats_ss if strat_ss.trade_count > 0}
+        if len(curves) > 1 and p_calc.trade_count > 0:
+            curves['Total'] = p_calc.combined_strats_df['Cum. net profit']
+        equity_traces = []
+        for name, cum_profit in curves.items():
+            cum_profit = cls.downsample(series=cum_profit, max_points=max_points)
+            equity_traces.append(dict(type='scatter', x=cum_profit.index, y=cum_profit.to_numpy(), mode='lines',
+                                      name=name, line=dict(dash='dash') if name == 'Total' else {}))
+        drawdown_traces = []
+        if p_calc.trade_count > 0:
+            cum_profit = p_calc.combined_strats_df['Cum. net profit']
+            drawdown = cls.downsample(series=cum_profit - cum_profit.cummax(), max_points=max_points)
+            drawdown_traces.append(dict(type='scatter', x=drawdown.index, y=drawdown.to_numpy(), mode='lines',
+                                        name='Drawdown', fill='tozeroy', line=dict(color='firebrick')))
+        layout = dict(height=cls.GRAPH_HEIGHT, hovermode='x unified', xaxis={'title': 'Date'},
+                      yaxis={'title': 'Profit and Loss $USD'}, plot_bgcolor='rgba(0, 0, 0, 0)',
+                      paper_bgcolor='rgba(0, 0, 0, 0)')
+        # Plain dict figures skip plotly's validation, which costs more than the rest of the report
+        equity_fig = dict(data=equity_traces, layout=dict(title='Equity Curve(s)', **layout))
+        drawdown_fig = dict(data=drawdown_traces, layout=dict(title='Drawdown from Peak', **layout))
+        table_rows = ''.join(f"<tr><td>{html.escape(str(row['Statistic']))}</td>"
+                             f"<td>{html.escape(str(row['Value']))}</td></tr>" for row in table_stats)
+        dates = f"{p_calc.df_start_date:%Y-%m-%d} - {p_calc.df_end_date:%Y-%m-%d}" if p_calc.trade_count > 0 else ''
+        return (f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+                f"<title>{html.escape(title)}</title>\n<style>body{{font-family:sans-serif;margin:20px}}"
+                f"table{{border-collapse:collapse}}td,th{{border:1px solid black;padding:4px 8px;text-align:right}}"
+                f"th{{background-color:rgb(255,165,0)}}</style>\n</head>\n<body>\n"
+                f"<h2>{html.escape(title)}</h2>\n"
+                f"<p>{html.escape(dates)}<br>Strategies: {html.escape(', '.join(p_calc.strat_names) or 'None')}</p>\n"
+                f"<table><tr><th>Statistic</th><th>Value</th></tr>{table_rows}</table>\n"
+                f"{pio.to_html(equity_fig, full_html=False, include_plotlyjs='directory', validate=False)}\n"
+                f"{pio.to_html(drawdown_fig, full_html=False, include_plotlyjs=False, validate=False)}\n"
+                f"<p>{APP_NAME} {pd.Timestamp.now():%Y-%m-%d %H:%M:%S}</p>\n</body>\n</html>\n")
+
+    @staticmethod
+    def account_reports(data_trades: DataTrades, strat_names: list = None, snapshot: TradesSnapshot = None,
+                        start_date: str = None, end_date: str = None) -> list[dict]:
+        """
+        :param data_trades: Loaded DataTrades
+        :param strat_names: [Optional] A list of Strategy names. Default uses ALL Strategies
+        :param snapshot: [Optional] TradesSnapshot to read from. Default: The current snapshot
+        :param start_date: [Optional] Date to start selection of statistics. Default: ALL Dates
+        :param end_date: [Optional] Date to end selection of statistics. Default: ALL Dates
+        :return: 1 report per Account of every Strategy that traded in it
+        """
+        snapshot = snapshot or data_trades.get_snapshot()
+        account_strats = {}
+        for strat_name in strat_names or data_trades.strats_to_list(snapshot=snapshot):
+            for account in data_trades.get_strat_stats(strat_name=strat_name, snapshot=snapshot).groups['Account']:
+                account_strats.setdefault(account, []).append(strat_name)
+        return [{'name': f"Account {account}", 'strat_names': sorted(account_strats[account]),
+                 'start_date': start_date, 'end_date': end_date} for account in sorted(account_strats, key=str)]
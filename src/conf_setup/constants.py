@@ -1,7 +1,5 @@
 import os
 from pathlib import Path
-from dash import Dash
-#import dash_bootstrap_components as dbc
 
 APP_NAME = 'StrategyPortfolioAnalyzer'
 # Root directory of the Program
@@ -10,6 +8,10 @@ ROOT_DIR: str = str(Path(__file__).parent.parent.parent)
 DATA_DIR = os.path.join(ROOT_DIR, "data")
 DATA_IN_DIR = os.path.join(DATA_DIR, "in")
 DATA_IN_ARCH_DIR = os.path.join(DATA_IN_DIR, "arch")
+# Directory for headless Batch Optimization results
+DATA_OUT_DIR = os.path.join(DATA_DIR, "out")
+# Directory for static HTML Portfolio reports & the plotly.js bundle they share
+REPORTS_DIR = os.path.join(ROOT_DIR, "reports")
 
 # Logging
 LOG_FILE = os.path.join(ROOT_DIR, "logs", f"{APP_NAME}.log")
@@ -20,7 +22,41 @@ LOG_BACKUPS = 2
 # Database Settings
 DB_DIR = os.path.join(DATA_DIR, "dbs")
 DB_STRAT_DIR = os.path.join(DB_DIR, "strategies")
+# 'arrow' = Memory mapped Arrow IPC files shared by every process, with parquet kept as the archive. 'parquet' = parquet only
+# Windows can't replace a file that's still memory mapped, & loaded Strategies keep theirs mapped, so it's parquet only
+DB_STRAT_FORMAT = 'parquet' if os.name == 'nt' else 'arrow'
+# Version & content hash of every Strategy Database, published by the ingest so other processes know what to reload
+DATA_VERSION_FILE = os.path.join(DB_STRAT_DIR, "data_version.json")
+# Optimizer Result Cache
+OPT_CACHE_DIR = os.path.join(DB_DIR, "optimizer")
+# Ingest Manifest of every .csv file loaded
+INGEST_DB_DIR = os.path.join(DB_DIR, "ingest")
+INGEST_MANIFEST_FILE = os.path.join(INGEST_DB_DIR, "ingest_manifest.parquet")
+# Written once the stored Trades' Entry & Exit times parsed without their AM/PM were fixed from the archived .csv files
+TIME_MIGRATION_FILE = os.path.join(INGEST_DB_DIR, "time_migration.json")
 
 # Live Database Settings
 LIVE_DB_DIR = os.path.join(DB_DIR, "live")
-LIVE_SETTINGS_FILE = os.path.join(LIVE_DB_DIR, "live_settings.parquet")
\ No newline at end of file
+LIVE_SETTINGS_FILE = os.path.join(LIVE_DB_DIR, "live_settings.parquet")
+# Running PnL & Drawdown of every Live Strategy & its Stop Loss breach events, kept up to date by the ingest
+LIVE_STATE_FILE = os.path.join(LIVE_DB_DIR, "live_state.parquet")
+LIVE_EVENTS_FILE = os.path.join(LIVE_DB_DIR, "live_events.parquet")
+
+# User defined Strategy Tags for Rollups
+TAGS_DB_DIR = os.path.join(DB_DIR, "tags")
+STRAT_TAGS_FILE = os.path.join(TAGS_DB_DIR, "strategy_tags.parquet")
+
+# Dashboard Web Server Settings
+WEB_HOST = '127.0.0.1'
+WEB_PORT = 5050
+# 1 = Dash's single process server. > 1 = that many gunicorn WSGI worker processes(waitress threads on Windows), with the
+# .csv ingest in its own process
+WEB_WORKERS = 1
+# Seconds a web worker may spend on 1 request before it's restarted. Optimizing lots of Strategies can take a while
+WEB_TIMEOUT_SECS = 300
+# Seconds between web worker checks for new Strategy Databases from the ingest process
+DB_REFRESH_SECS = 5
+# Seconds between checks for new .csv files in data/in
+CSV_MONITOR_SECS = 5
+# Processes parsing .csv files at once when many are waiting. 0 or 1 = parse them in the ingest process
+INGEST_WORKERS = min(4, os.cpu_count() or 1)
@@ -1,3 +1,4 @@
+import os
 from datetime import date
 import pandas as pd
 
@@ -11,17 +12,36 @@ class LiveSettings:
 
     def __init__(self):
         self.live_settings = None
-        self.live_strategies: list = []
+        self._live_strategies: list = []
+        # Modified time of the db file when it was last loaded. Another web worker process may save new Settings
+        self._settings_mtime: float | None = None
         self._load_settings()
 
+    @property
+    def live_strategies(self) -> list:
+        """:return: Names of the Live Strategies"""
+        self.refresh()
+        return self._live_strategies
+
     def _load_settings(self):
         """ Load Previous Live Settings from db file """
         try:
+            self._settings_mtime = os.path.getmtime(LIVE_SETTINGS_FILE)
             self.live_settings = pd.read_parquet(path=LIVE_SETTINGS_FILE)
-            self.live_strategies = self.live_settings.index
+            self._live_strategies = self.live_settings.index
         except FileNotFoundError:
+            self._settings_mtime = None
             self.live_settings = pd.DataFrame()
-            self.live_strategies = []
+            self._live_strategies = []
+
+    def refresh(self):
+        """ Load the db file again only if it changed since we last loaded it. Ex: Saved by another web worker """
+        try:
+            settings_mtime = os.path.getmtime(LIVE_SETTINGS_FILE)
+        except FileNotFoundError:
+            settings_mtime = None
+        if settings_mtime != self._settings_mtime:
+            self._load_settings()
 
     def get_strat_date(self, name: str) -> date | None:
         """
@@ -29,6 +49,7 @@ class LiveSettings:
         :param name: Name of the Strategy
         :return: A date Object Representing the Strategy Start Date. Or None if we couldn't locate the Strategy in our DB
         """
+        self.refresh()
         try:
             str_date = self.live_settings.loc[name]['LIVE_DATE']
             dt_obj = get_dt_from_str(str_date)
@@ -40,6 +61,7 @@ class LiveSettings:
         """
         :return: A Dict of {'strat_name1': 'live_date1', 'strat_name2': '2024-01-01'}
         """
+        self.refresh()
         return self.live_settings['LIVE_DATE'].to_dict()
 
     def get_strat_sl(self, name: str) -> float | None:
@@ -48,6 +70,7 @@ class LiveSettings:
         :param name: The name of the Strategy
         :return: A float representing the Stop Loss. Or None if the Strategy isn't available in the database
         """
+        self.refresh()
         try:
             strat_stop_loss = self.live_settings.loc[name]['STOP_LOSS']
             return float(strat_stop_loss)
@@ -62,5 +85,6 @@ class LiveSettings:
         """
         self.live_settings = pd.DataFrame.from_dict(data=settings, orient='index', columns=LiveSettings.COLUMNS)
         self.live_settings.to_parquet(path=LIVE_SETTINGS_FILE)
-        self.live_strategies = self.live_settings.index
+        self._settings_mtime = os.path.getmtime(LIVE_SETTINGS_FILE)
+        self._live_strategies = self.live_settings.index
         logger.debug(f"Saved Live Settings\n{self.live_settings}")
\ No newline at end of file
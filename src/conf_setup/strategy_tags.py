@@ -0,0 +1,69 @@
+import os
+import pandas as pd
+
+from src.conf_setup import STRAT_TAGS_FILE, logger
+
+
+class StrategyTags:
+    """Persistent user defined Tags of each Strategy. Ex: {'Strat1': ['Trend', 'Overnight']}. Used to group Rollups"""
+
+    COLUMNS: list = ['TAGS']
+    # Tags are saved as 1 string per Strategy
+    SEPARATOR: str = ','
+
+    def __init__(self):
+        self.strat_tags: pd.DataFrame | None = None
+        # Modified time of the db file when it was last loaded. Another web worker process may save new Tags
+        self._tags_mtime: float | None = None
+        self._load_tags()
+
+    def _load_tags(self):
+        """ Load Previous Strategy Tags from db file """
+        try:
+            self._tags_mtime = os.path.getmtime(STRAT_TAGS_FILE)
+            self.strat_tags = pd.read_parquet(path=STRAT_TAGS_FILE)
+        except FileNotFoundError:
+            self._tags_mtime = None
+            self.strat_tags = pd.DataFrame(columns=StrategyTags.COLUMNS)
+
+    def refresh(self):
+        """ Load the db file again only if it changed since we last loaded it. Ex: Saved by another web worker """
+        try:
+            tags_mtime = os.path.getmtime(STRAT_TAGS_FILE)
+        except FileNotFoundError:
+            tags_mtime = None
+        if tags_mtime != self._tags_mtime:
+            self._load_tags()
+
+    def get_strat_tags(self) -> dict[str, list]:
+        """
+        :return: A Dict of {'strat_name1': ['tag1', 'tag2'], 'strat_name2': []}
+        """
+        self.refresh()
+        return {strat_name: self.split_tags(tags) for strat_name, tags in self.strat_tags['TAGS'].items()}
+
+    def get_tags(self, name: str) -> list:
+        """
+        :param name: Name of the Strategy
+        :return: The Strategy's Tags. Empty if it has none
+        """
+        return self.get_strat_tags().get(name, [])
+
+    def save_tags(self, strat_tags: dict[str, list]):
+        """
+        Save Strategy Tags to a database. Strategies without any Tags aren't saved
+        :param strat_tags: A Dict of {'strat_name1': ['tag1', 'tag2']}
+        """
+        clean_tags = {strat_name: sorted(set(tag.strip() for tag in tags if tag.strip()))
+                      for strat_name, tags in strat_tags.items()}
+        self.strat_tags = pd.DataFrame.from_dict(
+            data={strat_name: [self.SEPARATOR.join(tags)] for strat_name, tags in clean_tags.items() if tags},
+            orient='index', columns=StrategyTags.COLUMNS)
+        self.strat_tags.to_parquet(path=STRAT_TAGS_FILE)
+        self._tags_mtime = os.path.getmtime(STRAT_TAGS_FILE)
+        logger.debug(f"Saved Strategy Tags\n{self.strat_tags}")
+
+    @classmethod
+    def split_tags(cls, tags: str | None) -> list:
+        """:return: A list of Tags from a saved Tags string"""
+        return [tag for tag in (tags or '').split(cls.SEPARATOR) if tag]
@@ -1,5 +1,7 @@
 import pandas as pd
 
+from src.data.analyzers.intraday_equity import IntradayEquity
+from src.data.analyzers.opt_constraints import OptConstraints
 from src.data.analyzers.strat_statistics import StratStatistics
 
 class StrategyStats(StratStatistics):
@@ -16,6 +18,12 @@ class StrategyStats(StratStatistics):
         """
         super().__init__(start_date=start_date, end_date=end_date)
         self.name = name
+        # Version of the Strategy's Trades in the TradesSnapshot these Statistics were built from
+        self.data_version: int = -1
+        # Only the Trade columns IntradayEquity needs, sorted by 'Exit time' like the Strategy Dataframe
+        self.trades_df: pd.DataFrame = pd.DataFrame(columns=IntradayEquity.TRADE_COLS)
+        # Every Instrument & Account the Strategy traded. {'Instrument': ('ES 03-25',), 'Account': ('Sim101',)}
+        self.groups: dict[str, tuple] = {col: () for col in OptConstraints.GROUP_COLS}
 
     def create_daily_df(self, strat_df: pd.DataFrame):
         """
@@ -23,9 +31,20 @@ class StrategyStats(StratStatistics):
         :param strat_df: An Entire Strategy's Dataframe
         """
         daily_pnl = strat_df.groupby(strat_df['Exit time'].dt.date)['Profit'].sum()
+        self.trades_df = strat_df[IntradayEquity.TRADE_COLS].reset_index(drop=True)
+        self.groups = {col: tuple(sorted(strat_df[col].dropna().unique())) for col in OptConstraints.GROUP_COLS}
         self.create_daily_strats_df(daily_pnl=daily_pnl)
         self.update_stats()
 
+    def _get_trade_runs(self) -> list[pd.DataFrame]:
+        """:return: This Strategy's Trades that exited between the 1st & last day of self.strats_df"""
+        if self.trade_count == 0 or len(self.trades_df) == 0:
+            return []
+        exit_times = self.trades_df['Exit time']
+        start_idx = exit_times.searchsorted(self.df_start_date, side='left')
+        end_idx = exit_times.searchsorted(self.df_end_date + pd.Timedelta(days=1), side='left')
+        return [self.trades_df.iloc[start_idx:end_idx]]
+
     def get_daily_max_dd(self, start_date: str = None, end_date: str = None) -> float:
         """Returns the Max Drawdown for a Strategy
         :param start_date: [Optional] Starting date to select from dataframe. Default: ALL Dates. Ex: 2024-01-01
@@ -1,57 +1,102 @@
 from copy import deepcopy
-from itertools import combinations
+from typing import Mapping, TYPE_CHECKING
 import pandas as pd
 
-from src.conf_setup import logger
+from src.conf_setup.strategy_tags import StrategyTags
 from src.data.analyzers.StrategyStats import StrategyStats
+from src.data.analyzers.calendar_cubes import CalendarCube, CalendarCubes
+from src.data.analyzers.daily_rollups import DailyRollups
+from src.data.analyzers.opt_constraints import OptConstraints
+from src.data.analyzers.optimizer_cache import OptimizerCache
+from src.data.analyzers.pnl_matrix import PnlMatrix
 from src.data.analyzers.portfolio_calculator import PortfolioCalculator
+from src.data.analyzers.portfolio_optimizer import PortfolioOptimizer
+from src.data.analyzers.strat_statistics import StratStatistics
+from src.data.analyzers.trade_analytics import TradeAnalytics
+from src.data.analyzers.walk_forward import WalkForward
+from src.data.types.trades_snapshot import TradesSnapshot
+
+if TYPE_CHECKING:
+    from src.data.analyzers.strategy_clusters import StrategyClusters
 
 class AnalyzeDataTrades:
     """Analyze and Combine Strategy Data such as Max Drawdown for Portfolio"""
 
-    trade_data: dict[str, pd.DataFrame] = {}
+    # Current read only snapshot of every Strategy's Trades. Only ever swapped whole by DataTrades.commit()
+    _snapshot: TradesSnapshot = TradesSnapshot()
     # Should only be accessed through get_strat_stats method
     _strat_stats: dict[str, StrategyStats] = {}
+    # Should only be accessed through get_opt_cache method. Created on 1st use, so importing doesn't touch the disk
+    _opt_cache: OptimizerCache | None = None
+    # Should only be accessed through get_rollups method. Created on 1st use & then only synced with new Trades
+    _rollups: DailyRollups | None = None
+    _strat_tags: StrategyTags | None = None
+    # Should only be accessed through get_trade_analytics method. Caches each Strategy's row by data version
+    _trade_analytics: TradeAnalytics | None = None
+    # Should only be accessed through get_calendar_cube method. Caches each Strategy's cube by data version
+    _calendar_cubes: CalendarCubes | None = None
+
+    @property
+    def trade_data(self) -> Mapping[str, pd.DataFrame]:
+        """:return: Read only Dict of {'strat_name': Trades Dataframe} from the current snapshot"""
+        return self._snapshot.trade_data
 
-    def get_calc_portfolio_stats(self, strat_names: list, start_date: str = None, end_date: str = None) -> PortfolioCalculator:
+    def get_snapshot(self) -> TradesSnapshot:
+        """
+        Take the current snapshot. Anything that reads more than 1 Strategy should work from 1 snapshot, so it stays
+        consistent while the ingest commits new Trades
+        :return: The current TradesSnapshot
+        """
+        return self._snapshot
+
+    def get_calc_portfolio_stats(self, strat_names: list, start_date: str = None, end_date: str = None,
+                                 snapshot: TradesSnapshot = None, weights: dict[str, float] = None) -> PortfolioCalculator:
         """
         Get Statistics for the Portfolio Calculator page based on the Strategies Selected
         :param strat_names: A list of Strategy Names to get Statistics for
         :param start_date: [Optional] Starting date to select from dataframe. Default: ALL Dates
         :param end_date: [Optional] End Date to select from dataframe. Default: ALL Dates
+        :param snapshot: [Optional] TradesSnapshot to read from. Default: The current snapshot
+        :param weights: [Optional] Contract multiplier of each Strategy {'strat_name': 2}. Default: 1 each
         :return: PortfolioCalculator Dataclass with Calculations of Profit, Drawdown, etc
         """
+        snapshot = snapshot or self.get_snapshot()
         # Get Strategy StrategyStats Objects
-        sel_strats_ss = [self.get_strat_stats(strat_name=strat_name) for strat_name in strat_names]
-        return PortfolioCalculator(sel_strats_ss=sel_strats_ss, start_date=start_date, end_date=end_date)
+        sel_strats_ss = [self.get_strat_stats(strat_name=strat_name, snapshot=snapshot) for strat_name in strat_names]
+        return PortfolioCalculator(sel_strats_ss=sel_strats_ss, start_date=start_date, end_date=end_date,
+                                   weights=weights)
 
-    def get_live_portfolio_stats(self, strat_name_dt: dict) -> PortfolioCalculator:
+    def get_live_portfolio_stats(self, strat_name_dt: dict, snapshot: TradesSnapshot = None) -> PortfolioCalculator:
         """
         Get Live Portfolio Statistics
         :param strat_name_dt: A Dict with Strategy Names & Live Start Dates Ex: {'strat1': 'start_date', 'strat2': '2024-01-01'}
+        :param snapshot: [Optional] TradesSnapshot to read from. Default: The current snapshot
         :return: PortfolioCalculator Dataclass with Calculations of Profit, Drawdown, etc
         """
+        snapshot = snapshot or self.get_snapshot()
         sel_strats_ss = []
         for strat_name, live_date in strat_name_dt.items():
-            strat_ss = self.get_strat_stats(strat_name=strat_name)
+            strat_ss = self.get_strat_stats(strat_name=strat_name, snapshot=snapshot)
             strat_ss_copied = deepcopy(strat_ss)
             strat_ss_copied.update_stats(start_date=live_date)
             sel_strats_ss.append(strat_ss_copied)
         return PortfolioCalculator(sel_strats_ss=sel_strats_ss)
 
-    def get_strat_stats(self, strat_name: str) -> StrategyStats:
+    def get_strat_stats(self, strat_name: str, snapshot: TradesSnapshot = None) -> StrategyStats:
         """
         Strategy Dataclasses should ONLY be retrieved through this method
         :param strat_name: Strategy Name
+        :param snapshot: [Optional] TradesSnapshot to read from. Default: The current snapshot
         False = Return Original StrategyStats. But if _strats_df dataframe is modified it would be modified globally!
         :return: An up to date StrategyStats DataClass for the Strategy Name
         """
-        if strat_name not in self._strat_stats.keys():
-            self._strat_stats[strat_name] = StrategyStats(name=strat_name)
-        self._strat_stats[strat_name] = self._update_strat_dataclass(strat_stats_obj=self._strat_stats[strat_name])
-        return self._strat_stats[strat_name]
+        snapshot = snapshot or self.get_snapshot()
+        strat_stats_obj = self._strat_stats.get(strat_name)
+        if strat_stats_obj is None or strat_stats_obj.data_version != snapshot.get_strat_version(strat_name):
+            strat_stats_obj = self._update_strat_dataclass(strat_name=strat_name, snapshot=snapshot)
+        return strat_stats_obj
 
-    def optimize_portfolio(self, strat_names: list = None, account_size: float = 0.0, start_date: str = None, end_date: str = None, top_ct: int = 5) -> list[PortfolioCalculator]:
+    def optimize_portfolio(self, strat_names: list = None, account_size: float = 0.0, start_date: str = None, end_date: str = None, top_ct: int = 5, snapshot: TradesSnapshot = None, workers: int = 0, pnl_matrix: PnlMatrix = None, use_cache: bool = True, constraints: OptConstraints = None) -> list[PortfolioCalculator]:
         """
         Optimize a list of Strategy Names and return the top [top_ct] best
         :param strat_names: [Optional] A list of Strategy names to be Optimized. Default uses ALL Strategies
@@ -59,39 +104,233 @@ class AnalyzeDataTrades:
         :param start_date: [Optional] Starting date to select from dataframe. Default: ALL Dates
         :param end_date: [Optional] End Date to select from dataframe. Default: ALL Dates
         :param top_ct: [Optional] Number of top best strategies to return
+        :param snapshot: [Optional] TradesSnapshot to read from. Default: The current snapshot
+        :param workers: [Optional] Amount of Processes to score combinations in. Default: 0 = this process
+        :param pnl_matrix: [Optional] A PnlMatrix of strat_names to reuse across many runs. Default: Built from snapshot
+        :param use_cache: [Optional] Serve & save results in the OptimizerCache. Default: True
+        :param constraints: [Optional] Only build Portfolios that meet these limits. Default: Every combination
         :return: A list of top PortfolioCalculator Object performers
         """
+        # Every combination is scored against the same snapshot, even if new Trades are committed mid run
+        snapshot = snapshot or self.get_snapshot()
+        if strat_names is None:
+            strat_names = pnl_matrix.strat_names if pnl_matrix is not None else self.strats_to_list(snapshot=snapshot)
+        top_portfolios = None
+        if use_cache:
+            # Anything that changes the results is in the key. Workers only change how fast we get them
+            strat_hashes = {strat_name: snapshot.get_strat_hash(strat_name) for strat_name in strat_names}
+            cache_params = {'start_date': start_date, 'end_date': end_date,
+                            'account_size': float(account_size or 0.0), 'top_ct': top_ct,
+                            'req_cap_mult': StratStatistics.REQ_CAP_MAX_DD_MULT}
+            if constraints is not None and not constraints.is_unconstrained():
+                cache_params['constraints'] = constraints.to_params()
+            top_portfolios = self.get_opt_cache().get(strat_hashes=strat_hashes, params=cache_params)
+        if top_portfolios is None:
+            if pnl_matrix is None:
+                pnl_matrix = self.get_pnl_matrix(strat_names=strat_names, snapshot=snapshot)
+            # Score every combination with array math, then only build full PortfolioCalculator objects for the winners
+            top_portfolios = PortfolioOptimizer(pnl_matrix=pnl_matrix, account_size=account_size, start_date=start_date,
+                                                end_date=end_date, top_ct=top_ct, workers=workers,
+                                                constraints=constraints).run()
+            if use_cache:
+                self.get_opt_cache().set(strat_hashes=strat_hashes, params=cache_params, results=top_portfolios)
+        return [self.get_calc_portfolio_stats(strat_names=top_strat_names, start_date=start_date, end_date=end_date,
+                                              snapshot=snapshot) for top_strat_names in top_portfolios]
+
+    def optimize_pareto(self, strat_names: list = None, account_size: float = 0.0, start_date: str = None,
+                        end_date: str = None, snapshot: TradesSnapshot = None, workers: int = 0,
+                        use_cache: bool = True, constraints: OptConstraints = None) -> list[dict]:
+        """
+        Optimize a list of Strategy Names & return every Portfolio on the Pareto front of Net Profit, Max Drawdown,
+        Capital Required & Daily Win Rate
+        :param strat_names: [Optional] A list of Strategy names to be Optimized. Default uses ALL Strategies
+        :param account_size: [Optional] Size/Money you have to trade with to optimize for. Default = 0(disabled/not used)
+        :param start_date: [Optional] Starting date to select from dataframe. Default: ALL Dates
+        :param end_date: [Optional] End Date to select from dataframe. Default: ALL Dates
+        :param snapshot: [Optional] TradesSnapshot to read from. Default: The current snapshot
+        :param workers: [Optional] Amount of Processes to score combinations in. Default: 0 = this process
+        :param use_cache: [Optional] Serve & save results in the OptimizerCache. Default: True
+        :param constraints: [Optional] Only build Portfolios that meet these limits. Default: Every combination
+        :return: A list of {'strategies': [Strategy Names], stat: value} for each Portfolio, highest Net Profit 1st
+        """
+        snapshot = snapshot or self.get_snapshot()
+        if strat_names is None:
+            strat_names = self.strats_to_list(snapshot=snapshot)
+        front = None
+        if use_cache:
+            strat_hashes = {strat_name: snapshot.get_strat_hash(strat_name) for strat_name in strat_names}
+            cache_params = {'mode': 'pareto', 'start_date': start_date, 'end_date': end_date,
+                            'account_size': float(account_size or 0.0),
+                            'req_cap_mult': StratStatistics.REQ_CAP_MAX_DD_MULT}
+            if constraints is not None and not constraints.is_unconstrained():
+                cache_params['constraints'] = constraints.to_params()
+            front = self.get_opt_cache().get(strat_hashes=strat_hashes, params=cache_params)
+        if front is None:
+            front = PortfolioOptimizer(pnl_matrix=self.get_pnl_matrix(strat_names=strat_names, snapshot=snapshot),
+                                       account_size=account_size, start_date=start_date, end_date=end_date,
+                                       workers=workers, constraints=constraints).run_pareto()
+            if use_cache:
+                self.get_opt_cache().set(strat_hashes=strat_hashes, params=cache_params, results=front)
+        return front
+
+    def optimize_weights(self, strat_names: list = None, objective: str = 'return_to_dd',
+                         budget: str = 'max_drawdown', budget_value: float = 0.0, max_weight: float = 5.0,
+                         integer: bool = True, start_date: str = None, end_date: str = None,
+                         snapshot: TradesSnapshot = None) -> PortfolioCalculator:
+        """
+        Size each Strategy with a contract multiplier that maximizes the objective within the budget
+        :param strat_names: [Optional] A list of Strategy names to size. Default uses ALL Strategies
+        :param objective: [Optional] 'return_to_dd' or 'net_profit' to maximize
+        :param budget: [Optional] 'max_drawdown' or 'req_cap_daytrade' to keep within budget_value
+        :param budget_value: [Optional] Most Max Drawdown or Capital Required allowed. Default = 0(No budget)
+        :param max_weight: [Optional] Most contracts per Strategy
+        :param integer: [Optional] True = Whole contracts. False = Continuous multipliers
+        :param start_date: [Optional] Starting date to select from dataframe. Default: ALL Dates
+        :param end_date: [Optional] End Date to select from dataframe. Default: ALL Dates
+        :param snapshot: [Optional] TradesSnapshot to read from. Default: The current snapshot
+        :return: A weighted PortfolioCalculator of the Strategies with a weight above 0
+        """
+        snapshot = snapshot or self.get_snapshot()
+        if strat_names is None:
+            strat_names = self.strats_to_list(snapshot=snapshot)
+        # Only pay for scipy's optimize import when weights are optimized
+        from src.data.analyzers.weight_optimizer import WeightOptimizer
+        weight_opt = WeightOptimizer(pnl_matrix=self.get_pnl_matrix(strat_names=strat_names, snapshot=snapshot),
+                                     objective=objective, budget=budget, budget_value=budget_value,
+                                     max_weight=max_weight, integer=integer, start_date=start_date,
+                                     end_date=end_date).run()
+        weights = {strat_name: weight for strat_name, weight in weight_opt.weights.items() if weight > 0}
+        return self.get_calc_portfolio_stats(strat_names=list(weights.keys()), start_date=start_date,
+                                             end_date=end_date, snapshot=snapshot, weights=weights)
+
+    def get_opt_cache(self) -> OptimizerCache:
+        """:return: The OptimizerCache shared by every Optimize run"""
+        if AnalyzeDataTrades._opt_cache is None:
+            AnalyzeDataTrades._opt_cache = OptimizerCache()
+        return AnalyzeDataTrades._opt_cache
+
+    def get_rollups(self, snapshot: TradesSnapshot = None) -> DailyRollups:
+        """
+        Daily Rollups by Instrument, Account & Strategy Tag, synced with any Trades committed since the last call.
+        Called after each commit by the data loader, so views only read the sums
+        :param snapshot: [Optional] TradesSnapshot to sync to. Default: The current snapshot
+        :return: The DailyRollups shared by every view
+        """
+        if AnalyzeDataTrades._rollups is None:
+            AnalyzeDataTrades._rollups = DailyRollups()
+            AnalyzeDataTrades._strat_tags = StrategyTags()
+        AnalyzeDataTrades._rollups.sync(snapshot=snapshot or self.get_snapshot(),
+                                        strat_tags=AnalyzeDataTrades._strat_tags.get_strat_tags())
+        return AnalyzeDataTrades._rollups
+
+    def get_strat_tags(self) -> StrategyTags:
+        """:return: The StrategyTags the Rollups are grouped by"""
+        if AnalyzeDataTrades._strat_tags is None:
+            self.get_rollups()
+        return AnalyzeDataTrades._strat_tags
+
+    def get_trade_analytics(self, strat_names: list = None, snapshot: TradesSnapshot = None) -> pd.DataFrame:
+        """
+        Trade level Statistics of many Strategies. Only Strategies with new Trades since the last call are computed
+        :param strat_names: [Optional] A list of Strategy names. Default uses ALL Strategies
+        :param snapshot: [Optional] TradesSnapshot to read from. Default: The current snapshot
+        :return: A Dataframe with TradeAnalytics.COLUMNS, 1 row per Strategy
+        """
+        if AnalyzeDataTrades._trade_analytics is None:
+            AnalyzeDataTrades._trade_analytics = TradeAnalytics()
+        return AnalyzeDataTrades._trade_analytics.get_table(snapshot=snapshot or self.get_snapshot(),
+                                                            strat_names=strat_names)
+
+    def get_calendar_cube(self, strat_names: list, weights: dict[str, float] = None,
+                          snapshot: TradesSnapshot = None) -> CalendarCube:
+        """
+        PnL by month, weekday & hour of a Portfolio, summed from each Strategy's cached CalendarCube
+        :param strat_names: A list of Strategy Names
+        :param weights: [Optional] Contract multiplier of each Strategy {'strat_name': 2}. Default: 1 each
+        :param snapshot: [Optional] TradesSnapshot to read from. Default: The current snapshot
+        :return: A CalendarCube of the Portfolio
+        """
+        if AnalyzeDataTrades._calendar_cubes is None:
+            AnalyzeDataTrades._calendar_cubes = CalendarCubes()
+        return AnalyzeDataTrades._calendar_cubes.get_portfolio_cube(snapshot=snapshot or self.get_snapshot(),
+                                                                    strat_names=strat_names, weights=weights)
+
+    def get_pnl_matrix(self, strat_names: list = None, snapshot: TradesSnapshot = None) -> PnlMatrix:
+        """
+        Aligned Daily PnL of many Strategies for scoring lots of Portfolios at once
+        :param strat_names: [Optional] A list of Strategy names. Default uses ALL Strategies
+        :param snapshot: [Optional] TradesSnapshot to read from. Default: The current snapshot
+        :return: A PnlMatrix of the Strategies
+        """
+        snapshot = snapshot or self.get_snapshot()
         if strat_names is None:
-            strat_names = self.strats_to_list()
-        account_size = 0.0 if account_size is None else account_size
-        # Top PortfolioCalculator Strategy Objects to return
-        top_strats = []
-        for L in range(len(strat_names) + 1):
-            for strat_comb in combinations(strat_names, L):
-                if len(strat_comb) == 0: continue
-                portfolio_calc = self.get_calc_portfolio_stats(strat_names=list(strat_comb), start_date=start_date, end_date=end_date)
-                # filter out Portfolios that do meet our Minimum Account Size
-                if account_size == 0.0 or account_size >= portfolio_calc.req_cap_daytrade:
-                    top_strats.append(portfolio_calc)
-                else:
-                    logger.info(f"Optimized Portfolio of Strategies: {portfolio_calc.strat_names} didn't meet our minimum account Size of ${portfolio_calc.req_cap_daytrade:,.2f} with only ${account_size:,.2f} configured")
-                # Sort PortfolioCalculator objects based on the value returned by get_value and select top top_ct(5)
-                top_strats = sorted(top_strats, key=lambda p_calc: p_calc.return_to_dd, reverse=True)[:top_ct]
-        return top_strats
-
-    def _update_strat_dataclass(self, strat_stats_obj: StrategyStats) -> StrategyStats:
-        """
-        Create Strategy Data Class with Daily PnL and Daily Cumulative PnL
-        :param strat_stats_obj: The strategy's StrategyStats Object
-        """
-        strat_df = self.trade_data[strat_stats_obj.name]
-        # Only update Strategy's Stats Dataclass if number of records has changed. Otherwise, return cached Dataclass
-        if len(strat_df) != strat_stats_obj.trade_count:
-            strat_stats_obj.create_daily_df(strat_df=strat_df)
+            strat_names = self.strats_to_list(snapshot=snapshot)
+        return PnlMatrix(strat_stats=[self.get_strat_stats(strat_name=strat_name, snapshot=snapshot)
+                                      for strat_name in strat_names])
+
+    def get_strat_clusters(self, threshold: float = 0.7, strat_names: list = None, start_date: str = None,
+                           end_date: str = None, overrides: dict[str, int] = None,
+                           snapshot: TradesSnapshot = None) -> 'StrategyClusters':
+        """
+        Cluster Strategies by Daily PnL correlation. Used to shrink the Optimizer's search before it runs
+        :param threshold: [Optional] Daily PnL correlation Strategies in a cluster have on average
+        :param strat_names: [Optional] A list of Strategy names. Default uses ALL Strategies
+        :param start_date: [Optional] Starting date of the Daily PnL used. Default: ALL Dates
+        :param end_date: [Optional] End Date of the Daily PnL used. Default: ALL Dates
+        :param overrides: [Optional] {'strat_name': cluster number} to use instead of the computed cluster
+        :param snapshot: [Optional] TradesSnapshot to read from. Default: The current snapshot
+        :return: A StrategyClusters object
+        """
+        # Only pay for scipy's clustering import when Strategies are clustered
+        from src.data.analyzers.strategy_clusters import StrategyClusters
+        return StrategyClusters(pnl_matrix=self.get_pnl_matrix(strat_names=strat_names, snapshot=snapshot),
+                                threshold=threshold, start_date=start_date, end_date=end_date, overrides=overrides)
+
+    def get_rolling_metrics(self, window: int, strat_names: list = None) -> dict[str, pd.DataFrame]:
+        """
+        Rolling Net Profit, Max Drawdown, Return to Drawdown & Daily Win Rate of many Strategies at once
+        :param window: Window size in trading days. Ex: StratStatistics.ROLLING_WINDOWS
+        :param strat_names: [Optional] A list of Strategy names. Default uses ALL Strategies
+        :return: A dict of (dates x strategy names) Dataframes keyed by StratStatistics.ROLLING_METRICS
+        """
+        return self.get_pnl_matrix(strat_names=strat_names).rolling_metrics(window=window)
+
+    def walk_forward(self, window: int, step: int, strat_names: list = None, account_size: float = 0.0,
+                     start_date: str = None, end_date: str = None, constraints: OptConstraints = None) -> WalkForward:
+        """
+        Rolling In-Sample / Out-of-Sample Walk Forward Optimization over 1 shared PnlMatrix
+        :param window: Amount of In-Sample trading days to optimize over
+        :param step: Amount of Out-of-Sample trading days to trade each chosen Portfolio before rolling forward
+        :param strat_names: [Optional] A list of Strategy names to be Optimized. Default uses ALL Strategies
+        :param account_size: [Optional] Size/Money you have to trade with to optimize for. Default = 0(disabled/not used)
+        :param start_date: [Optional] Starting date to select from dataframe. Default: ALL Dates
+        :param end_date: [Optional] End Date to select from dataframe. Default: ALL Dates
+        :param constraints: [Optional] Only choose Portfolios that meet these limits. Default: Every combination
+        :return: A WalkForward object with each window's results & the stitched Out-of-Sample Equity Curve
+        """
+        return WalkForward(pnl_matrix=self.get_pnl_matrix(strat_names=strat_names), window=window, step=step,
+                           account_size=account_size, start_date=start_date, end_date=end_date,
+                           constraints=constraints).run()
+
+    def _update_strat_dataclass(self, strat_name: str, snapshot: TradesSnapshot) -> StrategyStats:
+        """
+        Create a new Strategy Data Class with Daily PnL and Daily Cumulative PnL for the Strategy's version in the
+        snapshot. Cached objects are replaced instead of changed, so other threads still using them aren't affected
+        :param strat_name: Strategy Name
+        :param snapshot: TradesSnapshot to read from
+        """
+        strat_stats_obj = StrategyStats(name=strat_name)
+        strat_stats_obj.create_daily_df(strat_df=snapshot.get_strat_df(strat_name))
+        strat_stats_obj.data_version = snapshot.get_strat_version(strat_name)
+        # Don't let a reader on an older snapshot replace a newer cached version
+        cached_ss = self._strat_stats.get(strat_name)
+        if cached_ss is None or cached_ss.data_version < strat_stats_obj.data_version:
+            self._strat_stats[strat_name] = strat_stats_obj
         return strat_stats_obj
 
-    def strats_to_list(self) -> list:
+    def strats_to_list(self, snapshot: TradesSnapshot = None) -> list:
         """
+        :param snapshot: [Optional] TradesSnapshot to read from. Default: The current snapshot
         :return: A list of Loaded Strategies
         """
-        return list(self.trade_data.keys())
\ No newline at end of file
+        return (snapshot or self.get_snapshot()).strats_to_list()
\ No newline at end of file
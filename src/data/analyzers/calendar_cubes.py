@@ -0,0 +1,166 @@
+import calendar
+import threading
+import numpy as np
+import pandas as pd
+
+from src.data.types.trades_snapshot import TradesSnapshot
+
+
+class CalendarCube:
+    """
+    PnL & Trade counts of 1 Strategy or Portfolio bucketed by month x weekday x hour of day, as 1 compact array.
+    Monthly & yearly grids, weekday breakdowns & hour of day views are sums over its axes, so they never touch the
+    Trades. A Portfolio's cube is the sum of its members' cubes.
+    """
+
+    # Layers of the cube. Trades are bucketed by the month they exited in. Entry layers use Entry weekday & hour
+    LAYERS: list = ['exit_pnl', 'exit_trades', 'entry_pnl', 'entry_trades']
+    WEEKDAYS: list = list(calendar.day_abbr)
+    HOURS: list = list(range(24))
+
+    def __init__(self, first_month: int = 0, values: np.ndarray = None):
+        """
+        :param first_month: Month number of the 1st month. year * 12 + month - 1
+        :param values: [Optional] (months x LAYERS x weekdays x hours) array. Default: Empty
+        """
+        self.first_month = first_month
+        self.values: np.ndarray = values if values is not None else np.zeros((0, len(self.LAYERS), 7, 24))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @classmethod
+    def from_trades(cls, strat_df: pd.DataFrame) -> 'CalendarCube':
+        """
+        Bucket every Trade in 1 pass with np.bincount
+        :param strat_df: A Strategy's Trades Dataframe
+        :return: The Strategy's CalendarCube
+        """
+        if len(strat_df) == 0:
+            return cls()
+        exit_times = pd.DatetimeIndex(strat_df['Exit time'])
+        entry_times = pd.DatetimeIndex(strat_df['Entry time'])
+        months = exit_times.year.to_numpy() * 12 + exit_times.month.to_numpy() - 1
+        first_month = int(months.min())
+        n_months = int(months.max()) - first_month + 1
+        profit = strat_df['Profit'].to_numpy(dtype=np.float64)
+        size = n_months * 7 * 24
+        values = np.zeros((n_months, len(cls.LAYERS), 7, 24))
+        for prefix, times in (('exit', exit_times), ('entry', entry_times)):
+            bucket = ((months - first_month) * 7 + times.weekday.to_numpy()) * 24 + times.hour.to_numpy()
+            values[:, cls.LAYERS.index(f'{prefix}_pnl')] = np.bincount(
+                bucket, weights=profit, minlength=size).reshape(n_months, 7, 24)
+            values[:, cls.LAYERS.index(f'{prefix}_trades')] = np.bincount(
+                bucket, minlength=size).reshape(n_months, 7, 24)
+        return cls(first_month=first_month, values=values)
+
+    @classmethod
+    def combine(cls, cubes: list['CalendarCube'], weights: list[float] = None) -> 'CalendarCube':
+        """
+        :param cubes: CalendarCubes of each member
+        :param weights: [Optional] Contract multiplier of each member's PnL. Trade counts aren't weighted. Default: 1 each
+        :return: A CalendarCube of the members summed
+        """
+        cubes_weights = [(cube, 1.0 if weights is None else weights[idx]) for idx, cube in enumerate(cubes)
+                         if len(cube) > 0]
+        if len(cubes_weights) == 0:
+            return cls()
+        first_month = min(cube.first_month for cube, _ in cubes_weights)
+        last_month = max(cube.first_month + len(cube) for cube, _ in cubes_weights)
+        values = np.zeros((last_month - first_month,) + cubes_weights[0][0].values.shape[1:])
+        pnl_layers = [cls.LAYERS.index(layer) for layer in cls.LAYERS if layer.endswith('_pnl')]
+        for cube, weight in cubes_weights:
+            cube_values = cube.values
+            if weight != 1.0:
+                cube_values = cube_values.copy()
+                cube_values[:, pnl_layers] *= weight
+            start = cube.first_month - first_month
+            values[start:start + len(cube)] += cube_values
+        return cls(first_month=first_month, values=values)
+
+    def _select(self, layer: str, start_date: str = None, end_date: str = None) -> tuple[int, np.ndarray]:
+        """
+        :return: (1st month number, (months x weekdays x hours) array) of the layer in the months of the dates
+        """
+        if layer not in self.LAYERS:
+            raise ValueError(f"Calendar layer: {layer} must be 1 of {self.LAYERS}")
+        start = 0 if start_date is None else self._month_number(start_date) - self.first_month
+        end = len(self) if end_date is None else self._month_number(end_date) - self.first_month + 1
+        start, end = max(start, 0), min(max(end, 0), len(self))
+        return self.first_month + start, self.values[start:max(start, end), self.LAYERS.index(layer)]
+
+    @staticmethod
+    def _month_number(date: str) -> int:
+        date = pd.Timestamp(date)
+        return date.year * 12 + date.month - 1
+
+    def get_monthly_grid(self, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """
+        :param start_date: [Optional] Date in the 1st month to show. Whole months are used. Default: ALL Dates
+        :param end_date: [Optional] Date in the last month to show. Whole months are used. Default: ALL Dates
+        :return: A Dataframe of PnL with a row per year, a column per month & a 'Year' total. Months without data = NaN
+        """
+        first_month, values = self._select(layer='exit_pnl', start_date=start_date, end_date=end_date)
+        month_pnl = values.sum(axis=(1, 2))
+        traded = self._select(layer='exit_trades', start_date=start_date, end_date=end_date)[1].sum(axis=(1, 2)) > 0
+        month_numbers = np.arange(first_month, first_month + len(values))
+        grid = pd.Series(np.where(traded, month_pnl, np.nan),
+                         index=pd.MultiIndex.from_arrays([month_numbers // 12, month_numbers % 12 + 1])).unstack()
+        grid = grid.reindex(columns=range(1, 13))
+        grid.columns = list(calendar.month_abbr)[1:]
+        grid['Year'] = grid.sum(axis=1, min_count=1)
+        grid.index.name = 'Year'
+        return grid
+
+    def get_weekday_hour(self, prefix: str = 'exit', trades: bool = False, start_date: str = None,
+                         end_date: str = None) -> pd.DataFrame:
+        """
+        :param prefix: [Optional] 'exit' or 'entry' weekday & hour of each Trade
+        :param trades: [Optional] True = Trade counts. False = PnL
+        :param start_date: [Optional] Date in the 1st month to sum. Whole months are used. Default: ALL Dates
+        :param end_date: [Optional] Date in the last month to sum. Whole months are used. Default: ALL Dates
+        :return: A (weekdays x hours) Dataframe
+        """
+        layer = f"{prefix}_{'trades' if trades else 'pnl'}"
+        values = self._select(layer=layer, start_date=start_date, end_date=end_date)[1].sum(axis=0)
+        return pd.DataFrame(data=values, index=self.WEEKDAYS, columns=self.HOURS)
+
+
+class CalendarCubes:
+    """Each Strategy's CalendarCube, cached by its data version, so only Strategies with new Trades are built again"""
+
+    def __init__(self):
+        # {'strat_name': (data version, CalendarCube)}
+        self._cubes: dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get_cube(self, snapshot: TradesSnapshot, strat_name: str) -> CalendarCube:
+        """
+        :param snapshot: TradesSnapshot to read from
+        :param strat_name: Strategy Name
+        :return: The Strategy's CalendarCube
+        """
+        version = snapshot.get_strat_version(strat_name)
+        with self._lock:
+            cached = self._cubes.get(strat_name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        cube = CalendarCube.from_trades(strat_df=snapshot.get_strat_df(strat_name))
+        with self._lock:
+            # Don't let a reader on an older snapshot replace a newer cached version
+            if strat_name not in self._cubes or self._cubes[strat_name][0] < version:
+                self._cubes[strat_name] = (version, cube)
+        return cube
+
+    def get_portfolio_cube(self, snapshot: TradesSnapshot, strat_names: list,
+                           weights: dict[str, float] = None) -> CalendarCube:
+        """
+        :param snapshot: TradesSnapshot to read from
+        :param strat_names: A list of Strategy Names
+        :param weights: [Optional] Contract multiplier of each Strategy {'strat_name': 2}. Default: 1 each
+        :return: A CalendarCube of the Strategies' cubes summed
+        """
+        weights = weights or {}
+        return CalendarCube.combine(cubes=[self.get_cube(snapshot=snapshot, strat_name=strat_name)
+                                           for strat_name in strat_names],
+                                    weights=[weights.get(strat_name, 1.0) for strat_name in strat_names])
@@ -0,0 +1,195 @@
+import threading
+import numpy as np
+import pandas as pd
+
+from src.conf_setup import logger
+from src.data.analyzers.opt_constraints import OptConstraints
+from src.data.analyzers.strat_statistics import StratStatistics
+from src.data.types.trades_snapshot import TradesSnapshot
+
+
+class RollupStats(StratStatistics):
+    """
+    Statistics of 1 Rollup, the summed Daily PnL of its members. Each member is also a RollupStats of only its own
+    part of the Rollup, so a Rollup can drill down into its Strategies & be graphed like a PortfolioCalculator
+    """
+
+    def __init__(self, name: str, member_pnl: dict[str, pd.Series], start_date: str = None, end_date: str = None,
+                 drill_down: bool = True):
+        """
+        :param name: Name of the Rollup. Ex: 'Instrument: NQ 03-25'
+        :param member_pnl: {'strat_name': Daily PnL of the Strategy's Trades in the Rollup}
+        :param start_date: [Optional] Date to start selection of statistics. Default: ALL Dates
+        :param end_date: [Optional] Date to end selection of statistics. Default: ALL Dates
+        :param drill_down: [Optional] Also build a RollupStats per member. Default: True
+        """
+        super().__init__(start_date=start_date, end_date=end_date)
+        self.name = name
+        self.weights = None
+        member_pnl = {strat_name: daily_pnl.loc[start_date:end_date] for strat_name, daily_pnl in member_pnl.items()}
+        self.strat_names: list = sorted(strat_name for strat_name, daily_pnl in member_pnl.items() if len(daily_pnl) > 0)
+        self.sel_strats_ss: list[RollupStats] = [
+            RollupStats(name=strat_name, member_pnl={strat_name: member_pnl[strat_name]}, drill_down=False)
+            for strat_name in self.strat_names] if drill_down else []
+        if len(self.strat_names) > 0:
+            daily_pnl = pd.concat([member_pnl[strat_name] for strat_name in self.strat_names]).groupby(level=0).sum()
+            self.create_daily_strats_df(daily_pnl=daily_pnl)
+            self._set_net_profit()
+            self._set_daily_max_dd()
+            self._set_return_to_dd_ratio()
+            self._set_req_cap_daytrade()
+            self._set_win_rate()
+
+    @property
+    def combined_strats_df(self) -> pd.DataFrame:
+        """:return: The summed Daily Dataframe of every member"""
+        return self.strats_df
+
+
+class DailyRollups:
+    """
+    Daily PnL summed by Instrument, by Account & by user defined Strategy Tag, kept up to date as Trades are committed.
+    Each Strategy's Daily PnL is split by Instrument & Account once. After that, sync() only groups the Trades that
+    came in since the last sync & adds them on, then re-sums only the Rollups those Strategies are in. Views read the
+    sums & never group every Trade again.
+    """
+
+    # Trade columns to Rollup by. Tags come from StrategyTags instead of the Trades
+    TRADE_GROUP_COLS: list = OptConstraints.GROUP_COLS
+    GROUP_COLS: list = TRADE_GROUP_COLS + ['Tag']
+    SUMMARY_COLS: list = ['Rollup', 'Strategies', 'Net Profit', 'Max Drawdown', 'Return to Drawdown',
+                          'Capital Required', 'Daily Win Rate']
+
+    def __init__(self):
+        # {'strat_name': {('Instrument', 'NQ 03-25'): Daily PnL}}. Plus ('Strategy', strat_name) for the whole Strategy
+        self._strat_pnl: dict[str, dict[tuple, pd.Series]] = {}
+        # {'strat_name': (data version, Trades added, last 'Exit time' added)}
+        self._progress: dict[str, tuple] = {}
+        # {('Instrument', 'NQ 03-25'): {'strat_name': Daily PnL}}
+        self._members: dict[tuple, dict[str, pd.Series]] = {}
+        # {('Instrument', 'NQ 03-25'): summed Daily PnL}
+        self._totals: dict[tuple, pd.Series] = {}
+        self._strat_tags: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def sync(self, snapshot: TradesSnapshot, strat_tags: dict[str, list] = None) -> list[tuple]:
+        """
+        Add Trades committed since the last sync & pick up Tag changes
+        :param snapshot: TradesSnapshot to sync to
+        :param strat_tags: [Optional] {'strat_name': ['tag1']} from StrategyTags. Default: No Tags
+        :return: A list of the (group, value) Rollups that changed
+        """
+        strat_tags = {strat_name: sorted(tags) for strat_name, tags in (strat_tags or {}).items()
+                      if strat_name in snapshot.trade_data and tags}
+        with self._lock:
+            changed_keys = set()
+            changed_strats = set()
+            for strat_name in [strat_name for strat_name in self._strat_pnl if strat_name not in snapshot.trade_data]:
+                changed_keys.update(key for key in self._strat_pnl.pop(strat_name) if key[0] != 'Strategy')
+                self._progress.pop(strat_name, None)
+                changed_strats.add(strat_name)
+            for strat_name in snapshot.strats_to_list():
+                version = snapshot.get_strat_version(strat_name)
+                if self._progress.get(strat_name, (None,))[0] != version:
+                    changed_keys.update(self._add_new_trades(strat_name=strat_name, version=version,
+                                                             strat_df=snapshot.get_strat_df(strat_name)))
+                    changed_strats.add(strat_name)
+            for strat_name in set(strat_tags) | set(self._strat_tags):
+                if strat_tags.get(strat_name) != self._strat_tags.get(strat_name) or strat_name in changed_strats:
+                    changed_keys.update(('Tag', tag) for tag in strat_tags.get(strat_name, []) +
+                                        self._strat_tags.get(strat_name, []))
+            self._strat_tags = strat_tags
+            # Re-sum only the Rollups that changed. Replaced, not modified, so readers keep a consistent Series
+            for key in changed_keys:
+                members = self._get_members(key=key)
+                if len(members) == 0:
+                    self._members.pop(key, None)
+                    self._totals.pop(key, None)
+                    continue
+                self._members[key] = members
+                self._totals[key] = pd.concat(members.values()).groupby(level=0).sum()
+        return sorted(changed_keys, key=str)
+
+    def _get_members(self, key: tuple) -> dict[str, pd.Series]:
+        """:return: {'strat_name': Daily PnL} of every Strategy in the (group, value) Rollup"""
+        if key[0] == 'Tag':
+            return {strat_name: self._strat_pnl[strat_name][('Strategy', strat_name)]
+                    for strat_name, tags in self._strat_tags.items() if key[1] in tags and strat_name in self._strat_pnl}
+        return {strat_name: strat_pnl[key] for strat_name, strat_pnl in self._strat_pnl.items() if key in strat_pnl}
+
+    def _add_new_trades(self, strat_name: str, version: int, strat_df: pd.DataFrame) -> set:
+        """
+        Group the Trades after the last 'Exit time' added by day & Rollup & add them on. Trades are sorted by
+        'Exit time', so they're the tail of the Dataframe. If older Trades were merged in before it, start over
+        :return: The (group, value) Rollups the Strategy changed
+        """
+        _, trades_added, last_exit = self._progress.get(strat_name, (None, 0, None))
+        exit_times = strat_df['Exit time'].to_numpy()
+        if trades_added > 0 and (trades_added > len(exit_times) or exit_times[trades_added - 1] != last_exit):
+            logger.info(f"Rollups: Older Trades were added to {strat_name}. Splitting its Daily PnL again")
+            changed_keys = set(self._strat_pnl.pop(strat_name, {}))
+            trades_added = 0
+        else:
+            changed_keys = set()
+        strat_pnl = dict(self._strat_pnl.get(strat_name, {}))
+        new_df = strat_df.iloc[trades_added:]
+        if len(new_df) > 0:
+            days = new_df['Exit time'].dt.normalize()
+            new_pnl = {('Strategy', strat_name): new_df.groupby(days)['Profit'].sum()}
+            for col in self.TRADE_GROUP_COLS:
+                for (value, day), profit in new_df.groupby([new_df[col], days])['Profit'].sum().items():
+                    new_pnl.setdefault((col, value), {})[day] = profit
+            for key, daily_pnl in new_pnl.items():
+                daily_pnl = daily_pnl if isinstance(daily_pnl, pd.Series) else pd.Series(daily_pnl, dtype=np.float64)
+                strat_pnl[key] = daily_pnl if key not in strat_pnl else strat_pnl[key].add(daily_pnl, fill_value=0.0)
+                changed_keys.add(key)
+            last_exit = exit_times[-1]
+        self._strat_pnl[strat_name] = strat_pnl
+        self._progress[strat_name] = (version, len(exit_times), last_exit)
+        # ('Strategy', strat_name) is only a building block for Tags, not a Rollup
+        changed_keys.discard(('Strategy', strat_name))
+        return changed_keys
+
+    def get_groups(self, group_col: str) -> list:
+        """
+        :param group_col: 1 of GROUP_COLS
+        :return: Every value with a Rollup. Ex: Every Instrument traded
+        """
+        with self._lock:
+            return sorted((value for col, value in self._totals if col == group_col), key=str)
+
+    def get_rollup_stats(self, group_col: str, value: str, start_date: str = None,
+                         end_date: str = None) -> RollupStats:
+        """
+        :param group_col: 1 of GROUP_COLS
+        :param value: Ex: 'NQ 03-25'
+        :param start_date: [Optional] Date to start selection of statistics. Default: ALL Dates
+        :param end_date: [Optional] Date to end selection of statistics. Default: ALL Dates
+        :return: RollupStats of the Rollup with a RollupStats per member Strategy in sel_strats_ss
+        """
+        if group_col not in self.GROUP_COLS:
+            raise ValueError(f"Rollup group: {group_col} must be 1 of {self.GROUP_COLS}")
+        with self._lock:
+            members = self._members.get((group_col, value), {})
+        return RollupStats(name=f"{group_col}: {value}", member_pnl=members, start_date=start_date, end_date=end_date)
+
+    def get_summary(self, group_col: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """
+        :param group_col: 1 of GROUP_COLS
+        :param start_date: [Optional] Date to start selection of statistics. Default: ALL Dates
+        :param end_date: [Optional] Date to end selection of statistics. Default: ALL Dates
+        :return: A Dataframe of each Rollup's Statistics in the group with SUMMARY_COLS
+        """
+        if group_col not in self.GROUP_COLS:
+            raise ValueError(f"Rollup group: {group_col} must be 1 of {self.GROUP_COLS}")
+        with self._lock:
+            rollups = [(value, len(self._members[(col, value)]), total)
+                       for (col, value), total in self._totals.items() if col == group_col]
+        rows = []
+        for value, member_ct, total in sorted(rollups, key=lambda rollup: str(rollup[0])):
+            rollup_ss = RollupStats(name=str(value), member_pnl={str(value): total}, start_date=start_date,
+                                    end_date=end_date, drill_down=False)
+            rows.append([value, member_ct, round(rollup_ss.net_profit, 2), rollup_ss.max_drawdown,
+                         rollup_ss.return_to_dd, round(rollup_ss.req_cap_daytrade, 2),
+                         round(rollup_ss.daily_win_rate, 2)])
+        return pd.DataFrame(data=rows, columns=self.SUMMARY_COLS)
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+
+class IntradayEquity:
+    """
+    Trade resolution Equity & Drawdown of 1 or more Strategies. Daily Statistics only see each day's closing PnL, so a
+    drop & recovery inside a day never shows up. Here every Trade is an event, optionally with its MAE(Max Adverse
+    Excursion) counted against equity the whole time the Trade is open, for the worst case our margin could have seen.
+    """
+
+    # Columns each Trade run needs. Exit time must already be sorted ascending, like every Strategy Dataframe
+    TRADE_COLS: list = ['Entry time', 'Exit time', 'Profit', 'MAE']
+
+    def __init__(self, trade_runs: list[pd.DataFrame], req_cap_mult: float, use_mae: bool = True):
+        """
+        :param trade_runs: A list of Trades Dataframes with TRADE_COLS, 1 per Strategy, each sorted by 'Exit time'
+        :param req_cap_mult: Capital Required by Max DrawDown Multiplier. Ex: StratStatistics.REQ_CAP_MAX_DD_MULT
+        :param use_mae: [Optional] Count each open Trade's MAE against equity. False = only closed Trades
+        """
+        self.trade_runs = [run for run in trade_runs if len(run) > 0]
+        self.req_cap_mult = req_cap_mult
+        self.use_mae = use_mae
+        # Lowest equity at every event. Same as the closed Trade equity when MAE isn't used
+        self.equity: pd.Series = pd.Series(dtype='float64')
+        self.max_drawdown: float = 0.0
+        self.req_cap_daytrade: float = 0.0
+        self.trade_count: int = 0
+
+    def run(self) -> 'IntradayEquity':
+        """
+        Merge every Trade event in time order & work out the Drawdown & Required Capital. Raises a ValueError if a Trade
+        enters after it exits
+        :return: self, so it can be chained Ex: IntradayEquity(runs, 2).run().max_drawdown
+        """
+        if len(self.trade_runs) == 0:
+            return self
+        times, profits, maes, is_exit = self._merge_events()
+        realized = profits.cumsum()
+        low = realized - maes.cumsum()
+        # Peaks are only ever closed equity, so a Drawdown starts from money we actually had. NaN until the 1st exit
+        peaks = pd.Series(np.where(is_exit, realized, np.nan)).ffill().cummax().to_numpy()
+        with np.errstate(invalid='ignore'):
+            drawdown = np.nanmin(low - peaks) if not np.isnan(peaks).all() else 0.0
+        self.equity = pd.Series(data=low, index=pd.DatetimeIndex(times, name='Time'), name='Equity')
+        self.max_drawdown = round(float(min(drawdown, 0.0)), 2)
+        # Same formula as StratStatistics._set_req_cap_daytrade(), but on the lowest equity we reached
+        self.req_cap_daytrade = abs(self.max_drawdown * self.req_cap_mult) - float(low.min())
+        self.trade_count = sum(len(run) for run in self.trade_runs)
+        return self
+
+    def _merge_events(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        K-way merge of each run's events. Every run is already sorted, so the stable sort just merges the sorted runs
+        instead of sorting from scratch. For events at the same time, exits go before entries, so a Trade's MAE is never counted
+        alongside the Trade that replaced it
+        :return: Tuple of (event times, realized PnL change, open MAE change, is an exit) in time order
+        """
+        exit_times = np.concatenate([run['Exit time'].to_numpy(dtype='datetime64[ns]') for run in self.trade_runs])
+        profits = np.concatenate([run['Profit'].to_numpy(dtype=np.float64) for run in self.trade_runs])
+        if not self.use_mae:
+            order = np.argsort(exit_times, kind='stable')
+            return exit_times[order], profits[order], np.zeros(len(order)), np.ones(len(order), dtype=bool)
+        entry_times = np.concatenate([run['Entry time'].to_numpy(dtype='datetime64[ns]') for run in self.trade_runs])
+        # An entry after its exit would count its MAE against the wrong stretch of equity, so it's never guessed at
+        bad_trades = np.flatnonzero(entry_times > exit_times)
+        if len(bad_trades) > 0:
+            first_bad = bad_trades[0]
+            raise ValueError(f"Intraday Equity: {len(bad_trades)} Trades enter after they exit. Ex: Entry "
+                             f"{pd.Timestamp(entry_times[first_bad])} & Exit {pd.Timestamp(exit_times[first_bad])}")
+        maes = np.abs(np.nan_to_num(np.concatenate([run['MAE'].to_numpy(dtype=np.float64)
+                                                    for run in self.trade_runs])))
+        n_trades = len(exit_times)
+        times = np.concatenate([exit_times, entry_times])
+        is_entry = np.concatenate([np.zeros(n_trades, dtype=np.int8), np.ones(n_trades, dtype=np.int8)])
+        order = np.lexsort((is_entry, times))
+        event_profits = np.concatenate([profits, np.zeros(n_trades)])[order]
+        event_maes = np.concatenate([-maes, maes])[order]
+        return times[order], event_profits, event_maes, is_entry[order] == 0
@@ -0,0 +1,203 @@
+import math
+import os
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from src.conf_setup import LIVE_STATE_FILE, LIVE_EVENTS_FILE, logger
+from src.conf_setup.live_settings import LiveSettings
+
+
+class LiveState:
+    """
+    Running totals of every Live Strategy since its LIVE_DATE: PnL, peak, Drawdown from peak & distance to its Stop
+    Loss. The ingest calls update() after each commit & only the Trades that came in since the last update are added,
+    so it costs O(new Trades). A Strategy crossing its Stop Loss raises 1 breach event, logged & kept for the live tab.
+    Saved to parquet, so web workers in other processes can show it. They reload it only when the file changes.
+    """
+
+    # SL_SETTING & PRE_LIVE_TRADES are what STOP_LOSS was resolved from, so it's only worked out again when they change
+    COLUMNS: list = ['LIVE_DATE', 'STOP_LOSS', 'PNL', 'PEAK', 'DRAWDOWN', 'SL_DISTANCE', 'TRADES', 'LAST_EXIT',
+                     'BREACHED', 'UPDATED', 'SL_SETTING', 'PRE_LIVE_TRADES']
+    EVENT_COLUMNS: list = ['TIME', 'STRATEGY', 'EXIT_TIME', 'PNL', 'DRAWDOWN', 'STOP_LOSS']
+    # Most recent breach events kept
+    MAX_EVENTS: int = 500
+
+    def __init__(self, live_settings: LiveSettings = None, state_file: str = LIVE_STATE_FILE,
+                 events_file: str = LIVE_EVENTS_FILE):
+        """
+        :param live_settings: [Optional] LiveSettings to follow. Default: A new LiveSettings
+        :param state_file: [Optional] Parquet file for the running totals. Default: LIVE_STATE_FILE
+        :param events_file: [Optional] Parquet file for breach events. Default: LIVE_EVENTS_FILE
+        """
+        self.live_settings = live_settings or LiveSettings()
+        self.state_file = state_file
+        self.events_file = events_file
+        # {'strat_name': {COLUMNS: value}}
+        self._states: dict[str, dict] = {}
+        self.events: pd.DataFrame = pd.DataFrame(columns=self.EVENT_COLUMNS)
+        # Modified time of the state file when it was last loaded or saved
+        self._state_mtime: float | None = None
+        self._load_state()
+
+    def _load_state(self):
+        """ Load the Previous Live State & breach events from db files """
+        try:
+            self._state_mtime = os.path.getmtime(self.state_file)
+            self._states = pd.read_parquet(path=self.state_file).to_dict(orient='index')
+        except FileNotFoundError:
+            self._state_mtime = None
+            self._states = {}
+        try:
+            self.events = pd.read_parquet(path=self.events_file)
+        except FileNotFoundError:
+            self.events = pd.DataFrame(columns=self.EVENT_COLUMNS)
+
+    def refresh(self):
+        """ Load the db files again only if they changed since we last loaded them. Ex: Saved by the ingest process """
+        try:
+            state_mtime = os.path.getmtime(self.state_file)
+        except FileNotFoundError:
+            state_mtime = None
+        if state_mtime != self._state_mtime:
+            self._load_state()
+
+    def get_states(self) -> pd.DataFrame:
+        """:return: A Dataframe of every Live Strategy's running totals with COLUMNS, indexed by Strategy Name"""
+        self.refresh()
+        return pd.DataFrame.from_dict(data=self._states, orient='index', columns=self.COLUMNS)
+
+    def get_events(self) -> pd.DataFrame:
+        """:return: A Dataframe of breach events with EVENT_COLUMNS, newest 1st"""
+        self.refresh()
+        return self.events.iloc[::-1]
+
+    def update(self, data_trades, strat_names: list = None) -> list[dict]:
+        """
+        Add new Trades to the running totals. Strategies whose LIVE_DATE or STOP_LOSS changed start over from LIVE_DATE.
+        Strategies without new Trades or changed Live Settings are skipped without reading their Trades
+        :param data_trades: DataTrades(AnalyzeDataTrades) to read the current snapshot from
+        :param strat_names: [Optional] Strategies with new Trades. Default: ALL Live Strategies
+        :return: A list of new breach events as dicts with EVENT_COLUMNS
+        """
+        self.live_settings.refresh()
+        snapshot = data_trades.get_snapshot()
+        live_strats = [strat_name for strat_name in self.live_settings.live_strategies
+                       if strat_name in snapshot.trade_data and self.live_settings.get_strat_date(name=strat_name)]
+        changed = False
+        for strat_name in [strat_name for strat_name in self._states if strat_name not in live_strats]:
+            del self._states[strat_name]
+            changed = True
+        new_events = []
+        for strat_name in live_strats:
+            state = self._states.get(strat_name)
+            live_date = pd.Timestamp(self.live_settings.get_strat_date(name=strat_name))
+            sl_setting = self.live_settings.get_strat_sl(name=strat_name)
+            sl_setting = np.nan if sl_setting is None else float(sl_setting)
+            settings_same = state is not None and state['LIVE_DATE'] == live_date and \
+                self._same_setting(stored=state.get('SL_SETTING'), sl_setting=sl_setting)
+            if settings_same and strat_names is not None and strat_name not in strat_names:
+                continue
+            strat_df = snapshot.get_strat_df(strat_name)
+            pre_live_trades = int(np.searchsorted(strat_df['Exit time'].to_numpy(), live_date.to_datetime64(),
+                                                  side='left'))
+            # Without a saved STOP_LOSS it's the Max Drawdown before LIVE_DATE, which only older Trades can change
+            if settings_same and (not math.isnan(sl_setting) or state.get('PRE_LIVE_TRADES') == pre_live_trades):
+                stop_loss = state['STOP_LOSS']
+            else:
+                stop_loss = self._get_stop_loss(data_trades=data_trades, strat_name=strat_name, live_date=live_date,
+                                                sl_setting=sl_setting)
+            if state is None or state['LIVE_DATE'] != live_date or state['STOP_LOSS'] != stop_loss:
+                state = self._new_state(live_date=live_date, stop_loss=stop_loss)
+            state.update({'SL_SETTING': sl_setting, 'PRE_LIVE_TRADES': pre_live_trades})
+            event = self._add_new_trades(strat_name=strat_name, state=state, strat_df=strat_df)
+            self._states[strat_name] = state
+            changed = True
+            if event is not None:
+                new_events.append(event)
+        if new_events:
+            new_events_df = pd.DataFrame(data=new_events, columns=self.EVENT_COLUMNS)
+            self.events = (pd.concat([self.events, new_events_df], ignore_index=True) if len(self.events) > 0
+                           else new_events_df).iloc[-self.MAX_EVENTS:]
+            self.events.to_parquet(path=self.events_file)
+        if changed:
+            self.save()
+        return new_events
+
+    @staticmethod
+    def _get_stop_loss(data_trades, strat_name: str, live_date: pd.Timestamp, sl_setting: float) -> float:
+        """
+        Same as the live tab: the saved STOP_LOSS, otherwise the Strategy's historical Max Drawdown up to LIVE_DATE.
+        The fallback rebuilds the Strategy's Statistics, so it's only called when what it depends on changed
+        :param sl_setting: The saved STOP_LOSS. NaN = None saved
+        :return: A negative Stop Loss amount. 0 = No Stop Loss
+        """
+        stop_loss = sl_setting
+        if math.isnan(stop_loss):
+            stop_loss = data_trades.get_strat_stats(strat_name=strat_name).get_daily_max_dd(end_date=live_date)
+        return -abs(float(stop_loss or 0.0))
+
+    @staticmethod
+    def _same_setting(stored, sl_setting: float) -> bool:
+        """:return: True if the STOP_LOSS setting a state was resolved from is still sl_setting. NaN = None saved"""
+        if stored is None:
+            return False
+        return stored == sl_setting or (math.isnan(stored) and math.isnan(sl_setting))
+
+    @staticmethod
+    def _new_state(live_date: pd.Timestamp, stop_loss: float) -> dict:
+        return {'LIVE_DATE': live_date, 'STOP_LOSS': stop_loss, 'PNL': 0.0, 'PEAK': 0.0, 'DRAWDOWN': 0.0,
+                'SL_DISTANCE': -stop_loss if stop_loss else np.nan, 'TRADES': 0, 'LAST_EXIT': pd.NaT,
+                'BREACHED': False, 'UPDATED': datetime.now()}
+
+    def _add_new_trades(self, strat_name: str, state: dict, strat_df: pd.DataFrame) -> dict | None:
+        """
+        Add the Trades after state['LAST_EXIT'] to the running totals. Trades are sorted by 'Exit time', so they're the
+        tail of the Dataframe. If older Trades were merged in before it, start over from LIVE_DATE
+        :param strat_name: Strategy Name
+        :param state: The Strategy's running totals. Updated in place
+        :param strat_df: The Strategy's committed Trades
+        :return: A breach event if the Stop Loss was crossed by the new Trades, otherwise None
+        """
+        exit_times = strat_df['Exit time'].to_numpy()
+        live_start = int(np.searchsorted(exit_times, state['LIVE_DATE'].to_datetime64(), side='left'))
+        new_start = live_start + state['TRADES']
+        if state['TRADES'] > 0 and (new_start > len(exit_times) or exit_times[new_start - 1] != state['LAST_EXIT']):
+            logger.info(f"{strat_name}: Older Trades were added since the last Live update. Starting over from "
+                        f"{state['LIVE_DATE'].date()}")
+            # A breach stays until the Live Settings change, so starting over doesn't raise it again
+            state.update({**self._new_state(live_date=state['LIVE_DATE'], stop_loss=state['STOP_LOSS']),
+                          'BREACHED': state['BREACHED']})
+            new_start = live_start
+        profits = strat_df['Profit'].to_numpy(dtype=np.float64)[new_start:]
+        if len(profits) == 0:
+            return None
+        cum_pnl = state['PNL'] + profits.cumsum()
+        peaks = np.maximum.accumulate(np.maximum(cum_pnl, state['PEAK']))
+        drawdowns = cum_pnl - peaks
+        event = None
+        if state['STOP_LOSS'] and not state['BREACHED']:
+            breach_idx = np.flatnonzero(drawdowns <= state['STOP_LOSS'])
+            if len(breach_idx) > 0:
+                state['BREACHED'] = True
+                idx = breach_idx[0]
+                event = {'TIME': datetime.now(), 'STRATEGY': strat_name,
+                         'EXIT_TIME': pd.Timestamp(exit_times[new_start + idx]), 'PNL': round(cum_pnl[idx], 2),
+                         'DRAWDOWN': round(drawdowns[idx], 2), 'STOP_LOSS': state['STOP_LOSS']}
+                logger.warning(f"{strat_name}: STOP LOSS BREACHED. Drawdown ${event['DRAWDOWN']:,.2f} since "
+                               f"{state['LIVE_DATE'].date()} crossed Stop Loss ${state['STOP_LOSS']:,.2f} on the Trade "
+                               f"that exited {event['EXIT_TIME']}")
+        state.update({'PNL': round(cum_pnl[-1], 2), 'PEAK': round(peaks[-1], 2), 'DRAWDOWN': round(drawdowns[-1], 2),
+                      'TRADES': state['TRADES'] + len(profits), 'LAST_EXIT': pd.Timestamp(exit_times[-1]),
+                      'UPDATED': datetime.now()})
+        state['SL_DISTANCE'] = round(state['DRAWDOWN'] - state['STOP_LOSS'], 2) if state['STOP_LOSS'] else np.nan
+        return event
+
+    def save(self):
+        """Save the running totals to the state db file"""
+        self.get_states_df().to_parquet(path=self.state_file)
+        self._state_mtime = os.path.getmtime(self.state_file)
+
+    def get_states_df(self) -> pd.DataFrame:
+        """:return: The in memory running totals as a Dataframe without reloading the db file"""
+        return pd.DataFrame.from_dict(data=self._states, orient='index', columns=self.COLUMNS)
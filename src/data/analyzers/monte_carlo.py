@@ -0,0 +1,92 @@
+import numpy as np
+
+
+def _simulate_chunk(daily_pnl: np.ndarray, paths: int, block_size: int, req_cap_mult: float,
+                    seed_seq: np.random.SeedSequence) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Simulate 1 batch of resampled equity curves. Module level, so it can be pickled to a Process Pool
+    :param daily_pnl: 1D array of historical Daily PnL to resample from
+    :param paths: Amount of paths to simulate in this batch
+    :param block_size: Size of the consecutive day blocks to resample. 1 = Plain Bootstrap
+    :param req_cap_mult: Capital Required by Max DrawDown Multiplier
+    :param seed_seq: SeedSequence for this batch so results are reproducible no matter how batches are distributed
+    :return: Tuple of (Max Drawdown of each path, Required Capital of each path)
+    """
+    rng = np.random.default_rng(seed_seq)
+    n_days = len(daily_pnl)
+    if block_size <= 1:
+        sample_idx = rng.integers(0, n_days, size=(paths, n_days))
+    else:
+        # Circular Block Bootstrap: Stitch random blocks of consecutive days together & wrap around the end of history
+        n_blocks = -(-n_days // block_size)
+        block_starts = rng.integers(0, n_days, size=(paths, n_blocks, 1))
+        sample_idx = ((block_starts + np.arange(block_size)) % n_days).reshape(paths, -1)[:, :n_days]
+    cum_net_profit = daily_pnl[sample_idx].cumsum(axis=1)
+    running_max = np.maximum.accumulate(cum_net_profit, axis=1)
+    max_drawdown = (cum_net_profit - running_max).min(axis=1)
+    # Same formula as StratStatistics._set_req_cap_daytrade(), but for every path at once
+    req_cap_daytrade = np.abs(max_drawdown * req_cap_mult) - cum_net_profit.min(axis=1)
+    return max_drawdown, req_cap_daytrade
+
+
+class MonteCarloSim:
+    """Resample a Strategy's or Portfolio's Daily PnL thousands of times to estimate Max Drawdown & Required Capital
+    percentiles instead of relying on the 1 historical path"""
+
+    # Default amount of Equity Curves to simulate
+    PATHS: int = 10000
+    # Default Seed, so the same Daily PnL always gives the same results
+    SEED: int = 42
+    # Amount of consecutive days resampled together. 1 = Plain Bootstrap, > 1 keeps some of the day to day clustering
+    BLOCK_SIZE: int = 1
+    # Paths simulated per batch. Keeps memory at roughly CHUNK_SIZE * days * 8 bytes per batch
+    CHUNK_SIZE: int = 1000
+    # Percentiles reported. For drawdown 95 means only 5% of paths had a worse drawdown
+    PERCENTILES: tuple = (50, 95, 99)
+
+    def __init__(self, daily_pnl: np.ndarray, req_cap_mult: float, paths: int = PATHS, block_size: int = BLOCK_SIZE,
+                 seed: int = SEED, workers: int = 0):
+        """
+        :param daily_pnl: Daily PnL to resample from. Ex: StratStatistics.strats_df['Profit'].to_numpy()
+        :param req_cap_mult: Capital Required by Max DrawDown Multiplier. Ex: StratStatistics.REQ_CAP_MAX_DD_MULT
+        :param paths: [Optional] Amount of Equity Curves to simulate
+        :param block_size: [Optional] Size of resampled day blocks. 1 = Plain Bootstrap
+        :param seed: [Optional] Random Seed for reproducible results
+        :param workers: [Optional] Amount of Processes to simulate batches in. 0 or 1 = run in this process
+        """
+        self.daily_pnl = np.asarray(daily_pnl, dtype=np.float64)
+        self.req_cap_mult = req_cap_mult
+        self.paths = paths
+        self.block_size = max(int(block_size), 1)
+        self.seed = seed
+        self.workers = workers
+        self.max_drawdowns: np.ndarray = np.zeros(0)
+        self.req_caps: np.ndarray = np.zeros(0)
+        self.max_dd_pcts: dict[int, float] = {pct: 0.0 for pct in self.PERCENTILES}
+        self.req_cap_pcts: dict[int, float] = {pct: 0.0 for pct in self.PERCENTILES}
+
+    def run(self) -> 'MonteCarloSim':
+        """
+        Run the Simulation and set the percentile results
+        :return: self, so it can be chained Ex: MonteCarloSim(daily_pnl, 2).run().req_cap_pcts[95]
+        """
+        if len(self.daily_pnl) == 0 or self.paths <= 0:
+            return self
+        chunk_paths = [min(self.CHUNK_SIZE, self.paths - start) for start in range(0, self.paths, self.CHUNK_SIZE)]
+        seed_seqs = np.random.SeedSequence(self.seed).spawn(len(chunk_paths))
+        chunk_args = [(self.daily_pnl, paths, self.block_size, self.req_cap_mult, seed_seq)
+                      for paths, seed_seq in zip(chunk_paths, seed_seqs)]
+        if self.workers > 1 and len(chunk_args) > 1:
+            # Only pay for multiprocessing's import when a pool is asked for
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(_simulate_chunk, *zip(*chunk_args)))
+        else:
+            results = [_simulate_chunk(*args) for args in chunk_args]
+        self.max_drawdowns = np.concatenate([max_dd for max_dd, _ in results])
+        self.req_caps = np.concatenate([req_cap for _, req_cap in results])
+        for pct in self.PERCENTILES:
+            # Drawdowns are negative, so the worst tail is at the low end
+            self.max_dd_pcts[pct] = round(float(np.percentile(self.max_drawdowns, 100 - pct)), 2)
+            self.req_cap_pcts[pct] = round(float(np.percentile(self.req_caps, pct)), 2)
+        return self
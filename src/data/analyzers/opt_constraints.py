@@ -0,0 +1,133 @@
+from collections import Counter
+from itertools import combinations
+
+
+class OptConstraints:
+    """
+    Limits on which Portfolios the Optimizer may build. Applied while combinations are generated, so Portfolios that
+    break them are never built or scored. Ex: Only 3 to 8 Strategies, at most 2 per Instrument & always with 'Strat1'
+    """
+
+    # Strategy groups that can be capped. Keys of StrategyStats.groups & PnlMatrix.strat_groups
+    GROUP_COLS: list = ['Instrument', 'Account']
+    # Group of Strategies whose Daily PnL is alike. From StrategyClusters instead of the Trades
+    CLUSTER_COL: str = 'Cluster'
+
+    def __init__(self, min_size: int = 1, max_size: int = None, max_per_instrument: int = None,
+                 max_per_account: int = None, required: list = None, excluded: list = None,
+                 max_per_cluster: int = None, clusters: dict[str, int] = None):
+        """
+        :param min_size: [Optional] Fewest Strategies in a Portfolio. Default: 1
+        :param max_size: [Optional] Most Strategies in a Portfolio. Default: None = ALL
+        :param max_per_instrument: [Optional] Most Strategies trading the same Instrument. Default: None = No limit
+        :param max_per_account: [Optional] Most Strategies trading in the same Account. Default: None = No limit
+        :param required: [Optional] Strategy Names every Portfolio must have
+        :param excluded: [Optional] Strategy Names no Portfolio may have
+        :param max_per_cluster: [Optional] Most Strategies from the same cluster. Needs clusters. Default: None = No limit
+        :param clusters: [Optional] {'strat_name': cluster number} from StrategyClusters. Missing = its own cluster
+        """
+        self.min_size = max(1, int(min_size or 1))
+        self.max_size = int(max_size) if max_size else None
+        self.group_caps: dict[str, int] = {col: int(cap) for col, cap in zip(self.GROUP_COLS,
+                                                                          (max_per_instrument, max_per_account))
+                                           if cap is not None and cap > 0}
+        self.required: list = sorted(set(required or []))
+        self.excluded: list = sorted(set(excluded or []) - set(self.required))
+        self.clusters: dict[str, int] = {strat_name: int(cluster) for strat_name, cluster in (clusters or {}).items()}
+        if max_per_cluster is not None and max_per_cluster > 0 and self.clusters:
+            self.group_caps[self.CLUSTER_COL] = int(max_per_cluster)
+
+    def __repr__(self) -> str:
+        return f"OptConstraints({self.to_params()})"
+
+    def to_params(self) -> dict:
+        """:return: A dict of every limit. Used in the OptimizerCache fingerprint"""
+        params = {'min_size': self.min_size, 'max_size': self.max_size, 'group_caps': self.group_caps,
+                  'required': self.required, 'excluded': self.excluded}
+        if self.CLUSTER_COL in self.group_caps:
+            params['clusters'] = dict(sorted(self.clusters.items()))
+        return params
+
+    def is_unconstrained(self) -> bool:
+        """:return: True if every combination is allowed"""
+        return (self.min_size == 1 and self.max_size is None and not self.group_caps and not self.required
+                and not self.excluded)
+
+    def sizes(self, n_strats: int) -> range:
+        """
+        :param n_strats: Amount of Strategies to choose from
+        :return: Portfolio sizes to generate
+        """
+        max_size = n_strats if self.max_size is None else min(self.max_size, n_strats)
+        return range(max(self.min_size, len(self.required), 1), max_size + 1)
+
+    def iter_combinations(self, strat_names: list, strat_groups: dict[str, list[tuple]]):
+        """
+        Generate only the combinations that meet every limit. Smallest Portfolios 1st & in itertools.combinations order
+        within a size, so ties are broken the same way as without limits
+        :param strat_names: Strategy Names to choose from
+        :param strat_groups: {'Instrument': [Instruments of each Strategy]} in strat_names order. From PnlMatrix
+        :return: Generator of tuples of Strategy column numbers
+        """
+        missing = sorted(set(self.required) - set(strat_names))
+        if missing:
+            raise ValueError(f"Required Strategies {missing} aren't in the Strategies being Optimized")
+        required_idx = [idx for idx, strat_name in enumerate(strat_names) if strat_name in self.required]
+        free_idx = [idx for idx, strat_name in enumerate(strat_names)
+                    if strat_name not in self.required and strat_name not in self.excluded]
+        if self.CLUSTER_COL in self.group_caps:
+            # A Strategy without a cluster is its own cluster, so it's never capped by another
+            strat_groups = {**strat_groups, self.CLUSTER_COL: [(self.clusters.get(strat_name, strat_name),)
+                                                               for strat_name in strat_names]}
+        # Only groups with a cap matter. Each Strategy counts once towards every Instrument/Account it trades
+        strat_keys = [[(col, value) for col in self.group_caps for value in strat_groups[col][idx]]
+                      for idx in range(len(strat_names))]
+        required_counts = Counter(key for idx in required_idx for key in strat_keys[idx])
+        if any(count > self.group_caps[key[0]] for key, count in required_counts.items()):
+            return
+        for size in self.sizes(n_strats=len(strat_names)):
+            free_size = size - len(required_idx)
+            if free_size > len(free_idx):
+                break
+            if self.group_caps:
+                free_combs = self._iter_capped(free_idx=free_idx, size=free_size, strat_keys=strat_keys,
+                                               counts=Counter(required_counts))
+            else:
+                free_combs = combinations(free_idx, free_size)
+            for free_comb in free_combs:
+                yield tuple(sorted(required_idx + list(free_comb))) if required_idx else free_comb
+
+    def _iter_capped(self, free_idx: list, size: int, strat_keys: list[list[tuple]], counts: Counter):
+        """
+        Depth first combinations of free_idx that stop going down a branch as soon as a group is full
+        :param free_idx: Strategy column numbers to choose from
+        :param size: Amount to choose
+        :param strat_keys: [(group, value)] keys of every Strategy column
+        :param counts: Strategies already in each (group, value). Ex: From the required Strategies
+        :return: Generator of tuples of Strategy column numbers
+        """
+        chosen = []
+
+        def choose(start: int):
+            if len(chosen) == size:
+                yield tuple(chosen)
+                return
+            # Leave enough Strategies after this 1 to fill the Portfolio
+            for pos in range(start, len(free_idx) - (size - len(chosen)) + 1):
+                keys = strat_keys[free_idx[pos]]
+                if any(counts[key] >= self.group_caps[key[0]] for key in keys):
+                    continue
+                counts.update(keys)
+                chosen.append(free_idx[pos])
+                yield from choose(pos + 1)
+                chosen.pop()
+                counts.subtract(keys)
+        yield from choose(0)
+
+    @staticmethod
+    def count_possible(n_strats: int) -> int:
+        """
+        :param n_strats: Amount of Strategies to choose from
+        :return: Amount of combinations without any limits. For logging how much the search shrank
+        """
+        return 2 ** n_strats - 1
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from src.conf_setup import OPT_CACHE_DIR, logger
+
+
+class OptimizerCache:
+    """
+    Persistent Optimizer results under data/dbs/optimizer. Each result is keyed by a fingerprint of the Optimizer
+    parameters & the content hash of every member Strategy, so new Trades for any of them makes a new key & the old
+    result is never served again.
+    """
+
+    def __init__(self, cache_dir: str = OPT_CACHE_DIR):
+        """
+        :param cache_dir: [Optional] Directory to keep results in. Default: data/dbs/optimizer
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(strat_hashes: dict[str, str], params: dict) -> tuple[str, str]:
+        """
+        :param strat_hashes: Dict of {'strat_name': content hash} of every Strategy Optimized
+        :param params: Dict of every other parameter that changes the results. Ex: {'account_size': 0.0, 'top_ct': 5}
+        :return: Tuple of (fingerprint of the data & parameters, request key of only the Strategy Names & parameters)
+        """
+        request = json.dumps({'strategies': sorted(strat_hashes.keys()), 'params': params}, sort_keys=True, default=str)
+        data = json.dumps(sorted(strat_hashes.items()))
+        request_key = hashlib.sha1(request.encode()).hexdigest()
+        return hashlib.sha1(f'{request}|{data}'.encode()).hexdigest(), request_key
+
+    def _cache_file(self, fingerprint: str) -> str:
+        return os.path.join(self.cache_dir, f"{fingerprint}.json")
+
+    def get(self, strat_hashes: dict[str, str], params: dict) -> list | None:
+        """
+        :param strat_hashes: Dict of {'strat_name': content hash} of every Strategy Optimized
+        :param params: Dict of every other parameter that changes the results
+        :return: The cached results, or None if there's no result for the fingerprint
+        """
+        fingerprint, _ = self.fingerprint(strat_hashes=strat_hashes, params=params)
+        try:
+            with open(self._cache_file(fingerprint), 'r') as fh:
+                cached = json.load(fh)
+            logger.info(f"Optimizer Cache: Serving cached results from {cached['created']} for {fingerprint}")
+            return cached['results']
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Optimizer Cache: Ignoring unreadable cache file for {fingerprint}. Exception: {e}")
+            return None
+
+    def set(self, strat_hashes: dict[str, str], params: dict, results: list):
+        """
+        Save results & remove older results for the same request made against different Trades
+        :param strat_hashes: Dict of {'strat_name': content hash} of every Strategy Optimized
+        :param params: Dict of every other parameter that changes the results
+        :param results: JSON serializable results. Ex: The top Portfolios as lists of Strategy Names
+        """
+        fingerprint, request_key = self.fingerprint(strat_hashes=strat_hashes, params=params)
+        self._remove_files(keep_fingerprint=fingerprint,
+                           is_stale=lambda cached: cached.get('request_key') == request_key)
+        cache_file = self._cache_file(fingerprint)
+        tmp_file = f"{cache_file}.tmp"
+        with open(tmp_file, 'w') as fh:
+            json.dump({'fingerprint': fingerprint, 'request_key': request_key, 'created': datetime.now().isoformat(),
+                       'strategies': sorted(strat_hashes.keys()), 'params': params, 'results': results},
+                      fh, default=str)
+        # Replace in 1 step, so another process never reads half a file
+        os.replace(tmp_file, cache_file)
+
+    def invalidate(self, strat_names: list) -> int:
+        """
+        Remove every cached result that has any of the Strategies in it. Called when new Trades land for them
+        :param strat_names: A list of Strategy Names that changed
+        :return: Amount of cached results removed
+        """
+        changed = set(strat_names)
+        removed_ct = self._remove_files(is_stale=lambda cached: not changed.isdisjoint(cached.get('strategies', [])))
+        if removed_ct > 0:
+            logger.info(f"Optimizer Cache: Removed {removed_ct} results with new Trades for {sorted(changed)}")
+        return removed_ct
+
+    def _remove_files(self, is_stale, keep_fingerprint: str = None) -> int:
+        """
+        :param is_stale: Function given a cached result dict. Returns True if it should be removed
+        :param keep_fingerprint: [Optional] Fingerprint to never remove
+        :return: Amount of cached results removed
+        """
+        removed_ct = 0
+        for cache_name in os.listdir(self.cache_dir):
+            fingerprint, ext = os.path.splitext(cache_name)
+            if ext.lower() != '.json' or fingerprint == keep_fingerprint:
+                continue
+            cache_file = os.path.join(self.cache_dir, cache_name)
+            try:
+                with open(cache_file, 'r') as fh:
+                    cached = json.load(fh)
+                if is_stale(cached):
+                    os.remove(cache_file)
+                    removed_ct += 1
+            except (OSError, ValueError) as e:
+                logger.warning(f"Optimizer Cache: Failed to check cache file {cache_file}. Exception: {e}")
+        return removed_ct
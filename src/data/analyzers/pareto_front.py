@@ -0,0 +1,126 @@
+import numpy as np
+
+
+class ParetoFront:
+    """
+    Portfolios that no other Portfolio beats on every objective at once. Built a batch at a time, so only the current
+    front is ever kept, no matter how many Portfolios were scored. Each merge sorts the candidates best 1st, which means
+    a Portfolio can only be beaten by 1 sorted before it, then checks them a block at a time with array math.
+    """
+
+    # PnlMatrix.evaluate() stat & +1 to maximize or -1 to minimize it. max_drawdown is negative, so higher is better
+    OBJECTIVES: dict = {'net_profit': 1, 'max_drawdown': 1, 'req_cap_daytrade': -1, 'daily_win_rate': 1}
+    # Stats kept for each Portfolio on the front
+    STATS: list = list(OBJECTIVES) + ['return_to_dd']
+    # Candidates compared against the front at once. Memory is BLOCK_SIZE * front bools
+    BLOCK_SIZE: int = 1024
+
+    def __init__(self, n_strats: int):
+        """
+        :param n_strats: Amount of Strategies in each membership mask
+        """
+        self.stats: dict[str, np.ndarray] = {}
+        self.seqs: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.masks: np.ndarray = np.zeros((0, n_strats), dtype=bool)
+        self.candidates_seen: int = 0
+
+    def __len__(self) -> int:
+        return len(self.seqs)
+
+    def add(self, stats: dict[str, np.ndarray], seqs: np.ndarray, masks: np.ndarray) -> 'ParetoFront':
+        """
+        Merge a batch of scored Portfolios into the front
+        :param stats: PnlMatrix.evaluate() results of the batch
+        :param seqs: Enumeration order of each Portfolio. Of exact ties, only the 1st enumerated is kept
+        :param masks: (portfolios x strategies) membership masks
+        :return: self, so it can be chained
+        """
+        self.candidates_seen += len(seqs)
+        if len(seqs) == 0:
+            return self
+        if len(self) > 0:
+            # Most of a batch is beaten by the current front, so drop those before sorting anything
+            beaten = self.beaten_by(front_values=self.objective_values(stats=self.stats),
+                                    values=self.objective_values(stats=stats))
+            keep_idx = np.flatnonzero(~beaten)
+            stats = {stat: np.concatenate([self.stats[stat], np.asarray(stats[stat])[keep_idx]])
+                     for stat in self.STATS}
+            seqs = np.concatenate([self.seqs, np.asarray(seqs)[keep_idx]])
+            masks = np.concatenate([self.masks, np.asarray(masks)[keep_idx]])
+        keep_idx = self.non_dominated(values=self.objective_values(stats=stats), seqs=seqs)
+        self.stats = {stat: np.asarray(stats[stat])[keep_idx] for stat in self.STATS}
+        self.seqs = np.asarray(seqs)[keep_idx]
+        self.masks = np.asarray(masks)[keep_idx]
+        return self
+
+    def merge(self, other: 'ParetoFront') -> 'ParetoFront':
+        """
+        :param other: Front of other batches. Ex: Built in a Process Pool worker
+        :return: self, so it can be chained
+        """
+        seen = self.candidates_seen + other.candidates_seen
+        self.add(stats=other.stats, seqs=other.seqs, masks=other.masks)
+        self.candidates_seen = seen
+        return self
+
+    @classmethod
+    def objective_values(cls, stats: dict[str, np.ndarray]) -> np.ndarray:
+        """:return: (portfolios x objectives) values where higher is always better"""
+        return np.column_stack([np.asarray(stats[stat], dtype=np.float64) * sign
+                                for stat, sign in cls.OBJECTIVES.items()])
+
+    @classmethod
+    def beaten_by(cls, front_values: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """
+        :param front_values: (front x objectives) values where higher is always better
+        :param values: (portfolios x objectives) values to check
+        :return: (portfolios,) True where a front Portfolio is at least as good on every objective
+        """
+        beaten = np.zeros(len(values), dtype=bool)
+        if len(front_values) == 0:
+            return beaten
+        for start in range(0, len(values), cls.BLOCK_SIZE):
+            block = values[start:start + cls.BLOCK_SIZE]
+            # 1 (block x front) comparison per objective is much faster than 1 (block x front x objectives) array
+            at_least = block[:, None, 0] <= front_values[None, :, 0]
+            for col in range(1, values.shape[1]):
+                at_least &= block[:, None, col] <= front_values[None, :, col]
+            beaten[start:start + cls.BLOCK_SIZE] = at_least.any(axis=1)
+        return beaten
+
+    @classmethod
+    def non_dominated(cls, values: np.ndarray, seqs: np.ndarray) -> np.ndarray:
+        """
+        :param values: (portfolios x objectives) values where higher is always better
+        :param seqs: Enumeration order of each Portfolio, to break exact ties
+        :return: Positions of the Portfolios no other Portfolio is at least as good as on every objective, in order
+        """
+        # Best 1st on each objective in turn, then enumeration order. No Portfolio can beat 1 sorted before it
+        order = np.lexsort((seqs,) + tuple(-values[:, col] for col in reversed(range(values.shape[1]))))
+        sorted_values = values[order]
+        front_values = np.zeros((0, values.shape[1]))
+        keep = []
+        for block_start in range(0, len(order), cls.BLOCK_SIZE):
+            block = sorted_values[block_start:block_start + cls.BLOCK_SIZE]
+            # Beaten by the front so far
+            survivors = np.flatnonzero(~cls.beaten_by(front_values=front_values, values=block))
+            # Then by an earlier survivor in the block. Any other earlier Portfolio that beats it is beaten by the front
+            candidates = block[survivors]
+            block_beats = np.tril(np.ones((len(candidates), len(candidates)), dtype=bool), k=-1)
+            for col in range(values.shape[1]):
+                block_beats &= candidates[:, None, col] <= candidates[None, :, col]
+            survivors = survivors[~block_beats.any(axis=1)]
+            front_values = np.concatenate([front_values, block[survivors]])
+            keep.append(block_start + survivors)
+        keep_idx = order[np.concatenate(keep)] if keep else np.zeros(0, dtype=np.int64)
+        return np.sort(keep_idx)
+
+    def to_records(self, strat_names: list) -> list[dict]:
+        """
+        :param strat_names: Strategy Names in mask column order
+        :return: A list of {'strategies': [Strategy Names], stat: value} for each Portfolio, highest Net Profit 1st
+        """
+        order = np.lexsort((self.seqs, -self.stats['net_profit'])) if len(self) > 0 else []
+        return [{'strategies': [name for name, sel in zip(strat_names, self.masks[idx]) if sel],
+                 **{stat: round(float(self.stats[stat][idx]), 4) for stat in self.STATS}}
+                for idx in order]
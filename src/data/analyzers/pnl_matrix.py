@@ -0,0 +1,162 @@
+from itertools import combinations, islice
+from math import comb
+import numpy as np
+import pandas as pd
+
+from src.data.analyzers.opt_constraints import OptConstraints
+from src.data.analyzers.strat_statistics import StratStatistics
+from src.data.analyzers.StrategyStats import StrategyStats
+
+
+class PnlMatrix:
+    """
+    Daily PnL of many Strategies aligned on 1 shared calendar, with prefix sums, so any Portfolio of the Strategies over
+    any range of days can be scored with array math instead of building a PortfolioCalculator for each combination
+    self.pnl = (days x strategies) Daily PnL. 0 on days a Strategy didn't trade
+    self.active = (days x strategies) True on days a Strategy had trades
+    self.prefix_pnl = (days + 1 x strategies) Cumulative PnL with a leading row of 0's. prefix_pnl[b] - prefix_pnl[a] is
+    the PnL of days [a, b)
+    """
+
+    # Amount of Portfolios scored at once. Keeps memory at roughly days * BATCH_SIZE * 8 bytes per batch
+    BATCH_SIZE: int = 2048
+
+    def __init__(self, strat_stats: list[StrategyStats]):
+        """
+        :param strat_stats: A list of up to date StrategyStats objects. Ex: [AnalyzeDataTrades.get_strat_stats(name)]
+        """
+        self.strat_names: list = [strat_ss.name for strat_ss in strat_stats]
+        daily_pnl = pd.concat(objs=[strat_ss.strats_df['Profit'].rename(strat_ss.name) for strat_ss in strat_stats
+                                    if strat_ss.trade_count > 0], axis=1) if strat_stats else pd.DataFrame()
+        daily_pnl = daily_pnl.reindex(columns=self.strat_names).sort_index(ascending=True)
+        self.dates: pd.DatetimeIndex = pd.DatetimeIndex(daily_pnl.index)
+        self.active: np.ndarray = daily_pnl.notna().to_numpy()
+        self.pnl: np.ndarray = daily_pnl.fillna(0.0).to_numpy(dtype=np.float64)
+        self.prefix_pnl: np.ndarray = np.vstack([np.zeros((1, len(self.strat_names))), self.pnl.cumsum(axis=0)])
+        # {'Instrument': [Instruments of each Strategy]} in strat_names order. Used by OptConstraints group caps
+        self.strat_groups: dict[str, list[tuple]] = {col: [strat_ss.groups[col] for strat_ss in strat_stats]
+                                                     for col in OptConstraints.GROUP_COLS}
+
+    def date_rows(self, start_date: str = None, end_date: str = None) -> slice:
+        """
+        :param start_date: [Optional] Starting date. Default: ALL Dates. Ex: 2024-01-01
+        :param end_date: [Optional] End Date, inclusive like DataFrame.loc. Default: ALL Dates. Ex: 2024-12-31
+        :return: A slice of the rows for the dates. Same selection as strats_df.loc[start_date:end_date]
+        """
+        start = 0 if start_date is None else int(self.dates.searchsorted(pd.to_datetime(start_date), side='left'))
+        end = len(self.dates) if end_date is None else int(self.dates.searchsorted(pd.to_datetime(end_date), side='right'))
+        return slice(start, max(start, end))
+
+    def strat_idx(self, strat_names: list) -> np.ndarray:
+        """:return: Column numbers of the Strategy Names"""
+        return np.array([self.strat_names.index(strat_name) for strat_name in strat_names], dtype=np.intp)
+
+    def to_mask(self, strat_names: list) -> np.ndarray:
+        """:return: A (1 x strategies) membership mask for 1 Portfolio of Strategy Names. Used by evaluate()"""
+        mask = np.zeros((1, len(self.strat_names)), dtype=bool)
+        mask[0, self.strat_idx(strat_names)] = True
+        return mask
+
+    def iter_combination_masks(self, sizes: range = None, batch_size: int = BATCH_SIZE,
+                               constraints: OptConstraints = None):
+        """
+        Generate every combination of Strategies as membership masks in the same order as itertools.combinations
+        :param sizes: [Optional] Portfolio sizes to generate. Default: 1 to ALL Strategies
+        :param batch_size: [Optional] Max amount of combinations per mask
+        :param constraints: [Optional] Only generate the combinations that meet these limits. Ignores sizes
+        :return: Generator of (combinations x strategies) boolean masks
+        """
+        n_strats = len(self.strat_names)
+        if constraints is not None and not constraints.is_unconstrained():
+            yield from self._iter_constrained_masks(constraints=constraints, batch_size=batch_size)
+            return
+        sizes = range(1, n_strats + 1) if sizes is None else sizes
+        for size in sizes:
+            if size < 1 or size > n_strats:
+                continue
+            comb_iter = combinations(range(n_strats), size)
+            remaining = comb(n_strats, size)
+            while remaining > 0:
+                count = min(batch_size, remaining)
+                flat_idx = np.fromiter((idx for _, comb_idx in zip(range(count), comb_iter) for idx in comb_idx),
+                                       dtype=np.intp, count=count * size)
+                masks = np.zeros((count, n_strats), dtype=bool)
+                masks[np.repeat(np.arange(count), size), flat_idx] = True
+                remaining -= count
+                yield masks
+
+    def _iter_constrained_masks(self, constraints: OptConstraints, batch_size: int = BATCH_SIZE):
+        """
+        :param constraints: Only generate the combinations that meet these limits
+        :param batch_size: [Optional] Max amount of combinations per mask
+        :return: Generator of (combinations x strategies) boolean masks
+        """
+        comb_iter = constraints.iter_combinations(strat_names=self.strat_names, strat_groups=self.strat_groups)
+        while True:
+            batch = list(islice(comb_iter, batch_size))
+            if len(batch) == 0:
+                return
+            masks = np.zeros((len(batch), len(self.strat_names)), dtype=bool)
+            rows = np.repeat(np.arange(len(batch)), [len(comb_idx) for comb_idx in batch])
+            masks[rows, np.fromiter((idx for comb_idx in batch for idx in comb_idx), dtype=np.intp, count=len(rows))] = True
+            yield masks
+
+    def portfolio_daily_pnl(self, mask: np.ndarray, rows: slice = slice(None)) -> pd.Series:
+        """
+        :param mask: A (strategies,) or (1 x strategies) membership mask
+        :param rows: [Optional] Rows(days) to select. Default: ALL
+        :return: The Portfolio's Daily PnL for only the days any of its Strategies traded. Same as PortfolioCalculator
+        """
+        mask = np.asarray(mask, dtype=bool).reshape(-1)
+        active_days = self.active[rows][:, mask].any(axis=1)
+        daily_pnl = self.pnl[rows][:, mask].sum(axis=1)
+        return pd.Series(data=daily_pnl[active_days], index=self.dates[rows][active_days], name='Profit')
+
+    def rolling_metrics(self, window: int) -> dict[str, pd.DataFrame]:
+        """
+        Rolling Metrics of every Strategy at once in linear time. Windows count days on the shared calendar
+        :param window: Window size in trading days. Ex: StratStatistics.ROLLING_WINDOWS
+        :return: A dict of (dates x strategy names) Dataframes keyed by StratStatistics.ROLLING_METRICS
+        """
+        metrics = StratStatistics.calc_rolling_metrics(daily_pnl=self.pnl, window=window, active=self.active)
+        return {metric: pd.DataFrame(data=values, index=self.dates, columns=self.strat_names)
+                for metric, values in metrics.items()}
+
+    def evaluate(self, masks: np.ndarray, rows: slice = slice(None),
+                 req_cap_mult: float = StratStatistics.REQ_CAP_MAX_DD_MULT) -> dict[str, np.ndarray]:
+        """
+        Score many Portfolios at once over the same rows(days). Gives the same values as PortfolioCalculator
+        :param masks: A (portfolios x strategies) boolean membership mask. Ex: from iter_combination_masks()
+        :param rows: [Optional] A slice of rows(days) to score. Ex: from date_rows(). Default: ALL
+        :param req_cap_mult: [Optional] Capital Required by Max DrawDown Multiplier
+        :return: A dict of arrays, 1 value per Portfolio, keyed by StratStatistics field names: 'net_profit',
+        'max_drawdown', 'return_to_dd', 'req_cap_daytrade', 'daily_win_rate'
+        """
+        start, end, _ = rows.indices(len(self.dates))
+        weights = np.asarray(masks, dtype=np.float64)
+        n_ports = len(weights)
+        if end <= start or n_ports == 0:
+            zeros = np.zeros(n_ports)
+            return {'net_profit': zeros, 'max_drawdown': zeros.copy(), 'return_to_dd': zeros.copy(),
+                    'req_cap_daytrade': zeros.copy(), 'daily_win_rate': zeros.copy()}
+        # (days x portfolios) Cumulative PnL for the window, straight from the shared prefix sums
+        cum_net_profit = (self.prefix_pnl[start + 1:end + 1] - self.prefix_pnl[start]) @ weights.T
+        active_days = (self.active[start:end].astype(np.float64) @ weights.T) > 0
+        # Days before a Portfolio's 1st trade aren't part of its Dataframe, so they can't be a running max peak
+        before_first = np.logical_not(np.logical_or.accumulate(active_days, axis=0))
+        running_max = np.maximum.accumulate(np.where(before_first, -np.inf, cum_net_profit), axis=0)
+        drawdown = np.where(before_first, 0.0, cum_net_profit - running_max)
+        max_drawdown = np.round(drawdown.min(axis=0), 2)
+        net_profit = np.round(cum_net_profit[-1], 2)
+        min_cum_net_profit = np.where(before_first, np.inf, cum_net_profit).min(axis=0)
+        min_cum_net_profit = np.where(np.isinf(min_cum_net_profit), 0.0, min_cum_net_profit)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return_to_dd = np.where(max_drawdown != 0, np.round(np.abs(net_profit / max_drawdown), 2), 0.0)
+        daily_pnl = self.pnl[start:end] @ weights.T
+        days_traded = active_days.sum(axis=0)
+        win_days = np.logical_and(daily_pnl > 0, active_days).sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            daily_win_rate = np.where(days_traded > 0, win_days / days_traded * 100, 0.0)
+        return {'net_profit': net_profit, 'max_drawdown': max_drawdown, 'return_to_dd': return_to_dd,
+                'req_cap_daytrade': np.abs(max_drawdown * req_cap_mult) - min_cum_net_profit,
+                'daily_win_rate': daily_win_rate}
@@ -1,5 +1,5 @@
 import time
-from copy import deepcopy
+from copy import copy, deepcopy
 import pandas as pd
 
 from src.conf_setup import logger
@@ -10,16 +10,21 @@ from src.data.analyzers.StrategyStats import StrategyStats
 class PortfolioCalculator(StratStatistics):
     """Class for Portfolio Calculater Page"""
 
-    def __init__(self, sel_strats_ss: list[StrategyStats], start_date: str = None, end_date: str = None):
+    def __init__(self, sel_strats_ss: list[StrategyStats], start_date: str = None, end_date: str = None,
+                 weights: dict[str, float] = None):
         """
         Usage: PortfolioCalculator(sel_strats_ss=[StrategyStats_obj1, StrategyStats_obj2, StrategyStats_obj3])
         :param sel_strats_ss: A list of StrategyStats objects to calculate in our Portfolio
         :param start_date: Set Start Date for Strategy Results
         :param end_date: Set End Date for Strategy Results
+        :param weights: [Optional] Contract multiplier of each Strategy {'strat_name': 2}. Missing = 1, 0 = left out
         """
         self.sel_strats_ss = sel_strats_ss
         self.strat_names: list = []
+        self.weights: dict[str, float] | None = weights
         super().__init__(start_date=start_date, end_date=end_date)
+        if self.weights:
+            self._apply_weights()
         # Only do Calculations if we have more than 1 strategy selected. Otherwise, return 0's for empty Strategy List
         if len(self.sel_strats_ss) > 0:
             start_time = time.time()
@@ -45,6 +50,24 @@ class PortfolioCalculator(StratStatistics):
         daily_pnl: pd.Series = tmp_combined_df.groupby(by=[SchemaDT.DT_INDEX_NAME])['Profit'].sum()
         self.create_daily_strats_df(daily_pnl=daily_pnl)
 
+    def _apply_weights(self):
+        """Scale each Strategy's Daily PnL & Trades by its weight. Copies are scaled, the cached StrategyStats aren't"""
+        tmp_sel_strats_ss = []
+        for strat_ss in self.sel_strats_ss:
+            weight = self.weights.get(strat_ss.name, 1.0)
+            if weight == 0:
+                continue
+            if weight != 1:
+                # Shallow copy is enough, every scaled Dataframe is a new object
+                weighted_ss = copy(strat_ss)
+                weighted_ss.trades_df = strat_ss.trades_df.assign(Profit=strat_ss.trades_df['Profit'] * weight,
+                                                                  MAE=strat_ss.trades_df['MAE'] * weight)
+                weighted_ss.create_daily_strats_df(daily_pnl=strat_ss.strats_df['Profit'] * weight)
+                weighted_ss.update_stats()
+                strat_ss = weighted_ss
+            tmp_sel_strats_ss.append(strat_ss)
+        self.sel_strats_ss = tmp_sel_strats_ss
+
     def _update_strat_df_dates(self):
         """Update Individual StrategyStats Objects to Selected Dates & Create a Copy of them if there's a start_date"""
         # Loop through and only get Start & End Dates from Dataframe
@@ -62,6 +85,10 @@ class PortfolioCalculator(StratStatistics):
             tmp_sel_strats_ss.append(copied_strat_ss)
         self.sel_strats_ss = tmp_sel_strats_ss
 
+    def _get_trade_runs(self) -> list[pd.DataFrame]:
+        """:return: Every selected Strategy's Trades in the selected dates, 1 run per Strategy, ready to be merged"""
+        return [trades_df for strat_ss in self.sel_strats_ss for trades_df in strat_ss._get_trade_runs()]
+
     @property
     def combined_strats_df(self) -> pd.DataFrame:
         """:return: A combined strategy Pandas Dataframe from self.strats_df"""
@@ -0,0 +1,183 @@
+import time
+from collections import deque
+import numpy as np
+
+from src.conf_setup import logger
+from src.data.analyzers.opt_constraints import OptConstraints
+from src.data.analyzers.pareto_front import ParetoFront
+from src.data.analyzers.pnl_matrix import PnlMatrix
+from src.data.analyzers.strat_statistics import StratStatistics
+
+# Each Process Pool worker gets its own copy of the PnlMatrix once, instead of with every batch
+_worker_pnl_matrix: PnlMatrix | None = None
+
+
+def _init_worker(pnl_matrix: PnlMatrix):
+    global _worker_pnl_matrix
+    _worker_pnl_matrix = pnl_matrix
+
+
+def _score_batch(masks: np.ndarray, seq_start: int, rows: slice, account_size: float, top_ct: int,
+                 req_cap_mult: float, pnl_matrix: PnlMatrix = None) -> tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    Score 1 batch of Portfolios & keep only its top_ct. Module level, so it can be pickled to a Process Pool
+    :param masks: (portfolios x strategies) membership masks
+    :param seq_start: Enumeration order of the 1st Portfolio in the batch. Used to break ties the same way every run
+    :param rows: Rows(days) to score
+    :param account_size: Only keep Portfolios that fit this Account Size. 0 = disabled
+    :param top_ct: Amount of Portfolios to keep
+    :param req_cap_mult: Capital Required by Max DrawDown Multiplier
+    :param pnl_matrix: [Optional] PnlMatrix to score on. Default: The Process Pool worker's PnlMatrix
+    :return: Tuple of (top Return to Drawdown scores, their enumeration order, their masks, Portfolios that didn't fit
+    the Account Size)
+    """
+    pnl_matrix = pnl_matrix or _worker_pnl_matrix
+    stats = pnl_matrix.evaluate(masks=masks, rows=rows, req_cap_mult=req_cap_mult)
+    fits_account = np.ones(len(masks), dtype=bool) if account_size == 0.0 else account_size >= stats['req_cap_daytrade']
+    eligible_idx = np.flatnonzero(fits_account)
+    # Stable sort on the negative score keeps enumeration order for ties
+    top_idx = eligible_idx[np.argsort(-stats['return_to_dd'][eligible_idx], kind='stable')[:top_ct]]
+    return stats['return_to_dd'][top_idx], seq_start + top_idx, masks[top_idx], int(len(masks) - len(eligible_idx))
+
+
+def _pareto_batch(masks: np.ndarray, seq_start: int, rows: slice, account_size: float, req_cap_mult: float,
+                  pnl_matrix: PnlMatrix = None) -> ParetoFront:
+    """
+    Score 1 batch of Portfolios & keep only its Pareto front. Module level, so it can be pickled to a Process Pool
+    :param masks: (portfolios x strategies) membership masks
+    :param seq_start: Enumeration order of the 1st Portfolio in the batch. Used to break ties the same way every run
+    :param rows: Rows(days) to score
+    :param account_size: Only keep Portfolios that fit this Account Size. 0 = disabled
+    :param req_cap_mult: Capital Required by Max DrawDown Multiplier
+    :param pnl_matrix: [Optional] PnlMatrix to score on. Default: The Process Pool worker's PnlMatrix
+    :return: The batch's ParetoFront. candidates_seen counts the whole batch
+    """
+    pnl_matrix = pnl_matrix or _worker_pnl_matrix
+    stats = pnl_matrix.evaluate(masks=masks, rows=rows, req_cap_mult=req_cap_mult)
+    fits_account = np.ones(len(masks), dtype=bool) if account_size == 0.0 else account_size >= stats['req_cap_daytrade']
+    eligible_idx = np.flatnonzero(fits_account)
+    front = ParetoFront(n_strats=masks.shape[1])
+    front.add(stats={stat: values[eligible_idx] for stat, values in stats.items()}, seqs=seq_start + eligible_idx,
+              masks=masks[eligible_idx])
+    front.candidates_seen = len(masks)
+    return front
+
+
+class PortfolioOptimizer:
+    """
+    Search every combination of Strategies in a PnlMatrix for the best Return to Drawdown Portfolios. With
+    OptConstraints only the combinations that meet them are generated & scored
+    """
+
+    # Batches waiting on or being scored by each Process Pool worker. Only these batches' masks are ever held at once
+    BATCHES_PER_WORKER: int = 2
+
+    def __init__(self, pnl_matrix: PnlMatrix, account_size: float = 0.0, start_date: str = None, end_date: str = None,
+                 top_ct: int = 5, workers: int = 0, constraints: OptConstraints = None):
+        """
+        :param pnl_matrix: Aligned Daily PnL of the Strategies to choose from
+        :param account_size: [Optional] Only keep Portfolios that fit this Account Size. Default = 0(disabled)
+        :param start_date: [Optional] Starting date to select from dataframe. Default: ALL Dates
+        :param end_date: [Optional] End Date to select from dataframe. Default: ALL Dates
+        :param top_ct: [Optional] Number of top best Portfolios to return
+        :param workers: [Optional] Amount of Processes to score batches in. 0 or 1 = run in this process
+        :param constraints: [Optional] Only build Portfolios that meet these limits. Default: Every combination
+        """
+        self.pnl_matrix = pnl_matrix
+        self.account_size = 0.0 if account_size is None else account_size
+        self.rows = pnl_matrix.date_rows(start_date=start_date, end_date=end_date)
+        self.top_ct = top_ct
+        self.workers = workers
+        self.constraints = constraints
+        self.portfolios_scored: int = 0
+
+    def run(self) -> list[list[str]]:
+        """
+        Score every combination & keep the best. Ties go to the 1st Portfolio enumerated, smallest Portfolios 1st
+        :return: A list of the top Portfolios as lists of Strategy Names, best 1st
+        """
+        start_time = time.time()
+        top = None
+        too_big_ct = 0
+        # Only the running top_ct is kept, so memory doesn't grow with the amount of combinations
+        for result in self._iter_results(_score_batch, self.rows, self.account_size, self.top_ct,
+                                         StratStatistics.REQ_CAP_MAX_DD_MULT):
+            top = self._merge_top(top=top, result=result)
+            too_big_ct += result[3]
+        top_portfolios = [] if top is None else [[name for name, sel in zip(self.pnl_matrix.strat_names, mask) if sel]
+                                                 for mask in top[2]]
+        if too_big_ct > 0:
+            logger.info(f"{too_big_ct} of {self.portfolios_scored} Optimized Portfolios didn't meet our minimum account "
+                        f"Size of ${self.account_size:,.2f}")
+        n_strats = len(self.pnl_matrix.strat_names)
+        if self.constraints is not None and not self.constraints.is_unconstrained():
+            logger.info(f"Optimizer: {self.constraints} left {self.portfolios_scored} of "
+                        f"{OptConstraints.count_possible(n_strats=n_strats)} possible Portfolios")
+        logger.info(f"Optimizer: Scored {self.portfolios_scored} Portfolios of {n_strats} "
+                    f"Strategies in {round(time.time() - start_time, 4)} Seconds")
+        return top_portfolios
+
+    def run_pareto(self) -> list[dict]:
+        """
+        Score every combination & keep the Pareto front of Net Profit, Max Drawdown, Capital Required & Daily Win Rate,
+        instead of ranking them all by Return to Drawdown
+        :return: A list of {'strategies': [Strategy Names], stat: value} for each Portfolio on the front
+        """
+        start_time = time.time()
+        front = ParetoFront(n_strats=len(self.pnl_matrix.strat_names))
+        # Same batches as run(), without top_ct. Each batch's front is merged as it arrives, so only the front is kept
+        for batch_front in self._iter_results(_pareto_batch, self.rows, self.account_size,
+                                              StratStatistics.REQ_CAP_MAX_DD_MULT):
+            front.merge(other=batch_front)
+        logger.info(f"Optimizer: {len(front)} of {self.portfolios_scored} Portfolios of "
+                    f"{len(self.pnl_matrix.strat_names)} Strategies are on the Pareto front. Took "
+                    f"{round(time.time() - start_time, 4)} Seconds")
+        return front.to_records(strat_names=self.pnl_matrix.strat_names)
+
+    def _iter_batches(self):
+        """
+        Generate each batch of combinations only when it's about to be scored. Counts portfolios_scored as it goes
+        :return: Generator of (masks, enumeration order of the batch's 1st Portfolio)
+        """
+        self.portfolios_scored = 0
+        for masks in self.pnl_matrix.iter_combination_masks(constraints=self.constraints):
+            seq_start = self.portfolios_scored
+            self.portfolios_scored += len(masks)
+            yield masks, seq_start
+
+    def _iter_results(self, batch_func, *args):
+        """
+        Score every batch with batch_func(masks, seq_start, *args). A Process Pool only gets BATCHES_PER_WORKER batches
+        per worker ahead of the results being used, instead of every batch at once
+        :param batch_func: Module level batch function. Ex: _score_batch
+        :param args: batch_func's arguments after masks & seq_start
+        :return: Generator of batch_func results in enumeration order
+        """
+        if self.workers > 1:
+            # Only pay for multiprocessing's import when a pool is asked for
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(self.pnl_matrix,)) as executor:
+                in_flight = deque()
+                for masks, seq_start in self._iter_batches():
+                    in_flight.append(executor.submit(batch_func, masks, seq_start, *args))
+                    if len(in_flight) >= self.workers * self.BATCHES_PER_WORKER:
+                        yield in_flight.popleft().result()
+                while in_flight:
+                    yield in_flight.popleft().result()
+        else:
+            for masks, seq_start in self._iter_batches():
+                yield batch_func(masks, seq_start, *args, pnl_matrix=self.pnl_matrix)
+
+    def _merge_top(self, top: tuple | None, result: tuple) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        :param top: (scores, enumeration order, masks) of the top Portfolios so far. None = No batches yet
+        :param result: 1 batch's _score_batch() result
+        :return: (scores, enumeration order, masks) of the top_ct Portfolios of both, best 1st
+        """
+        if top is not None:
+            result = tuple(np.concatenate([top_values, result_values]) for top_values, result_values in zip(top, result))
+        scores, seqs, masks = result[:3]
+        # Highest score 1st, then enumeration order for ties
+        top_idx = np.lexsort((seqs, -scores))[:self.top_ct]
+        return scores[top_idx], seqs[top_idx], masks[top_idx]
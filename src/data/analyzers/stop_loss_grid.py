@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+
+class StopLossGrid:
+    """
+    What-if results of turning a Strategy off the 1st day its Drawdown from peak reaches a Stop Loss, for many Stop Loss
+    levels at once. The running minimum of the Drawdown only ever gets worse, so the day each level is breached is a
+    binary search into it. Precomputed once per Daily PnL, then any amount of levels costs O(levels * log(days)), which
+    is fast enough to run on every move of a slider.
+    """
+
+    # Amount of levels in the default grid
+    LEVELS: int = 50
+    # Default grid spans these multiples of the historical Max Drawdown
+    MIN_DD_MULT: float = 0.25
+    MAX_DD_MULT: float = 2.0
+    COLUMNS: list = ['Stop Loss', 'Net Profit', 'Max Drawdown', 'Breached', 'Breach Date', 'Trading Days to Breach']
+
+    def __init__(self, daily_pnl: pd.Series):
+        """
+        :param daily_pnl: Daily PnL with a DatetimeIndex. Ex: StratStatistics.strats_df['Profit']
+        """
+        self.dates: pd.DatetimeIndex = pd.DatetimeIndex(daily_pnl.index)
+        self.cum_net_profit: np.ndarray = daily_pnl.to_numpy(dtype=np.float64).cumsum()
+        drawdown = self.cum_net_profit - np.maximum.accumulate(self.cum_net_profit) if len(daily_pnl) > 0 else np.zeros(0)
+        # Worst Drawdown so far as a positive amount. Never decreases, so it can be binary searched
+        self.worst_drawdown: np.ndarray = -np.minimum.accumulate(drawdown) if len(drawdown) > 0 else np.zeros(0)
+        self.max_drawdown: float = float(self.worst_drawdown[-1]) if len(self.worst_drawdown) > 0 else 0.0
+
+    def default_levels(self, levels: int = LEVELS) -> np.ndarray:
+        """
+        :param levels: [Optional] Amount of levels
+        :return: Stop Loss levels as negative amounts like LiveSettings' STOP_LOSS, around the historical Max Drawdown
+        """
+        if self.max_drawdown == 0:
+            return np.zeros(0)
+        return -np.linspace(self.max_drawdown * self.MIN_DD_MULT, self.max_drawdown * self.MAX_DD_MULT, levels).round(2)
+
+    def evaluate(self, stop_losses: np.ndarray | list | float) -> pd.DataFrame:
+        """
+        :param stop_losses: Stop Loss levels. The sign is ignored. Ex: [-2500, -5000]
+        :return: A Dataframe with 1 row per level & COLUMNS. Net Profit & Max Drawdown are up to & including the day
+        the Strategy was turned off, or all of history if it never was
+        """
+        stop_losses = np.atleast_1d(np.asarray(stop_losses, dtype=np.float64))
+        n_days = len(self.cum_net_profit)
+        if n_days == 0:
+            return pd.DataFrame(data={'Stop Loss': stop_losses}, columns=self.COLUMNS)
+        # 1st day the worst Drawdown reaches each level. n_days = never
+        breach_idx = np.searchsorted(self.worst_drawdown, np.abs(stop_losses), side='left')
+        breached = breach_idx < n_days
+        last_idx = np.minimum(breach_idx, n_days - 1)
+        return pd.DataFrame(data={
+            'Stop Loss': -np.abs(stop_losses),
+            'Net Profit': self.cum_net_profit[last_idx].round(2),
+            'Max Drawdown': -self.worst_drawdown[last_idx].round(2),
+            'Breached': breached,
+            'Breach Date': pd.Series(self.dates[last_idx]).where(breached).to_numpy(),
+            'Trading Days to Breach': np.where(breached, breach_idx + 1, np.nan),
+        }, columns=self.COLUMNS)
@@ -1,5 +1,9 @@
+import numpy as np
 import pandas as pd
 
+from src.data.analyzers.intraday_equity import IntradayEquity
+from src.data.analyzers.monte_carlo import MonteCarloSim
+from src.data.analyzers.stop_loss_grid import StopLossGrid
 from src.data.types.schema_data_trades import SchemaDT
 
 
@@ -8,6 +12,10 @@ class StratStatistics:
 
     # Capital Required by Max DrawDown Multiplier
     REQ_CAP_MAX_DD_MULT: float = 2
+    # Rolling Window sizes in trading days for spotting Strategy decay
+    ROLLING_WINDOWS: tuple = (30, 90, 250)
+    # Rolling Metric names returned by calc_rolling_metrics()
+    ROLLING_METRICS: tuple = ('net_profit', 'max_drawdown', 'return_to_dd', 'daily_win_rate')
 
     def __init__(self, start_date: str = None, end_date: str = None):
         """
@@ -25,6 +33,12 @@ class StratStatistics:
         self.return_to_dd: float = 0.0
         self.req_cap_daytrade: float = 0.0
         self.daily_win_rate: float = 0.0
+        # Should only be accessed through get_monte_carlo method
+        self._monte_carlo: MonteCarloSim | None = None
+        # Should only be accessed through get_intraday method
+        self._intraday: IntradayEquity | None = None
+        # Should only be accessed through get_stop_loss_grid method
+        self._stop_loss_grid: StopLossGrid | None = None
         # largest_losing_day: datetime = None
         # largest_losing_day_cap: float = 0.0
         # largest_winning_day: datetime = None
@@ -41,6 +55,126 @@ class StratStatistics:
         self.df_start_date = self.strats_df.index.min()
         self.df_end_date = self.strats_df.index.max()
         self.trade_count = len(self.strats_df)
+        # Daily PnL changed, so any previous Monte Carlo, Intraday & Stop Loss results are stale
+        self._monte_carlo = None
+        self._intraday = None
+        self._stop_loss_grid = None
+
+    def get_monte_carlo(self, paths: int = MonteCarloSim.PATHS, block_size: int = MonteCarloSim.BLOCK_SIZE,
+                        seed: int = MonteCarloSim.SEED, workers: int = 0) -> MonteCarloSim:
+        """
+        Monte Carlo Max Drawdown & Required Capital percentiles from resampling the Daily PnL. Only ran on request &
+        cached until the Daily PnL changes, so building Portfolios in the Optimizer doesn't pay for it
+        :param paths: [Optional] Amount of Equity Curves to simulate
+        :param block_size: [Optional] Size of resampled day blocks. 1 = Plain Bootstrap
+        :param seed: [Optional] Random Seed for reproducible results
+        :param workers: [Optional] Amount of Processes to simulate in. 0 = run in this process
+        :return: A MonteCarloSim object with max_dd_pcts & req_cap_pcts filled in
+        """
+        mc_sim = self._monte_carlo
+        if mc_sim is None or (mc_sim.paths, mc_sim.block_size, mc_sim.seed) != (paths, max(block_size, 1), seed):
+            daily_pnl = self.strats_df['Profit'].to_numpy() if self.trade_count > 0 else []
+            mc_sim = MonteCarloSim(daily_pnl=daily_pnl, req_cap_mult=self.REQ_CAP_MAX_DD_MULT, paths=paths,
+                                   block_size=block_size, seed=seed, workers=workers).run()
+            self._monte_carlo = mc_sim
+        return mc_sim
+
+    def get_intraday(self, use_mae: bool = True) -> IntradayEquity:
+        """
+        Trade resolution Max Drawdown & Required Capital over the same dates as the Daily Statistics. Only ran on request
+        & cached until the Daily PnL changes
+        :param use_mae: [Optional] Count each open Trade's MAE against equity for the worst case. Default: True
+        :return: An IntradayEquity object with max_drawdown & req_cap_daytrade filled in
+        """
+        if self._intraday is None or self._intraday.use_mae != use_mae:
+            self._intraday = IntradayEquity(trade_runs=self._get_trade_runs(), req_cap_mult=self.REQ_CAP_MAX_DD_MULT,
+                                            use_mae=use_mae).run()
+        return self._intraday
+
+    def get_stop_loss_grid(self) -> StopLossGrid:
+        """
+        What-if results of Stop Loss levels over the Daily PnL. Only built on request & cached until the Daily PnL changes
+        :return: A StopLossGrid. Ex: get_stop_loss_grid().evaluate(stop_losses=[-2500, -5000])
+        """
+        if self._stop_loss_grid is None:
+            daily_pnl = self.strats_df['Profit'] if self.trade_count > 0 else pd.Series(dtype=np.float64)
+            self._stop_loss_grid = StopLossGrid(daily_pnl=daily_pnl)
+        return self._stop_loss_grid
+
+    def _get_trade_runs(self) -> list[pd.DataFrame]:
+        """:return: A list of Trades Dataframes with IntradayEquity.TRADE_COLS, 1 per Strategy, in the selected dates"""
+        return []
+
+    def get_rolling_metrics(self, windows: tuple = ROLLING_WINDOWS) -> pd.DataFrame:
+        """
+        Rolling Net Profit, Max Drawdown, Return to Drawdown & Daily Win Rate over the last [window] trading days
+        :param windows: [Optional] Window sizes in trading days. Default: ROLLING_WINDOWS
+        :return: A Dataframe with the same index as self.strats_df & columns like 'max_drawdown 30D'. NaN until a day
+        has a full window behind it
+        """
+        rolling_df = pd.DataFrame(index=self.strats_df.index if self.strats_df is not None else None)
+        if self.trade_count == 0:
+            return rolling_df
+        daily_pnl = self.strats_df['Profit'].to_numpy(dtype=np.float64).reshape(-1, 1)
+        for window in windows:
+            for metric, values in self.calc_rolling_metrics(daily_pnl=daily_pnl, window=window).items():
+                rolling_df[f'{metric} {window}D'] = values[:, 0]
+        return rolling_df
+
+    @staticmethod
+    def calc_rolling_metrics(daily_pnl: np.ndarray, window: int, active: np.ndarray = None) -> dict[str, np.ndarray]:
+        """
+        Rolling Metrics for many Strategies at once in linear time. Net Profit & Win Rate come from rolling sums. Max
+        Drawdown uses the van Herk/Gil-Werman block trick: every window spans at most 2 blocks of [window] days, so it's
+        the combination of 1 block's suffix & the next block's prefix running max/min/drawdown. Gives the same values as
+        _calculate_drawdown() over every [window] day slice of 'Cum. net profit'
+        :param daily_pnl: (days x strategies) Daily PnL. 0 on days a Strategy didn't trade
+        :param window: Window size in trading days(rows)
+        :param active: [Optional] (days x strategies) True on days a Strategy traded. Default: Every day
+        :return: A dict of (days x strategies) arrays keyed by ROLLING_METRICS. NaN for the 1st window - 1 days
+        """
+        n_days, n_strats = daily_pnl.shape
+        metrics = {metric: np.full((n_days, n_strats), np.nan) for metric in StratStatistics.ROLLING_METRICS}
+        if window < 1 or n_days < window:
+            return metrics
+        active = np.ones(daily_pnl.shape, dtype=bool) if active is None else active
+        zero_row = np.zeros((1, n_strats))
+        cum_net_profit = daily_pnl.cumsum(axis=0)
+        prefix_pnl = np.vstack([zero_row, cum_net_profit])
+        prefix_active = np.vstack([zero_row, active.cumsum(axis=0)])
+        prefix_wins = np.vstack([zero_row, np.logical_and(daily_pnl > 0, active).cumsum(axis=0)])
+        ends = np.arange(window - 1, n_days)
+        starts = ends - window + 1
+        net_profit = prefix_pnl[ends + 1] - prefix_pnl[starts]
+        days_traded = prefix_active[ends + 1] - prefix_active[starts]
+        win_days = prefix_wins[ends + 1] - prefix_wins[starts]
+        # Pad to whole blocks by repeating the last day. Padding is never inside a real window
+        n_blocks = -(-n_days // window)
+        padded = np.vstack([cum_net_profit, np.repeat(cum_net_profit[-1:], n_blocks * window - n_days, axis=0)])
+        blocks = padded.reshape(n_blocks, window, n_strats)
+        # Running max/min/drawdown from the start of each block forward
+        pre_max = np.maximum.accumulate(blocks, axis=1)
+        pre_min = np.minimum.accumulate(blocks, axis=1)
+        pre_dd = np.minimum.accumulate(blocks - pre_max, axis=1)
+        # Running max/min/drawdown from the end of each block backward
+        rev_blocks = blocks[:, ::-1]
+        suf_max = np.maximum.accumulate(rev_blocks, axis=1)
+        suf_min = np.minimum.accumulate(rev_blocks, axis=1)
+        suf_dd = np.minimum.accumulate(suf_min - rev_blocks, axis=1)[:, ::-1]
+        suf_max, suf_min = suf_max[:, ::-1], suf_min[:, ::-1]
+        pre_max, pre_min, pre_dd = (arr.reshape(-1, n_strats) for arr in (pre_max, pre_min, pre_dd))
+        suf_max, suf_dd = suf_max.reshape(-1, n_strats), suf_dd.reshape(-1, n_strats)
+        # Window starting on a block boundary is 1 whole block. Otherwise combine the suffix of the start's block with
+        # the prefix of the end's block, where the drop can also be from the suffix's max down to the prefix's min
+        spanning_dd = np.minimum(np.minimum(suf_dd[starts], pre_dd[ends]), pre_min[ends] - suf_max[starts])
+        max_drawdown = np.where((starts % window == 0)[:, None], pre_dd[ends], spanning_dd).round(2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return_to_dd = np.where(max_drawdown != 0, np.abs(net_profit / max_drawdown).round(2), 0.0)
+            daily_win_rate = np.where(days_traded > 0, win_days / days_traded * 100, 0.0)
+        for metric, values in (('net_profit', net_profit.round(2)), ('max_drawdown', max_drawdown),
+                               ('return_to_dd', return_to_dd), ('daily_win_rate', daily_win_rate)):
+            metrics[metric][ends] = values
+        return metrics
 
     @staticmethod
     def _calculate_drawdown(cum_net_profit: pd.Series):
@@ -0,0 +1,173 @@
+from math import comb, prod
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import fcluster, linkage
+from scipy.spatial.distance import squareform
+
+from src.conf_setup import logger
+from src.data.analyzers.opt_constraints import OptConstraints
+from src.data.analyzers.pnl_matrix import PnlMatrix
+
+
+class StrategyClusters:
+    """
+    Groups Strategies whose Daily PnL moves alike(Ex: Parameter variants on the same Instrument) with average linkage
+    hierarchical clustering on 1 - correlation. Used before Optimizing to keep only the best Strategy of each cluster
+    or to cap the picks per cluster, so the Optimizer doesn't spend its combinations on near duplicates
+    """
+
+    # 'best' = Only each cluster's representative is Optimized. 'cap' = At most max_per_cluster of each cluster
+    MODES: list = ['best', 'cap']
+    COLUMNS: list = ['Strategy', 'Cluster', 'Representative', 'Return/DD', 'Net Profit', 'Avg Cluster Corr']
+
+    def __init__(self, pnl_matrix: PnlMatrix, threshold: float = 0.7, start_date: str = None, end_date: str = None,
+                 overrides: dict[str, int] = None):
+        """
+        :param pnl_matrix: PnlMatrix of the Strategies to cluster
+        :param threshold: [Optional] Daily PnL correlation Strategies in a cluster have on average. Ex: 0.7
+        :param start_date: [Optional] Starting date of the Daily PnL used. Default: ALL Dates
+        :param end_date: [Optional] End Date of the Daily PnL used. Default: ALL Dates
+        :param overrides: [Optional] {'strat_name': cluster number} to use instead of the computed cluster
+        """
+        if not -1.0 <= threshold <= 1.0:
+            raise ValueError(f"Cluster correlation threshold: {threshold} must be between -1 & 1")
+        self.threshold = threshold
+        self.strat_names: list = list(pnl_matrix.strat_names)
+        rows = pnl_matrix.date_rows(start_date=start_date, end_date=end_date)
+        self.corr: np.ndarray = self.correlation(daily_pnl=pnl_matrix.pnl[rows])
+        labels = self.cluster(corr=self.corr, threshold=threshold)
+        overrides = overrides or {}
+        # {'strat_name': cluster number}
+        self.clusters: dict[str, int] = {strat_name: int(overrides.get(strat_name, labels[idx]))
+                                         for idx, strat_name in enumerate(self.strat_names)}
+        stats = pnl_matrix.evaluate(masks=np.eye(len(self.strat_names), dtype=bool), rows=rows)
+        self.return_to_dd: np.ndarray = stats['return_to_dd']
+        self.net_profit: np.ndarray = stats['net_profit']
+
+    @staticmethod
+    def correlation(daily_pnl: np.ndarray) -> np.ndarray:
+        """
+        :param daily_pnl: (days x strategies) Daily PnL. 0 on days a Strategy didn't trade
+        :return: (strategies x strategies) Pearson correlation. Strategies without any change correlate 0 with others
+        """
+        n_strats = daily_pnl.shape[1]
+        if len(daily_pnl) < 2:
+            return np.eye(n_strats)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = np.corrcoef(daily_pnl, rowvar=False).reshape(n_strats, n_strats)
+        corr = np.nan_to_num(corr, nan=0.0)
+        np.fill_diagonal(corr, 1.0)
+        return corr
+
+    @staticmethod
+    def cluster(corr: np.ndarray, threshold: float) -> np.ndarray:
+        """
+        :param corr: (strategies x strategies) correlation
+        :param threshold: Average correlation clusters are cut at
+        :return: Cluster number of each Strategy. Numbered 1, 2, ... in order of each cluster's 1st Strategy
+        """
+        n_strats = len(corr)
+        if n_strats < 2:
+            return np.ones(n_strats, dtype=int)
+        distance = np.clip(1.0 - corr, 0.0, 2.0)
+        labels = fcluster(linkage(squareform(distance, checks=False), method='average'), t=1.0 - threshold,
+                          criterion='distance')
+        # fcluster's numbers come from the tree, so number them by 1st appearance to keep them stable for the UI
+        _, first_idx, inverse = np.unique(labels, return_index=True, return_inverse=True)
+        order = np.argsort(np.argsort(first_idx))
+        return order[inverse] + 1
+
+    def get_members(self) -> dict[int, list]:
+        """:return: {cluster number: [Strategy Names]} in strat_names order"""
+        members = {}
+        for strat_name in self.strat_names:
+            members.setdefault(self.clusters[strat_name], []).append(strat_name)
+        return dict(sorted(members.items()))
+
+    def get_representatives(self, constraints: OptConstraints = None) -> list:
+        """
+        The Strategies that stay in 'best' mode. Required Strategies always stay & are their cluster's representative.
+        Otherwise the best Return/DD that isn't Excluded. Ties go to the higher Net Profit
+        :param constraints: [Optional] Required & Excluded Strategies to respect
+        :return: A list of Strategy Names in strat_names order
+        """
+        required = set(constraints.required) if constraints is not None else set()
+        excluded = set(constraints.excluded) if constraints is not None else set()
+        keep = set()
+        for members in self.get_members().values():
+            members_required = [strat_name for strat_name in members if strat_name in required]
+            if members_required:
+                keep.update(members_required)
+                continue
+            candidates = [self.strat_names.index(strat_name) for strat_name in members if strat_name not in excluded]
+            if candidates:
+                keep.add(self.strat_names[max(candidates, key=lambda idx: (self.return_to_dd[idx],
+                                                                           self.net_profit[idx]))])
+        return [strat_name for strat_name in self.strat_names if strat_name in keep]
+
+    def to_constraints(self, constraints: OptConstraints = None, mode: str = 'best',
+                       max_per_cluster: int = 1) -> OptConstraints:
+        """
+        :param constraints: [Optional] Limits to add the clusters to. Default: No other limits
+        :param mode: [Optional] 'best' = Exclude every Strategy but the representatives. 'cap' = Most Strategies from
+        the same cluster is max_per_cluster
+        :param max_per_cluster: [Optional] Cap for 'cap' mode. Default: 1
+        :return: New OptConstraints with the clusters applied
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Cluster mode: {mode} must be 1 of {self.MODES}")
+        constraints = constraints or OptConstraints()
+        excluded = list(constraints.excluded)
+        if mode == 'best':
+            representatives = set(self.get_representatives(constraints=constraints))
+            excluded += [strat_name for strat_name in self.strat_names if strat_name not in representatives]
+        clustered = OptConstraints(min_size=constraints.min_size, max_size=constraints.max_size,
+                                   max_per_instrument=constraints.group_caps.get('Instrument'),
+                                   max_per_account=constraints.group_caps.get('Account'),
+                                   required=constraints.required, excluded=excluded,
+                                   max_per_cluster=max_per_cluster if mode == 'cap' else None,
+                                   clusters=self.clusters if mode == 'cap' else None)
+        reduction = self.get_reduction(constraints=constraints, mode=mode, max_per_cluster=max_per_cluster)
+        logger.info(f"Strategy Clusters: {reduction['strategies']} Strategies in {reduction['clusters']} clusters. "
+                    f"'{mode}' mode left {reduction['after']} of {reduction['before']} possible Portfolios "
+                    f"({reduction['pct']}% fewer)")
+        return clustered
+
+    def get_reduction(self, constraints: OptConstraints = None, mode: str = 'best', max_per_cluster: int = 1) -> dict:
+        """
+        How much the clusters shrink the search. Counts every Portfolio size, before any other limit besides Excluded
+        :param constraints: [Optional] Required & Excluded Strategies to respect
+        :param mode: [Optional] 'best' or 'cap'. See to_constraints()
+        :param max_per_cluster: [Optional] Cap for 'cap' mode. Default: 1
+        :return: {'strategies': 10, 'clusters': 4, 'before': 1023, 'after': 15, 'pct': 98.53}
+        """
+        excluded = set(constraints.excluded) if constraints is not None else set()
+        candidates = [strat_name for strat_name in self.strat_names if strat_name not in excluded]
+        before = OptConstraints.count_possible(n_strats=len(candidates))
+        if mode == 'best':
+            after = OptConstraints.count_possible(n_strats=len(self.get_representatives(constraints=constraints)))
+        else:
+            cap = max(1, int(max_per_cluster or 1))
+            sizes = pd.Series([self.clusters[strat_name] for strat_name in candidates]).value_counts()
+            # Each cluster adds 0 to cap of its Strategies, minus the empty Portfolio
+            after = prod(sum(comb(int(size), pick) for pick in range(min(cap, size) + 1)) for size in sizes) - 1
+        return {'strategies': len(self.strat_names), 'clusters': len(self.get_members()), 'before': before,
+                'after': after, 'pct': round((1 - after / before) * 100, 2) if before else 0.0}
+
+    def get_table(self, constraints: OptConstraints = None) -> pd.DataFrame:
+        """
+        :param constraints: [Optional] Required & Excluded Strategies to respect when picking representatives
+        :return: A Dataframe with COLUMNS, 1 row per Strategy sorted by Cluster
+        """
+        representatives = set(self.get_representatives(constraints=constraints))
+        labels = np.array([self.clusters[strat_name] for strat_name in self.strat_names])
+        rows = []
+        for idx, strat_name in enumerate(self.strat_names):
+            others = (labels == labels[idx]) & (np.arange(len(labels)) != idx)
+            rows.append({'Strategy': strat_name, 'Cluster': int(labels[idx]),
+                         'Representative': strat_name in representatives,
+                         'Return/DD': float(self.return_to_dd[idx]), 'Net Profit': float(self.net_profit[idx]),
+                         'Avg Cluster Corr': round(float(self.corr[idx, others].mean()), 2) if others.any()
+                         else None})
+        return pd.DataFrame(data=rows, columns=self.COLUMNS).sort_values(by=['Cluster', 'Strategy'],
+                                                                          ignore_index=True)
@@ -0,0 +1,116 @@
+import threading
+import numpy as np
+import pandas as pd
+
+from src.data.types.trades_snapshot import TradesSnapshot
+
+
+class TradeAnalytics:
+    """
+    Trade level Statistics of every Strategy: Profit Factor, Average Win/Loss, Expectancy, Long vs Short, MAE/MFE
+    efficiency, Commission drag & Average Bars held. The Trades of every Strategy that changed are stacked into columns
+    & summed by Strategy in 1 grouped pass with np.bincount, instead of a Python loop per Strategy. Each Strategy's row
+    is cached by its data version, so only Strategies with new Trades are ever computed again.
+    """
+
+    COLUMNS: list = ['Strategy', 'Trades', 'Net Profit', 'Gross Profit', 'Gross Loss', 'Profit Factor', 'Win Rate',
+                     'Avg Win', 'Avg Loss', 'Win/Loss Ratio', 'Expectancy', 'Long Trades', 'Long Profit',
+                     'Long Win Rate', 'Short Trades', 'Short Profit', 'Short Win Rate', 'Avg MAE', 'Avg MFE',
+                     'MFE Capture', 'Edge Ratio', 'Avg ETD', 'Commission', 'Commission Drag', 'Avg Bars']
+    # Sums per Strategy that every column above is built from
+    SUMS: list = ['trades', 'profit', 'wins', 'win_profit', 'losses', 'loss_profit', 'long_trades', 'long_profit',
+                  'long_wins', 'short_wins', 'mae', 'mfe', 'win_mfe', 'etd', 'commission', 'bars', 'bars_trades']
+
+    def __init__(self):
+        # {'strat_name': (data version, {COLUMNS: value})}
+        self._rows: dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get_table(self, snapshot: TradesSnapshot, strat_names: list = None) -> pd.DataFrame:
+        """
+        :param snapshot: TradesSnapshot to read from
+        :param strat_names: [Optional] A list of Strategy names. Default uses ALL Strategies
+        :return: A Dataframe with COLUMNS, 1 row per Strategy
+        """
+        strat_names = snapshot.strats_to_list() if strat_names is None else strat_names
+        with self._lock:
+            for strat_name in [strat_name for strat_name in self._rows if strat_name not in snapshot.trade_data]:
+                del self._rows[strat_name]
+            stale = [strat_name for strat_name in strat_names
+                     if self._rows.get(strat_name, (None,))[0] != snapshot.get_strat_version(strat_name)]
+            if stale:
+                sums = self.group_sums(strat_dfs=[snapshot.get_strat_df(strat_name) for strat_name in stale])
+                for idx, strat_name in enumerate(stale):
+                    self._rows[strat_name] = (snapshot.get_strat_version(strat_name),
+                                              self._to_row(name=strat_name,
+                                                           sums={col: sums[col][idx] for col in self.SUMS}))
+            rows = [self._rows[strat_name][1] for strat_name in strat_names]
+        return pd.DataFrame(data=rows, columns=self.COLUMNS)
+
+    @classmethod
+    def group_sums(cls, strat_dfs: list[pd.DataFrame]) -> dict[str, np.ndarray]:
+        """
+        Stack the Trades of many Strategies & sum each SUMS column by Strategy at once
+        :param strat_dfs: Trades Dataframe of each Strategy
+        :return: {SUMS column: (strategies,) sums in strat_dfs order}
+        """
+        n_strats = len(strat_dfs)
+        codes = np.repeat(np.arange(n_strats), [len(strat_df) for strat_df in strat_dfs])
+        trades = pd.concat([strat_df[['Market pos.', 'Profit', 'Commission', 'MAE', 'MFE', 'ETD', 'Bars']]
+                            for strat_df in strat_dfs], ignore_index=True) if n_strats > 0 else None
+
+        def col_values(col: str) -> np.ndarray:
+            return pd.to_numeric(trades[col], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64)
+
+        def group_sum(weights: np.ndarray = None) -> np.ndarray:
+            return np.bincount(codes, weights=weights, minlength=n_strats).astype(np.float64)
+
+        if n_strats == 0 or len(codes) == 0:
+            return {col: np.zeros(n_strats) for col in cls.SUMS}
+        profit = col_values('Profit')
+        mfe = col_values('MFE')
+        bars = pd.to_numeric(trades['Bars'], errors='coerce').to_numpy(dtype=np.float64)
+        has_bars = ~np.isnan(bars)
+        is_win = profit > 0
+        is_loss = profit < 0
+        is_long = trades['Market pos.'].str.strip().str.lower().eq('long').to_numpy()
+        return {'trades': group_sum(), 'profit': group_sum(profit),
+                'wins': group_sum(is_win), 'win_profit': group_sum(profit * is_win),
+                'losses': group_sum(is_loss), 'loss_profit': group_sum(profit * is_loss),
+                'long_trades': group_sum(is_long), 'long_profit': group_sum(profit * is_long),
+                'long_wins': group_sum(is_win & is_long), 'short_wins': group_sum(is_win & ~is_long),
+                'mae': group_sum(np.abs(col_values('MAE'))), 'mfe': group_sum(np.abs(mfe)),
+                'win_mfe': group_sum(np.abs(mfe) * is_win), 'etd': group_sum(np.abs(col_values('ETD'))),
+                'commission': group_sum(col_values('Commission')),
+                'bars': group_sum(np.where(has_bars, bars, 0.0)), 'bars_trades': group_sum(has_bars)}
+
+    @staticmethod
+    def _to_row(name: str, sums: dict[str, float]) -> dict:
+        """:return: {COLUMNS: value} of 1 Strategy from its SUMS. Ratios without a denominator are NaN"""
+        def ratio(num: float, den: float, mult: float = 1.0) -> float:
+            return round(num / den * mult, 2) if den else np.nan
+
+        trades = sums['trades']
+        short_trades = trades - sums['long_trades']
+        avg_win = ratio(sums['win_profit'], sums['wins'])
+        avg_loss = ratio(sums['loss_profit'], sums['losses'])
+        # Profit is after Commission. Drag is the part of the gross before Commission that Commission took
+        gross_before_comm = sums['profit'] + sums['commission']
+        return {'Strategy': name, 'Trades': int(trades), 'Net Profit': round(sums['profit'], 2),
+                'Gross Profit': round(sums['win_profit'], 2), 'Gross Loss': round(sums['loss_profit'], 2),
+                'Profit Factor': ratio(sums['win_profit'], -sums['loss_profit']),
+                'Win Rate': ratio(sums['wins'], trades, 100), 'Avg Win': avg_win, 'Avg Loss': avg_loss,
+                'Win/Loss Ratio': ratio(avg_win, -avg_loss) if sums['wins'] and sums['losses'] else np.nan,
+                'Expectancy': ratio(sums['profit'], trades), 'Long Trades': int(sums['long_trades']),
+                'Long Profit': round(sums['long_profit'], 2),
+                'Long Win Rate': ratio(sums['long_wins'], sums['long_trades'], 100),
+                'Short Trades': int(short_trades), 'Short Profit': round(sums['profit'] - sums['long_profit'], 2),
+                'Short Win Rate': ratio(sums['short_wins'], short_trades, 100),
+                'Avg MAE': ratio(sums['mae'], trades), 'Avg MFE': ratio(sums['mfe'], trades),
+                # Part of the most favorable move winners kept & favorable vs adverse excursion
+                'MFE Capture': ratio(sums['win_profit'], sums['win_mfe'], 100),
+                'Edge Ratio': ratio(sums['mfe'], sums['mae']), 'Avg ETD': ratio(sums['etd'], trades),
+                'Commission': round(sums['commission'], 2),
+                'Commission Drag': ratio(sums['commission'], gross_before_comm, 100) if gross_before_comm > 0
+                else np.nan,
+                'Avg Bars': ratio(sums['bars'], sums['bars_trades'])}
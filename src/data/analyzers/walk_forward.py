@@ -0,0 +1,97 @@
+import time
+import numpy as np
+import pandas as pd
+
+from src.conf_setup import logger
+from src.data.analyzers.opt_constraints import OptConstraints
+from src.data.analyzers.pnl_matrix import PnlMatrix
+from src.data.analyzers.strat_statistics import StratStatistics
+
+
+class WalkForward(StratStatistics):
+    """
+    Rolling In-Sample / Out-of-Sample Walk Forward Optimization. Each window picks the best Portfolio by Return to
+    Drawdown on its In-Sample days, then trades it on the following Out-of-Sample days.
+    self.strats_df = The stitched Out-of-Sample Daily PnL & Equity Curve of every window's chosen Portfolio
+    self.windows = Pandas Dataframe with 1 row per window of the chosen Strategies & their Out-of-Sample results
+    """
+
+    WINDOW_COLS: list = ['IS Start', 'IS End', 'OOS Start', 'OOS End', 'Strategies', 'IS Return to DD',
+                         'OOS Net Profit', 'OOS Max Drawdown', 'OOS Return to DD', 'OOS Daily Win Rate']
+
+    def __init__(self, pnl_matrix: PnlMatrix, window: int, step: int, account_size: float = 0.0,
+                 start_date: str = None, end_date: str = None, constraints: OptConstraints = None):
+        """
+        :param pnl_matrix: Aligned Daily PnL of the Strategies to choose from. Shared by every window
+        :param window: Amount of In-Sample trading days to optimize over
+        :param step: Amount of Out-of-Sample trading days to trade each chosen Portfolio. Also how far windows roll
+        :param account_size: [Optional] Only choose Portfolios that fit this Account Size. Default = 0(disabled)
+        :param start_date: [Optional] Starting date of the 1st window. Default: ALL Dates
+        :param end_date: [Optional] End date of the last window. Default: ALL Dates
+        :param constraints: [Optional] Only choose Portfolios that meet these limits. Default: Every combination
+        """
+        super().__init__(start_date=start_date, end_date=end_date)
+        self.name = 'Walk Forward OOS'
+        self.pnl_matrix = pnl_matrix
+        self.window = int(window)
+        self.step = int(step)
+        self.account_size = 0.0 if account_size is None else account_size
+        self.constraints = constraints
+        self.windows: pd.DataFrame = pd.DataFrame(columns=self.WINDOW_COLS)
+
+    def run(self) -> 'WalkForward':
+        """
+        Run every window & set the stitched Out-of-Sample Statistics
+        :return: self, so it can be chained Ex: AnalyzeDataTrades().walk_forward(250, 60).windows
+        """
+        if self.window < 1 or self.step < 1:
+            raise ValueError(f"Walk Forward window: {self.window} and step: {self.step} must both be at least 1 day")
+        start_time = time.time()
+        rows = self.pnl_matrix.date_rows(start_date=self.start_date, end_date=self.end_date)
+        dates = self.pnl_matrix.dates
+        window_rows = []
+        oos_daily_pnl = []
+        for is_start in range(rows.start, rows.stop - self.window, self.step):
+            is_rows = slice(is_start, is_start + self.window)
+            oos_rows = slice(is_rows.stop, min(is_rows.stop + self.step, rows.stop))
+            best_mask, best_score = self._best_in_sample(is_rows=is_rows)
+            if best_mask is None:
+                logger.info(f"Walk Forward: No Portfolio fit an Account Size of ${self.account_size:,.2f} for In-Sample "
+                            f"{dates[is_rows.start].date()} - {dates[is_rows.stop - 1].date()}")
+                continue
+            oos_stats = self.pnl_matrix.evaluate(masks=best_mask, rows=oos_rows, req_cap_mult=self.REQ_CAP_MAX_DD_MULT)
+            window_rows.append([dates[is_rows.start].date(), dates[is_rows.stop - 1].date(),
+                                dates[oos_rows.start].date(), dates[oos_rows.stop - 1].date(),
+                                [name for name, sel in zip(self.pnl_matrix.strat_names, best_mask[0]) if sel],
+                                best_score, oos_stats['net_profit'][0], oos_stats['max_drawdown'][0],
+                                oos_stats['return_to_dd'][0], oos_stats['daily_win_rate'][0]])
+            oos_daily_pnl.append(self.pnl_matrix.portfolio_daily_pnl(mask=best_mask, rows=oos_rows))
+        self.windows = pd.DataFrame(data=window_rows, columns=self.WINDOW_COLS)
+        if len(oos_daily_pnl) > 0:
+            self.create_daily_strats_df(daily_pnl=pd.concat(objs=oos_daily_pnl))
+            self._set_net_profit()
+            self._set_daily_max_dd()
+            self._set_return_to_dd_ratio()
+            self._set_req_cap_daytrade()
+            self._set_win_rate()
+        logger.info(f"Walk Forward: Ran {len(self.windows)} windows in {round(time.time() - start_time, 4)} Seconds")
+        return self
+
+    def _best_in_sample(self, is_rows: slice) -> tuple[np.ndarray | None, float]:
+        """
+        Find the best Portfolio by Return to Drawdown that fits our Account Size. Ties go to the 1st Portfolio found,
+        same as AnalyzeDataTrades.optimize_portfolio. Combinations are streamed 1 batch at a time instead of kept
+        across windows, since 2^N masks don't fit in memory for larger N
+        :param is_rows: In-Sample rows(days) to score
+        :return: Tuple of (1 x strategies mask of the best Portfolio or None, It's In-Sample Return to Drawdown)
+        """
+        best_mask, best_score = None, -np.inf
+        for masks in self.pnl_matrix.iter_combination_masks(constraints=self.constraints):
+            stats = self.pnl_matrix.evaluate(masks=masks, rows=is_rows, req_cap_mult=self.REQ_CAP_MAX_DD_MULT)
+            score = stats['return_to_dd']
+            if self.account_size != 0.0:
+                score = np.where(self.account_size >= stats['req_cap_daytrade'], score, -np.inf)
+            best_idx = int(np.argmax(score))
+            if score[best_idx] > best_score:
+                best_mask, best_score = masks[best_idx:best_idx + 1], float(score[best_idx])
+        return best_mask, best_score
@@ -0,0 +1,96 @@
+import time
+import numpy as np
+from scipy.optimize import differential_evolution
+
+from src.conf_setup import logger
+from src.data.analyzers.pnl_matrix import PnlMatrix
+from src.data.analyzers.strat_statistics import StratStatistics
+
+
+class WeightOptimizer:
+    """
+    Size each Strategy in a PnlMatrix with a contract multiplier instead of only including/excluding it. SciPy's
+    differential_evolution searches the multipliers, scoring a whole population at once with PnlMatrix.evaluate(), since
+    a weighted Portfolio's Daily PnL is just the PnL matrix times the weights.
+    Portfolios over the budget are always scored worse than any Portfolio within it.
+    """
+
+    OBJECTIVES: tuple = ('return_to_dd', 'net_profit')
+    BUDGETS: tuple = ('max_drawdown', 'req_cap_daytrade')
+    # Score of a Portfolio over budget, before adding how far over it is. Worse than any Portfolio within the budget
+    OVER_BUDGET_SCORE: float = 1e12
+    SEED: int = 42
+
+    def __init__(self, pnl_matrix: PnlMatrix, objective: str = 'return_to_dd', budget: str = 'max_drawdown',
+                 budget_value: float = 0.0, min_weight: float = 0.0, max_weight: float = 5.0, integer: bool = True,
+                 start_date: str = None, end_date: str = None, maxiter: int = 200, seed: int = SEED):
+        """
+        :param pnl_matrix: Aligned Daily PnL of the Strategies to size
+        :param objective: [Optional] 'return_to_dd' or 'net_profit' to maximize
+        :param budget: [Optional] 'max_drawdown' or 'req_cap_daytrade' to keep within budget_value
+        :param budget_value: [Optional] Most Max Drawdown(as a positive $) or Capital Required allowed. 0 = No budget
+        :param min_weight: [Optional] Fewest contracts per Strategy. 0 lets a Strategy be left out
+        :param max_weight: [Optional] Most contracts per Strategy
+        :param integer: [Optional] True = Whole contracts. False = Continuous multipliers
+        :param start_date: [Optional] Starting date to select from dataframe. Default: ALL Dates
+        :param end_date: [Optional] End Date to select from dataframe. Default: ALL Dates
+        :param maxiter: [Optional] Most generations of differential_evolution
+        :param seed: [Optional] Random Seed for reproducible results
+        """
+        if objective not in self.OBJECTIVES:
+            raise ValueError(f"Weight Optimizer objective: {objective} must be 1 of {self.OBJECTIVES}")
+        if budget not in self.BUDGETS:
+            raise ValueError(f"Weight Optimizer budget: {budget} must be 1 of {self.BUDGETS}")
+        if not 0 <= min_weight <= max_weight or max_weight <= 0:
+            raise ValueError(f"Weight Optimizer weights: {min_weight} - {max_weight} must be 0 <= min <= max & max > 0")
+        self.pnl_matrix = pnl_matrix
+        self.objective = objective
+        self.budget = budget
+        self.budget_value = abs(float(budget_value or 0.0))
+        self.min_weight = float(min_weight)
+        self.max_weight = float(max_weight)
+        self.integer = integer
+        self.rows = pnl_matrix.date_rows(start_date=start_date, end_date=end_date)
+        self.maxiter = maxiter
+        self.seed = seed
+        self.weights: dict[str, float] = {}
+        self.stats: dict[str, float] = {}
+
+    def _score(self, weights: np.ndarray) -> np.ndarray:
+        """
+        :param weights: (strategies x portfolios) multipliers. differential_evolution's vectorized layout
+        :return: (portfolios,) scores to minimize
+        """
+        weights = np.atleast_2d(weights.T)
+        stats = self.pnl_matrix.evaluate(masks=weights, rows=self.rows, req_cap_mult=StratStatistics.REQ_CAP_MAX_DD_MULT)
+        scores = -stats[self.objective]
+        if self.budget_value > 0:
+            used = np.abs(stats[self.budget])
+            over_budget = used > self.budget_value
+            scores = np.where(over_budget, self.OVER_BUDGET_SCORE + used - self.budget_value, scores)
+        return scores
+
+    def run(self) -> 'WeightOptimizer':
+        """
+        Search the multipliers & keep the best
+        :return: self, so it can be chained Ex: WeightOptimizer(pnl_matrix).run().weights
+        """
+        start_time = time.time()
+        n_strats = len(self.pnl_matrix.strat_names)
+        if n_strats == 0:
+            return self
+        result = differential_evolution(
+            func=self._score, bounds=[(self.min_weight, self.max_weight)] * n_strats,
+            integrality=[self.integer] * n_strats, maxiter=self.maxiter, seed=self.seed, polish=False,
+            vectorized=True, updating='deferred')
+        best_weights = np.round(result.x) if self.integer else result.x
+        self.weights = {strat_name: float(weight) for strat_name, weight in zip(self.pnl_matrix.strat_names, best_weights)}
+        stats = self.pnl_matrix.evaluate(masks=best_weights.reshape(1, -1), rows=self.rows,
+                                         req_cap_mult=StratStatistics.REQ_CAP_MAX_DD_MULT)
+        self.stats = {stat: float(values[0]) for stat, values in stats.items()}
+        if self.budget_value > 0 and abs(self.stats[self.budget]) > self.budget_value:
+            logger.warning(f"Weight Optimizer: No weights found within the {self.budget} budget of "
+                           f"${self.budget_value:,.2f}. Best found uses ${abs(self.stats[self.budget]):,.2f}")
+        logger.info(f"Weight Optimizer: Sized {n_strats} Strategies in {result.nit} generations & "
+                    f"{round(time.time() - start_time, 4)} Seconds. Weights: {self.weights}")
+        return self
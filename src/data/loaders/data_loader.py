@@ -1,69 +1,394 @@
 import csv
+import json
 import os
 import shutil
 import threading
 import time
-
+from collections import deque
+from datetime import datetime
 import pandas as pd
 
-from src.conf_setup import DATA_IN_DIR, logger, DATA_IN_ARCH_DIR, DB_STRAT_DIR
+from src.conf_setup import DATA_IN_DIR, logger, DATA_IN_ARCH_DIR, DATA_VERSION_FILE, DB_REFRESH_SECS, CSV_MONITOR_SECS, \
+    INGEST_WORKERS, TIME_MIGRATION_FILE
+from src.data.analyzers.live_state import LiveState
+from src.data.loaders.ingest_manifest import IngestManifest
+from src.data.loaders.strategy_store import StrategyStore
 from src.data.types.data_trades import DataTrades
 from src.data.types.schema_data_trades import SchemaDT
 
+# Each ingest worker process gets the manifest's lookups & the stored Strategy Names once, instead of with every file
+_worker_manifest: IngestManifest | None = None
+_worker_known_strats: set = set()
+
+
+def _init_worker(manifest: IngestManifest, known_strats: set):
+    global _worker_manifest, _worker_known_strats
+    _worker_manifest = manifest
+    _worker_known_strats = known_strats
+
+
+def _parse_csv_file(csv_file: str, manifest: IngestManifest = None, known_strats: set = None) -> dict:
+    """
+    Hash, parse & convert 1 .csv file without touching DataTrades. Module level, so it can be pickled to a Process Pool.
+    Never raises, so 1 bad file can't stop the files after it
+    :param csv_file: Full path of the .csv file
+    :param manifest: [Optional] IngestManifest to skip loaded files & stored rows with. Default: The worker's
+    :param known_strats: [Optional] Strategies currently stored. Default: The worker's
+    :return: {'file_hash': str, 'rows': [(trade key, raw row) or (None, formatted row)] or None if the file was already
+    loaded or failed before, 'failed_before': bool,
+    'strat_ranges': {'strat_name': [first exit, last exit, rows, 0]}, 'bytes': int, 'seconds': float, 'error': str}
+    """
+    start_time = time.time()
+    manifest = manifest or _worker_manifest
+    known_strats = _worker_known_strats if known_strats is None else known_strats
+    result = {'file_hash': None, 'rows': None, 'failed_before': False, 'strat_ranges': {}, 'bytes': 0, 'seconds': 0.0,
+              'error': None}
+    try:
+        result['bytes'] = os.path.getsize(csv_file)
+        result['file_hash'] = manifest.hash_file(csv_file)
+        result['failed_before'] = manifest.is_failed(file_hash=result['file_hash'])
+        if not result['failed_before'] and not manifest.is_loaded(file_hash=result['file_hash'], known_strats=known_strats):
+            result['rows'] = []
+            exit_time_converter = SchemaDT.DATA_CONVERTERS['Exit time']
+            entry_time_converter = SchemaDT.DATA_CONVERTERS['Entry time']
+            with open(csv_file, 'r') as fh:
+                csv_reader = csv.DictReader(f=fh, fieldnames=SchemaDT.COL_NAMES_LIST)
+                # Iterate over each row in the CSV file
+                for row in csv_reader:
+                    # skip header
+                    if row['Trade number'].lower() == 'trade number': continue
+                    del row[None]
+                    strat_name = row['Strategy']
+                    exit_time = exit_time_converter(row['Exit time'])
+                    strat_range = result['strat_ranges'].setdefault(strat_name, [exit_time, exit_time, 0, 0])
+                    strat_range[0] = min(strat_range[0], exit_time)
+                    strat_range[1] = max(strat_range[1], exit_time)
+                    strat_range[2] += 1
+                    # Rows in a loaded file's range are only converted if their key isn't stored. Checked by the writer
+                    if strat_name in known_strats and manifest.may_be_stored(strat_name=strat_name, exit_time=exit_time):
+                        trade_key = (pd.Timestamp(exit_time).value,
+                                     pd.Timestamp(entry_time_converter(row['Entry time'])).value)
+                        result['rows'].append((trade_key, row))
+                    else:
+                        result['rows'].append((None, SchemaDT.format_row(row=row)))
+    except Exception as e:
+        result['rows'] = None
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.time() - start_time
+    return result
+
 
 class DataLoaderCSV:
     """Loads files from the data/in directory and saves them to a database in data/dbs/strategies"""
 
-    def __init__(self):
+    # Files waiting on or being parsed by each ingest worker. Only these files' parsed rows are ever held at once
+    FILES_PER_WORKER: int = 2
+
+    def __init__(self, load_dbs: bool = True, start_date: str = None, end_date: str = None):
+        """
+        :param load_dbs: [Optional] Load every Strategy Database file. False = Already loaded. Ex: a forked web worker
+        :param start_date: [Optional] Only load Trades that exited from this date. Default: ALL Dates
+        :param end_date: [Optional] Only load Trades that exited up to this date. Default: ALL Dates
+        """
         self.data_trades = DataTrades()
+        self.manifest = IngestManifest()
+        self.strat_store = StrategyStore()
+        self.start_date = start_date
+        self.end_date = end_date
+        # Only part of each Strategy's history is loaded, so saving it would lose the rest
+        self.read_only: bool = start_date is not None or end_date is not None
+        # Running PnL & Drawdown of the Live Strategies. Only updated by the process that loads .csv files
+        self._live_state: LiveState | None = None
+        # Version in DATA_VERSION_FILE of the Strategy Databases this process last published or reloaded
+        self.data_version: int = -1
+        # {file name: (size, modified ns)} of files in data/in that failed. Not read again until they change
+        self._failed_files: dict[str, tuple[int, int]] = {}
+        # Strategies committed with new Trades whose Database files aren't saved & published yet. Retried every check
+        self._unsaved_strats: set = set()
         # Load pre-existing Strategy Database Files into self.data_trades before reading any new .csv's
-        self._load_strat_dbs()
+        if load_dbs:
+            self._load_strat_dbs()
 
-    def load_strat_csvs(self) -> DataTrades:
+    def load_strat_csvs(self, workers: int = INGEST_WORKERS) -> DataTrades:
         """
         Load data from .csv files
+        :param workers: [Optional] Processes to parse the files in. 0 or 1 = this process. Default: INGEST_WORKERS
         :return: A DataTrades object filled with each Strategy's Trades
         """
-        files_processed = 0
-        in_files = os.listdir(DATA_IN_DIR)
-        for file in in_files: # combine files into 1
-            if os.path.splitext(file)[-1].lower() == ".csv":
-                csv_file = os.path.join(DATA_IN_DIR, file)
-                csv_file_arch = os.path.join(DATA_IN_ARCH_DIR, file)
-                logger.debug(f"Processing file: {file}.")
-                try:
-                    row_counter = 0
-                    with open(csv_file, 'r') as fh:
-                        csv_reader = csv.DictReader(f=fh, fieldnames=SchemaDT.COL_NAMES_LIST)
-                        # csv_reader = csv.reader()
-                        # Iterate over each row in the CSV file
-                        for row in csv_reader:
-                            # skip header
-                            if row['Trade number'].lower() == 'trade number': continue
-                            del row[None]
-                            self.data_trades.add_trade_data(row=row)
-                            row_counter += 1
-                    files_processed += 1
-                    logger.info(f"Attempted to Load {row_counter} Trades from {file}. Processed {files_processed} files.")
-                    shutil.move(csv_file, csv_file_arch) # Remove file in future? os.remove(full_filename)
-                except Exception as e:
-                    logger.exception(f"Failed to load Trade file [{csv_file}] into database. Exception: {e}")
-        if files_processed > 0:
+        if self.read_only:
+            raise ValueError(f"Can't load .csv files into Strategy Databases loaded from {self.start_date} to "
+                             f"{self.end_date}. Only part of their Trades are loaded")
+        with self.data_trades.write_lock:
+            if not os.path.exists(TIME_MIGRATION_FILE):
+                self._migrate_trade_times()
+            return self._load_strat_csvs(workers=workers)
+
+    def _migrate_trade_times(self) -> dict[str, int]:
+        """
+        One time fix of stored Trades parsed while 'Entry time' & 'Exit time' ignored their AM/PM. Ex: 1:10 PM stored as
+        01:10 & 12:05 AM as 12:05. The stored rows no longer have the AM/PM, so every .csv file still in data/in/arch is
+        parsed again, without the manifest, with both the old & the fixed format. Each stored Trade whose old key is in
+        them is replaced by every archived row with that old key, which also brings back Trades an AM & PM time at the
+        same clock time had merged into 1. Trades no archived file has are kept as they are.
+        :return: {'strat_name': Trades written} of each Strategy rewritten
+        """
+        start_time = time.time()
+        old_format = '%m/%d/%Y %H:%M:%S %p'
+        # {'strat_name': {old trade key: {fixed trade key: formatted row values}}}
+        archived = {}
+        arch_files = sorted(file for file in os.listdir(DATA_IN_ARCH_DIR) if os.path.splitext(file)[-1].lower() == ".csv")
+        for file in arch_files:
+            try:
+                with open(os.path.join(DATA_IN_ARCH_DIR, file), 'r') as fh:
+                    for row in csv.DictReader(f=fh, fieldnames=SchemaDT.COL_NAMES_LIST):
+                        if row['Trade number'].lower() == 'trade number': continue
+                        row.pop(None, None)
+                        old_key = (pd.Timestamp(datetime.strptime(row['Exit time'], old_format)).value,
+                                   pd.Timestamp(datetime.strptime(row['Entry time'], old_format)).value)
+                        formatted_row = SchemaDT.format_row(row=row)
+                        fixed_key = (pd.Timestamp(formatted_row['Exit time']).value,
+                                     pd.Timestamp(formatted_row['Entry time']).value)
+                        # Later files replace earlier ones, like the ingest
+                        archived.setdefault(formatted_row['Strategy'], {}).setdefault(old_key, {})[fixed_key] = \
+                            list(formatted_row.values())
+            except Exception as e:
+                logger.exception(f"Time migration: Skipped archived file [{file}]. Exception: {e}")
+        fixed_cts = {}
+        snapshot = self.data_trades.get_snapshot()
+        for strat_name in snapshot.strats_to_list():
+            strat_archived = archived.get(strat_name)
+            if not strat_archived:
+                continue
+            strat_df = snapshot.get_strat_df(strat_name)
+            exit_ns, entry_ns = (strat_df[col].to_numpy(dtype='datetime64[ns]').view('int64').tolist()
+                                 for col in SchemaDT.DT_INDEX_KEYS)
+            matched = [key in strat_archived for key in zip(exit_ns, entry_ns)]
+            matched_keys = {key for key, is_matched in zip(zip(exit_ns, entry_ns), matched) if is_matched}
+            fixed_rows = {fixed_key: values for old_key in matched_keys
+                          for fixed_key, values in strat_archived[old_key].items()}
+            if all(set(strat_archived[old_key]) == {old_key} for old_key in matched_keys):
+                continue
+            fixed_df = pd.DataFrame(data=list(fixed_rows.values()), columns=SchemaDT.COL_NAMES_LIST)
+            kept_df = strat_df.loc[[not is_matched for is_matched in matched]]
+            fixed_df = pd.concat([kept_df.reset_index(drop=True), fixed_df], ignore_index=True) if len(kept_df) > 0 \
+                else fixed_df
+            fixed_df = fixed_df.sort_values(by=SchemaDT.DT_INDEX_KEYS, kind='mergesort', ignore_index=True)
+            self.data_trades.add_db_strat_trades(trades_df=fixed_df)
+            fixed_cts[strat_name] = len(fixed_rows)
+            logger.info(f"Time migration: {strat_name}: Replaced {len(matched_keys)} stored Trades with "
+                        f"{len(fixed_rows)} from archived files & kept {len(kept_df)} that no archived file has")
+        if len(fixed_cts) > 0:
+            new_snapshot = self.data_trades.commit()
+            self.data_trades.get_opt_cache().invalidate(strat_names=list(fixed_cts))
+            self._unsaved_strats.update(fixed_cts)
+            self.data_trades.get_rollups(snapshot=new_snapshot)
+            # A fixed time is at most 12 hours from the stored 1
+            self.manifest.widen_exit_ranges(delta=pd.Timedelta(hours=12))
+            self.update_live_state(strat_names=list(fixed_cts))
+        # Also saves fixes committed by an earlier try that failed to save
+        self._save_unsaved_strats()
+        # Only written once the fixed Strategies are saved, so a failed migration runs again on the next start
+        with open(TIME_MIGRATION_FILE, 'w') as fh:
+            json.dump({'migrated': datetime.now().isoformat(), 'arch_files': len(arch_files), 'strategies': fixed_cts},
+                      fh)
+        logger.info(f"Time migration: Rewrote {sum(fixed_cts.values())} Trades of {list(fixed_cts)} from "
+                    f"{len(arch_files)} archived .csv files in {round(time.time() - start_time, 4)} Seconds")
+        return fixed_cts
+
+    def _load_strat_csvs(self, workers: int = INGEST_WORKERS) -> DataTrades:
+        """
+        Parse every .csv file in a Process Pool while this process buffers each parsed file in DataTrades in file name
+        order, then commit them to a new snapshot & save the changed Strategies all at once
+        :param workers: [Optional] Processes to parse the files in. 0 or 1 = this process
+        """
+        start_time = time.time()
+        changed_strats = []
+        known_strats = set(self.data_trades.strats_to_list())
+        # Sorted, so Trades with the same key in 2 files always resolve the same way
+        csv_files = sorted(file for file in os.listdir(DATA_IN_DIR) if os.path.splitext(file)[-1].lower() == ".csv")
+        # A file that failed stays in data/in, so don't hash & parse it again every check until it changes
+        self._failed_files = {file: file_stat for file, file_stat in self._failed_files.items() if file in csv_files}
+        csv_files = [file for file in csv_files if self._failed_files.get(file) is None
+                     or self._failed_files[file] != self._file_stat(file=file)]
+        csv_paths = [os.path.join(DATA_IN_DIR, file) for file in csv_files]
+        # Both paths parse against the manifest as it was before this check, so a file's parse never depends on
+        # which files before it were already recorded
+        lookup = self.manifest.lookup_copy()
+        if workers > 1 and len(csv_files) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            outcomes = []
+            with ProcessPoolExecutor(max_workers=min(workers, len(csv_files)), initializer=_init_worker,
+                                     initargs=(lookup, known_strats)) as executor:
+                # Only a few files per worker are parsing or parsed at once. Each is buffered in order & dropped as
+                # soon as it's done, so the parsed rows of every file are never held together
+                futures = deque()
+                for file, csv_file in zip(csv_files, csv_paths):
+                    futures.append((file, executor.submit(_parse_csv_file, csv_file)))
+                    if len(futures) >= workers * self.FILES_PER_WORKER:
+                        done_file, future = futures.popleft()
+                        outcomes.append(self._buffer_csv_file(file=done_file, result=future.result,
+                                                              known_strats=known_strats))
+                while futures:
+                    done_file, future = futures.popleft()
+                    outcomes.append(self._buffer_csv_file(file=done_file, result=future.result,
+                                                          known_strats=known_strats))
+        else:
+            outcomes = [self._buffer_csv_file(file=file, known_strats=known_strats, result=lambda csv_file=csv_file:
+                                              _parse_csv_file(csv_file=csv_file, manifest=lookup,
+                                                              known_strats=known_strats))
+                        for file, csv_file in zip(csv_files, csv_paths)]
+        files_processed = outcomes.count(IngestManifest.LOADED)
+        files_skipped = outcomes.count(IngestManifest.DUPLICATE)
+        files_failed = outcomes.count(IngestManifest.FAILED)
+        for file, outcome in zip(csv_files, outcomes):
+            if outcome == IngestManifest.FAILED:
+                self._failed_files[file] = self._file_stat(file=file)
+        # Also commits Trades an earlier check buffered, but failed before committing
+        if files_processed > 0 or self.data_trades.has_uncommitted():
             self.data_trades.dedupe()
-            self.save_db()
+            old_snapshot = self.data_trades.get_snapshot()
+            new_snapshot = self.data_trades.commit()
+            # Cached Optimizer results for Strategies with new Trades will never be served again, so drop them now
+            changed_strats = [strat_name for strat_name, version in new_snapshot.strat_versions.items()
+                              if version != old_snapshot.get_strat_version(strat_name)]
+            self.data_trades.get_opt_cache().invalidate(strat_names=changed_strats)
+            # Only Strategies with new Trades need writing again
+            self._unsaved_strats.update(changed_strats)
+            # Add only the new Trades to the Rollups now, instead of when they're viewed
+            self.data_trades.get_rollups(snapshot=new_snapshot)
+        # Includes any Strategy an earlier check committed, but failed to save
+        changed_strats = self._save_unsaved_strats()
+        # Only saved after the Trades are, so the manifest never claims a file whose Trades were lost
+        self.manifest.save()
+        # Only archived once its Trades & the manifest are saved. Until then a file stays in data/in, so a check that
+        # fails before here finds it again next time, or after a restart
+        for file, outcome in zip(csv_files, outcomes):
+            if outcome in (IngestManifest.LOADED, IngestManifest.DUPLICATE):
+                self._archive_csv_file(file=file)
+        self.update_live_state(strat_names=changed_strats)
+        if len(csv_files) > 0:
+            logger.info(f"Ingest: {files_processed} files loaded, {files_skipped} skipped & {files_failed} failed of "
+                        f"{len(csv_files)} .csv files in {round(time.time() - start_time, 4)} Seconds. "
+                        f"Strategies changed: {changed_strats}")
         return self.data_trades
 
-    def _monitor_csvs(self, seconds: int = 120):
+    def _buffer_csv_file(self, file: str, result, known_strats: set) -> str:
+        """
+        Buffer the Trades of 1 parsed .csv file in self.data_trades & record it in the manifest. It's archived by the
+        caller once everything is saved. A file that failed is logged & left in data/in to be tried again, without
+        stopping the rest
+        :param file: Name of the .csv file in DATA_IN_DIR
+        :param result: Function returning the file's _parse_csv_file() result. Ex: A Process Pool future's result
+        :param known_strats: Strategies currently stored
+        :return: The file's outcome. IngestManifest.LOADED, DUPLICATE or FAILED
+        """
+        csv_file = os.path.join(DATA_IN_DIR, file)
+        file_hash = None
+        try:
+            parsed = result()
+            file_hash = parsed['file_hash']
+            if parsed['failed_before']:
+                logger.warning(f"Skipped {file}. The exact same file failed before. It's tried again once it changes.")
+                return IngestManifest.FAILED
+            if parsed['error'] is not None:
+                logger.error(f"Failed to load Trade file [{csv_file}] into database. Exception: {parsed['error']}")
+                if file_hash is not None:
+                    self.manifest.record(file_hash=file_hash, file_name=file, outcome=IngestManifest.FAILED)
+                return IngestManifest.FAILED
+            # Checked again here, since an earlier file in this same run may have been the exact same file
+            if parsed['rows'] is None or self.manifest.is_loaded(file_hash=file_hash, known_strats=known_strats):
+                logger.info(f"Skipped {file}. The exact same file was already loaded.")
+                self.manifest.record(file_hash=file_hash, file_name=file, outcome=IngestManifest.DUPLICATE)
+                return IngestManifest.DUPLICATE
+            strat_ranges = parsed['strat_ranges']
+            for trade_key, row in parsed['rows']:
+                if trade_key is not None:
+                    if self.data_trades.has_trade(strat_name=row['Strategy'], trade_key=trade_key):
+                        continue
+                    row = SchemaDT.format_row(row=row)
+                strat_ranges[row['Strategy']][3] += self.data_trades.add_formatted_trade(formatted_row=row)
+            row_counter = sum(strat_range[2] for strat_range in strat_ranges.values())
+            new_trade_ct = sum(strat_range[3] for strat_range in strat_ranges.values())
+            seconds = max(parsed['seconds'], 1e-6)
+            logger.info(f"Attempted to Load {row_counter} Trades from {file}. {new_trade_ct} were new, "
+                        f"{row_counter - new_trade_ct} were already stored. Parsed in {round(parsed['seconds'], 4)} "
+                        f"Seconds: {row_counter / seconds:,.0f} Trades/s, {parsed['bytes'] / seconds / 1e6:,.2f} MB/s")
+            self.manifest.record(file_hash=file_hash, file_name=file, outcome=IngestManifest.LOADED,
+                                 strat_ranges=strat_ranges)
+            return IngestManifest.LOADED
+        except Exception as e:
+            logger.exception(f"Failed to load Trade file [{csv_file}] into database. Exception: {e}")
+            if file_hash is not None:
+                self.manifest.record(file_hash=file_hash, file_name=file, outcome=IngestManifest.FAILED)
+            return IngestManifest.FAILED
+
+    def _save_unsaved_strats(self) -> list:
+        """
+        Save every Strategy committed since its Database was last saved & publish the new version. Only forgotten once
+        the version is published, so a save or publish that fails is tried again on the next check
+        :return: A list of Strategy Names saved
+        """
+        strat_names = sorted(self._unsaved_strats)
+        if len(strat_names) == 0:
+            return strat_names
+        for strat_name in strat_names:
+            self.save_db(strat_name=strat_name)
+        self.publish_data_version()
+        self._unsaved_strats.difference_update(strat_names)
+        return strat_names
+
+    @staticmethod
+    def _archive_csv_file(file: str):
+        """
+        Move a .csv file whose Trades are saved to data/in/arch. One that can't be moved(Ex: Still open in another
+        program) is logged & stays in data/in, where the next check skips it as already loaded & tries again
+        :param file: Name of the .csv file in DATA_IN_DIR
+        """
+        try:
+            shutil.move(os.path.join(DATA_IN_DIR, file), os.path.join(DATA_IN_ARCH_DIR, file))
+        except OSError as e:
+            logger.exception(f"Failed to archive Trade file [{file}] to [{DATA_IN_ARCH_DIR}]. Exception: {e}")
+
+    @staticmethod
+    def _file_stat(file: str) -> tuple[int, int] | None:
+        """:return: (size, modified ns) of a file in DATA_IN_DIR or None if it's gone"""
+        try:
+            file_stat = os.stat(os.path.join(DATA_IN_DIR, file))
+            return file_stat.st_size, file_stat.st_mtime_ns
+        except OSError:
+            return None
+
+    def update_live_state(self, strat_names: list = None) -> list[dict]:
+        """
+        Add the new Trades to the Live Strategies' running totals & log any Stop Loss breaches. Also picks up Live
+        Settings saved since the last check, so it's run after every check of the csv directory
+        :param strat_names: [Optional] Strategies with new Trades. Default: ALL Live Strategies
+        :return: A list of new breach events
+        """
+        try:
+            if self._live_state is None:
+                self._live_state = LiveState()
+                strat_names = None
+            return self._live_state.update(data_trades=self.data_trades, strat_names=strat_names)
+        except Exception as e:
+            logger.exception(f"Failed to update the Live State of {strat_names}. Exception: {e}")
+            return []
+
+    def _monitor_csvs(self, seconds: int = CSV_MONITOR_SECS):
         """
         Just here to run the monitor_csvs thread loop, so we aren't constantly checking for csvs
         :param seconds:
         """
         while True:
-            self.load_strat_csvs()
+            try:
+                self.load_strat_csvs()
+            except Exception as e:
+                # Ex: A full disk. Whatever wasn't saved is tried again next check, so keep the ingest running
+                logger.exception(f"Failed to load .csv files. Trying again in {seconds} Seconds. Exception: {e}")
             time.sleep(seconds)
 
 
-    def monitor_csvs(self, seconds:int = 120):
+    def monitor_csvs(self, seconds:int = CSV_MONITOR_SECS):
         """
         Monitor the csv directory every [seconds] in a separate thread
         :param seconds: [Optional] Seconds to check csv directory
@@ -75,26 +400,106 @@ class DataLoaderCSV:
         """
         Load Strategy Database files
         """
-        strat_db_files = os.listdir(DB_STRAT_DIR)
-        for strat_db in strat_db_files:
-            if os.path.splitext(strat_db)[-1].lower() == ".parquet":
-                strat_db_file = os.path.join(DB_STRAT_DIR, strat_db)
-                self.data_trades.add_db_strat_trades(trades_df=pd.read_parquet(path=strat_db_file))
-                logger.info(f"Loaded Strategy Database file: {strat_db_file}")
+        with self.data_trades.write_lock:
+            for strat_name in self.strat_store.strats_to_list():
+                start_time = time.time()
+                strat_df = self._read_strat(strat_name=strat_name)
+                if len(strat_df) == 0:
+                    logger.info(f"Skipped Strategy Database: {strat_name}. No Trades from {self.start_date} to {self.end_date}")
+                    continue
+                self.data_trades.add_db_strat_trades(trades_df=strat_df)
+                logger.info(f"Loaded Strategy Database: {strat_name} ({self.strat_store.db_format}) in {round(time.time() - start_time, 4)} Seconds")
+            self.data_trades.get_rollups(snapshot=self.data_trades.commit())
+
+    def _read_strat(self, strat_name: str) -> pd.DataFrame:
+        """:return: A Strategy's Trades Dataframe. Only the Trades in start_date - end_date when a range was given"""
+        if self.read_only:
+            return self.strat_store.read_strat_range(strat_name=strat_name, start_date=self.start_date,
+                                                     end_date=self.end_date)
+        return self.strat_store.read_strat(strat_name=strat_name)
 
     def save_db(self, strat_name: str = None):
         """
-        Save a Strategies Database to a database file
+        Save a Strategies Database to a database file from the current snapshot
         :param strat_name: String representing the name of the strategy
         """
-        if strat_name is None:
-            for name, strat_df in self.data_trades.trade_data.items():
-                strat_df = self.data_trades.get_strat_df(name)
-                strat_db_file = os.path.join(DB_STRAT_DIR, f"{name}.parquet")
-                logger.debug(f"{name}: Saving [{len(strat_df)}] Rows/Trades to [{strat_db_file}]")
-                strat_df.to_parquet(path=strat_db_file)
-        else:
-            strat_db_file = os.path.join(DB_STRAT_DIR, f"{strat_name}.parquet")
-            strat_df = self.data_trades.get_strat_df(strat_name)
-            strat_df.to_parquet(path=strat_db_file)
+        if self.read_only:
+            raise ValueError(f"Can't save Strategy Databases loaded from {self.start_date} to {self.end_date}. "
+                             f"Only part of their Trades are loaded")
+        snapshot = self.data_trades.get_snapshot()
+        strat_names = snapshot.strats_to_list() if strat_name is None else [strat_name]
+        for name in strat_names:
+            self.strat_store.write_strat(strat_name=name, strat_df=snapshot.get_strat_df(name))
+
+    def publish_data_version(self):
+        """
+        Write a new version & every Strategy's content hash to DATA_VERSION_FILE after the Strategy Databases are saved.
+        Other processes(web workers) watch it with refresh_strat_dbs() to reload only the Strategies that changed
+        """
+        snapshot = self.data_trades.get_snapshot()
+        data_version = self._read_data_version()
+        self.data_version = (data_version['version'] if data_version is not None else 0) + 1
+        tmp_file = f"{DATA_VERSION_FILE}.tmp"
+        with open(tmp_file, 'w') as fh:
+            json.dump({'version': self.data_version, 'strategies': {strat_name: snapshot.get_strat_hash(strat_name)
+                                                                    for strat_name in snapshot.strats_to_list()}}, fh)
+        # Replace in 1 step, so another process never reads half a file
+        os.replace(tmp_file, DATA_VERSION_FILE)
+        logger.debug(f"Published Strategy Database version {self.data_version}")
+
+    def refresh_strat_dbs(self) -> list:
+        """
+        Reload only the Strategy Databases whose content hash changed since the last published version
+        :return: A list of Strategy Names reloaded
+        """
+        data_version = self._read_data_version()
+        if data_version is None or data_version['version'] == self.data_version:
+            return []
+        snapshot = self.data_trades.get_snapshot()
+        known_strats = set(snapshot.strats_to_list())
+        changed_strats = [strat_name for strat_name, strat_hash in data_version['strategies'].items()
+                          if strat_name not in known_strats or snapshot.get_strat_hash(strat_name) != strat_hash]
+        try:
+            reloaded_dfs = [self._read_strat(strat_name=strat_name) for strat_name in changed_strats]
+        except Exception as e:
+            # Ex: A parquet file still being written. Left at the old version, so it's tried again next time
+            logger.exception(f"Failed to reload Strategy Databases {changed_strats}. Exception: {e}")
+            return []
+        with self.data_trades.write_lock:
+            for strat_df in reloaded_dfs:
+                if len(strat_df) > 0:
+                    self.data_trades.add_db_strat_trades(trades_df=strat_df)
+            self.data_trades.get_rollups(snapshot=self.data_trades.commit())
+        self.data_version = data_version['version']
+        if len(changed_strats) > 0:
+            logger.info(f"Reloaded Strategy Databases {changed_strats} for version {self.data_version}")
+        return changed_strats
+
+    def _monitor_dbs(self, seconds: int = DB_REFRESH_SECS):
+        """
+        Just here to run the monitor_dbs thread loop
+        :param seconds: Seconds between checks
+        """
+        while True:
+            self.refresh_strat_dbs()
+            time.sleep(seconds)
+
+    def monitor_dbs(self, seconds: int = DB_REFRESH_SECS):
+        """
+        Watch for Strategy Databases saved by another process(the ingest) every [seconds] in a separate thread
+        :param seconds: [Optional] Seconds to check DATA_VERSION_FILE
+        """
+        t_refresh_strat_dbs = threading.Thread(target=self._monitor_dbs, name='refresh_strat_dbs', kwargs={'seconds': seconds}, daemon=True)
+        t_refresh_strat_dbs.start()
 
+    @staticmethod
+    def _read_data_version() -> dict | None:
+        """:return: The published {'version': int, 'strategies': {'strat_name': content hash}} or None if there isn't 1"""
+        try:
+            with open(DATA_VERSION_FILE, 'r') as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable Strategy Database version file [{DATA_VERSION_FILE}]. Exception: {e}")
+            return None
@@ -0,0 +1,178 @@
+import hashlib
+from bisect import bisect_right
+from datetime import datetime
+import pandas as pd
+
+from src.conf_setup import INGEST_MANIFEST_FILE, logger
+
+
+class IngestManifest:
+    """
+    Persistent record of every .csv file the ingest has seen. 1 row per (file, Strategy) with the file's content hash,
+    the range of 'Exit time's it held for the Strategy & how it went. Lets DataLoaderCSV skip a file it already loaded
+    without parsing it, and only check the Trade key of rows a partly overlapping export may share with a loaded one,
+    instead of converting them.
+    """
+
+    COLUMNS: list = ['FILE_HASH', 'FILE_NAME', 'STRATEGY', 'FIRST_EXIT', 'LAST_EXIT', 'ROWS', 'NEW_ROWS', 'OUTCOME',
+                     'PROCESSED']
+    # Outcomes
+    LOADED: str = 'loaded'
+    DUPLICATE: str = 'duplicate'
+    FAILED: str = 'failed'
+
+    def __init__(self, manifest_file: str = INGEST_MANIFEST_FILE):
+        """
+        :param manifest_file: [Optional] Parquet file to keep the manifest in. Default: INGEST_MANIFEST_FILE
+        """
+        self.manifest_file = manifest_file
+        self.manifest: pd.DataFrame = pd.DataFrame(columns=self.COLUMNS)
+        # Rows recorded since the last save()
+        self._new_records: list[dict] = []
+        # {'strat_name': sorted [(first exit, last exit)]} of every loaded file. Rows strictly inside are already stored
+        self._exit_ranges: dict[str, list[tuple[datetime, datetime]]] = {}
+        # {file hash: Strategies in it} of every loaded file
+        self._loaded_hashes: dict[str, set] = {}
+        # Hashes of files that failed. A file left in data/in is retried every cycle, but only recorded failing once
+        self._failed_hashes: set = set()
+        self._load_manifest()
+
+    def _load_manifest(self):
+        """ Load the Previous Manifest from db file """
+        try:
+            self.manifest = pd.read_parquet(path=self.manifest_file)
+        except FileNotFoundError:
+            self.manifest = pd.DataFrame(columns=self.COLUMNS)
+        for record in self.manifest.to_dict(orient='records'):
+            self._index_record(record=record)
+
+    def lookup_copy(self) -> 'IngestManifest':
+        """
+        :return: A frozen copy with only the in memory lookups & no manifest rows. Small enough to send to worker
+        processes & unchanged by files recorded after it was taken
+        """
+        manifest = IngestManifest.__new__(IngestManifest)
+        manifest.manifest_file = self.manifest_file
+        manifest.manifest = pd.DataFrame(columns=self.COLUMNS)
+        manifest._new_records = []
+        manifest._exit_ranges = {strat_name: list(exit_ranges) for strat_name, exit_ranges in self._exit_ranges.items()}
+        manifest._loaded_hashes = {file_hash: set(strat_names) for file_hash, strat_names in self._loaded_hashes.items()}
+        manifest._failed_hashes = set(self._failed_hashes)
+        return manifest
+
+    @staticmethod
+    def hash_file(file: str) -> str:
+        """
+        :param file: Full path of the file
+        :return: sha1 hex digest of the file's content
+        """
+        file_hash = hashlib.sha1()
+        with open(file, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b''):
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
+
+    def is_loaded(self, file_hash: str, known_strats: set) -> bool:
+        """
+        :param file_hash: Content hash of the file from hash_file()
+        :param known_strats: Strategies currently stored. A file is only skipped if all of its Strategies still are
+        :return: True if the exact same file was already loaded
+        """
+        strat_names = self._loaded_hashes.get(file_hash)
+        return strat_names is not None and strat_names.issubset(known_strats)
+
+    def is_failed(self, file_hash: str) -> bool:
+        """
+        :param file_hash: Content hash of the file from hash_file()
+        :return: True if the exact same file failed before. It's only worth trying again once its content changes
+        """
+        return file_hash in self._failed_hashes
+
+    def may_be_stored(self, strat_name: str, exit_time: datetime) -> bool:
+        """
+        Only a prefilter. A loaded file's range doesn't mean it had every Trade in it. Ex: Another Account's export of
+        the same Strategy, a filtered export or a corrected re-export. Rows in a range must still have their Trade key
+        checked by DataTrades.has_trade() before they're dropped
+        :param strat_name: Strategy Name
+        :param exit_time: 'Exit time' of the Trade
+        :return: True if the Trade is inside the 'Exit time' range of a loaded file
+        """
+        exit_ranges = self._exit_ranges.get(strat_name)
+        if not exit_ranges:
+            return False
+        # Last range starting at or before exit_time is the only one that can hold it, ranges are kept merged
+        range_idx = bisect_right(exit_ranges, (exit_time, datetime.max)) - 1
+        return range_idx >= 0 and exit_ranges[range_idx][0] <= exit_time <= exit_ranges[range_idx][1]
+
+    def record(self, file_hash: str, file_name: str, outcome: str, strat_ranges: dict = None):
+        """
+        Record how a file went. Kept in memory until save()
+        :param file_hash: Content hash of the file from hash_file()
+        :param file_name: Name of the file
+        :param outcome: LOADED, DUPLICATE or FAILED
+        :param strat_ranges: [Optional] {'strat_name': [first exit, last exit, rows, new rows]} of each Strategy in it
+        """
+        if outcome == self.FAILED and file_hash in self._failed_hashes:
+            return
+        processed = datetime.now()
+        records = [dict(FILE_HASH=file_hash, FILE_NAME=file_name, STRATEGY=strat_name, FIRST_EXIT=first_exit,
+                        LAST_EXIT=last_exit, ROWS=rows, NEW_ROWS=new_rows, OUTCOME=outcome, PROCESSED=processed)
+                   for strat_name, (first_exit, last_exit, rows, new_rows) in (strat_ranges or {}).items()]
+        if len(records) == 0:
+            records = [dict(FILE_HASH=file_hash, FILE_NAME=file_name, STRATEGY='', FIRST_EXIT=pd.NaT,
+                            LAST_EXIT=pd.NaT, ROWS=0, NEW_ROWS=0, OUTCOME=outcome, PROCESSED=processed)]
+        for record in records:
+            self._index_record(record=record)
+        self._new_records.extend(records)
+
+    def _index_record(self, record: dict):
+        """
+        Add a loaded file's record to the in memory lookups
+        :param record: 1 manifest row as a dict
+        """
+        if record['OUTCOME'] == self.FAILED:
+            self._failed_hashes.add(record['FILE_HASH'])
+        if record['OUTCOME'] != self.LOADED:
+            return
+        strat_names = self._loaded_hashes.setdefault(record['FILE_HASH'], set())
+        if record['STRATEGY'] == '' or pd.isna(record['FIRST_EXIT']):
+            return
+        strat_names.add(record['STRATEGY'])
+        new_range = (pd.Timestamp(record['FIRST_EXIT']).to_pydatetime(),
+                     pd.Timestamp(record['LAST_EXIT']).to_pydatetime())
+        # Merge overlapping ranges, so may_be_stored() only has to check 1 range
+        merged = []
+        for exit_range in sorted(self._exit_ranges.get(record['STRATEGY'], []) + [new_range]):
+            if merged and exit_range[0] <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], exit_range[1]))
+            else:
+                merged.append(exit_range)
+        self._exit_ranges[record['STRATEGY']] = merged
+
+    def widen_exit_ranges(self, delta: pd.Timedelta):
+        """
+        Widen every loaded file's 'Exit time' range & save the whole manifest. Ex: The stored Trades' times moved by up
+        to delta, so the old ranges may no longer hold them. may_be_stored() is only a prefilter, so wider is safe
+        :param delta: Time to move each range's start back & end forward by
+        """
+        if len(self.manifest) > 0:
+            loaded = self.manifest['OUTCOME'] == self.LOADED
+            self.manifest.loc[loaded, 'FIRST_EXIT'] = pd.to_datetime(self.manifest.loc[loaded, 'FIRST_EXIT']) - delta
+            self.manifest.loc[loaded, 'LAST_EXIT'] = pd.to_datetime(self.manifest.loc[loaded, 'LAST_EXIT']) + delta
+            self.manifest.to_parquet(path=self.manifest_file)
+        self._exit_ranges = {}
+        self._loaded_hashes = {}
+        self._failed_hashes = set()
+        for record in self.manifest.to_dict(orient='records') + self._new_records:
+            self._index_record(record=record)
+        logger.info(f"Widened the 'Exit time' ranges of every loaded file in the Ingest Manifest by {delta}")
+
+    def save(self):
+        """Append the new records to the manifest db file"""
+        if len(self._new_records) == 0:
+            return
+        new_df = pd.DataFrame(data=self._new_records, columns=self.COLUMNS)
+        self.manifest = new_df if len(self.manifest) == 0 else pd.concat([self.manifest, new_df], ignore_index=True)
+        self.manifest.to_parquet(path=self.manifest_file)
+        logger.debug(f"Saved {len(self._new_records)} Ingest Manifest records to [{self.manifest_file}]")
+        self._new_records = []
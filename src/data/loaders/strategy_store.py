@@ -0,0 +1,167 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from src.conf_setup import DB_STRAT_DIR, DB_STRAT_FORMAT, logger
+from src.data.types.schema_data_trades import SchemaDT
+
+
+class StrategyStore:
+    """
+    Reads & writes the Strategy Database files in data/dbs/strategies. Parquet is the compact archive format. Arrow IPC
+    (Feather V2) files are uncompressed & memory mapped when read, so numeric & datetime columns are used straight from
+    the OS page cache without decoding, & every process reading the same file shares the same memory.
+    Whichever of the 2 files is newer is converted to the other automatically.
+    Parquet files are sorted by 'Exit time' & written with 1 row group per month, each with min/max statistics, so a
+    date range read only decodes the row groups in the range.
+    """
+
+    PARQUET_EXT: str = '.parquet'
+    ARROW_EXT: str = '.arrow'
+    FORMATS: tuple = ('arrow', 'parquet')
+    PARQUET_COMPRESSION: str = 'zstd'
+
+    def __init__(self, strat_dir: str = DB_STRAT_DIR, db_format: str = DB_STRAT_FORMAT):
+        """
+        :param strat_dir: [Optional] Directory of the Strategy Database files. Default: data/dbs/strategies
+        :param db_format: [Optional] 'arrow' = read memory mapped Arrow IPC files, not on Windows. 'parquet' = only use
+        parquet files. Default: DB_STRAT_FORMAT
+        """
+        if db_format not in self.FORMATS:
+            raise ValueError(f"Strategy Database format: {db_format} must be 1 of {self.FORMATS}")
+        if db_format == 'arrow' and os.name == 'nt':
+            # Loaded Dataframes are views of the mapped file, so the next save's os.replace() over it would fail
+            raise ValueError(f"Strategy Database format: {db_format} isn't supported on Windows. Use 'parquet'")
+        self.strat_dir = strat_dir
+        self.db_format = db_format
+
+    def strats_to_list(self) -> list:
+        """:return: A list of Strategy Names with a Database file in either format"""
+        strat_names = set()
+        for strat_db in os.listdir(self.strat_dir):
+            strat_name, ext = os.path.splitext(strat_db)
+            if ext.lower() == self.PARQUET_EXT or (self.db_format == 'arrow' and ext.lower() == self.ARROW_EXT):
+                strat_names.add(strat_name)
+        return sorted(strat_names)
+
+    def read_strat(self, strat_name: str) -> pd.DataFrame:
+        """
+        Read a Strategy's Trades. With the arrow format the returned Dataframe's numeric & datetime columns are read
+        only views of the memory mapped file, like every committed Dataframe they must NOT be modified
+        :param strat_name: Strategy Name
+        :return: The Strategy's Trades Dataframe
+        """
+        if self.db_format == 'parquet':
+            return self._to_strat_df(table=pq.read_table(self._db_file(strat_name, self.PARQUET_EXT)))
+        self._sync(strat_name=strat_name)
+        with pa.memory_map(self._db_file(strat_name, self.ARROW_EXT), 'r') as source:
+            table = ipc.open_file(source).read_all()
+        return self._to_strat_df(table=table)
+
+    def read_strat_range(self, strat_name: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """
+        Read only a Strategy's Trades that exited within the dates from its parquet file. Row groups whose 'Exit time'
+        min/max statistics are outside the dates are skipped without being read
+        :param strat_name: Strategy Name
+        :param start_date: [Optional] 1st day to read. Default: ALL Dates
+        :param end_date: [Optional] Last day to read, the whole day is included. Default: ALL Dates
+        :return: The Strategy's Trades Dataframe within the dates
+        """
+        if self.db_format == 'arrow':
+            self._sync(strat_name=strat_name)
+        exit_time = ds.field(SchemaDT.DT_INDEX_NAME)
+        date_filter = None
+        if start_date is not None:
+            date_filter = exit_time >= pd.Timestamp(start_date).normalize()
+        if end_date is not None:
+            before_end = exit_time < pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1)
+            date_filter = before_end if date_filter is None else date_filter & before_end
+        dataset = ds.dataset(self._db_file(strat_name, self.PARQUET_EXT), format='parquet')
+        return self._to_strat_df(table=dataset.to_table(filter=date_filter))
+
+    @staticmethod
+    def _to_strat_df(table: pa.Table) -> pd.DataFrame:
+        """:return: A Strategy's Trades Dataframe from an Arrow Table, indexed like every Strategy Dataframe"""
+        # Older parquet files also saved the index, it's rebuilt from the columns instead
+        table = table.drop_columns([col for col in table.column_names if col.startswith('__index_level_')])
+        # split_blocks stops pandas from copying columns together into 1 block, so they stay zero copy
+        strat_df = table.to_pandas(split_blocks=True)
+        strat_df.set_index(keys=SchemaDT.DT_INDEX_KEYS, inplace=True, drop=False, verify_integrity=False)
+        return strat_df
+
+    def write_strat(self, strat_name: str, strat_df: pd.DataFrame):
+        """
+        Save a Strategy's Trades to its parquet archive & with the arrow format its Arrow IPC file
+        :param strat_name: Strategy Name
+        :param strat_df: The Strategy's Trades Dataframe
+        """
+        logger.debug(f"{strat_name}: Saving [{len(strat_df)}] Rows/Trades to "
+                     f"[{self._db_file(strat_name, self.PARQUET_EXT)}]")
+        self._write_parquet(strat_name=strat_name, strat_df=strat_df)
+        if self.db_format == 'arrow':
+            self._write_arrow(strat_name=strat_name, strat_df=strat_df)
+
+    def _sync(self, strat_name: str):
+        """
+        Convert whichever of the parquet & Arrow IPC files is newer to the other, so both hold the same Trades
+        :param strat_name: Strategy Name
+        """
+        parquet_file = self._db_file(strat_name, self.PARQUET_EXT)
+        arrow_file = self._db_file(strat_name, self.ARROW_EXT)
+        parquet_mtime = os.path.getmtime(parquet_file) if os.path.exists(parquet_file) else None
+        arrow_mtime = os.path.getmtime(arrow_file) if os.path.exists(arrow_file) else None
+        if parquet_mtime is not None and (arrow_mtime is None or parquet_mtime > arrow_mtime):
+            logger.info(f"{strat_name}: Converting [{parquet_file}] to Arrow IPC")
+            self._write_arrow(strat_name=strat_name, strat_df=pd.read_parquet(path=parquet_file))
+        elif arrow_mtime is not None and parquet_mtime is None:
+            logger.info(f"{strat_name}: Archiving [{arrow_file}] to parquet")
+            with pa.memory_map(arrow_file, 'r') as source:
+                self._write_parquet(strat_name=strat_name, strat_df=self._to_strat_df(ipc.open_file(source).read_all()))
+
+    def _write_parquet(self, strat_name: str, strat_df: pd.DataFrame):
+        """
+        Write a zstd compressed parquet file sorted by 'Exit time', with 1 row group per month of Trades & min/max
+        statistics for each. Written to a temp file & swapped in, so a reader never sees half a file
+        :param strat_name: Strategy Name
+        :param strat_df: The Strategy's Trades Dataframe
+        """
+        parquet_file = self._db_file(strat_name, self.PARQUET_EXT)
+        tmp_file = f"{parquet_file}.tmp"
+        # Already sorted when it comes from a commit, then this is only a check
+        exit_times = strat_df[SchemaDT.DT_INDEX_NAME].to_numpy(dtype='datetime64[ns]')
+        if len(exit_times) > 1 and (exit_times[1:] < exit_times[:-1]).any():
+            strat_df = strat_df.sort_values(by=SchemaDT.DT_INDEX_KEYS, kind='mergesort')
+            exit_times = strat_df[SchemaDT.DT_INDEX_NAME].to_numpy(dtype='datetime64[ns]')
+        table = pa.Table.from_pandas(strat_df, preserve_index=False)
+        # Row group boundaries where the month of 'Exit time' changes
+        months = exit_times.astype('datetime64[M]')
+        starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]]) if len(months) > 0 else np.zeros(1, dtype=int)
+        ends = np.r_[starts[1:], len(months)]
+        with pq.ParquetWriter(tmp_file, table.schema, compression=self.PARQUET_COMPRESSION,
+                              write_statistics=True) as writer:
+            for start, end in zip(starts, ends):
+                writer.write_table(table.slice(start, end - start), row_group_size=max(int(end - start), 1))
+        os.replace(tmp_file, parquet_file)
+
+    def _write_arrow(self, strat_name: str, strat_df: pd.DataFrame):
+        """
+        Write an uncompressed Arrow IPC file. Written to a temp file & swapped in, so processes that already mapped the
+        old file keep reading it safely. Only on POSIX, where the mapped old file lives on until it's unmapped
+        :param strat_name: Strategy Name
+        :param strat_df: The Strategy's Trades Dataframe
+        """
+        arrow_file = self._db_file(strat_name, self.ARROW_EXT)
+        tmp_file = f"{arrow_file}.tmp"
+        # 'Exit time' & 'Entry time' are already columns, the index is rebuilt from them when read
+        table = pa.Table.from_pandas(strat_df, preserve_index=False)
+        with pa.OSFile(tmp_file, 'wb') as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_file, arrow_file)
+
+    def _db_file(self, strat_name: str, ext: str) -> str:
+        return os.path.join(self.strat_dir, f"{strat_name}{ext}")
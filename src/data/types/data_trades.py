@@ -1,15 +1,28 @@
+from threading import RLock
 import pandas as pd
 
 from src.conf_setup import logger
 from src.data.analyzers.analyze_data_trades import AnalyzeDataTrades
 from src.data.types.schema_data_trades import SchemaDT
+from src.data.types.trades_snapshot import TradesSnapshot
 from src.utils import Singleton
 
 
 class DataTrades(AnalyzeDataTrades, metaclass=Singleton):
-    """Holds each Strategies Trade Data"""
+    """
+    Holds each Strategies Trade Data. Readers go through the current TradesSnapshot. The ingest(DataLoaderCSV) changes
+    Strategies in a staging area & publishes them all at once with commit(), so it never touches a snapshot readers use.
+    """
 
-    trade_data: dict[str, pd.DataFrame] = {}
+    # Strategy Dataframes changed by the ingest, but not committed to a snapshot yet. Only the ingest touches these
+    _staged: dict[str, pd.DataFrame] = {}
+    # Held by anything that stages & commits, so 2 ingests can't mix their changes. Readers never take it
+    write_lock = RLock()
+    # Hash index of every stored Trade's ('Exit time', 'Entry time') key in nanoseconds. Built once per Strategy & kept
+    # up to date as Trades are merged in, so incoming duplicates are dropped without re-deduping the whole Dataframe
+    _trade_keys: dict[str, set[tuple[int, int]]] = {}
+    # New Trade rows from .csv files waiting to be merged in by dedupe(). {'strat_name': {trade key: row values}}
+    _pending_rows: dict[str, dict[tuple[int, int], list]] = {}
 
     def add_db_strat_trades(self, trades_df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -18,28 +31,70 @@ class DataTrades(AnalyzeDataTrades, metaclass=Singleton):
         :return: A Pandas Data from of the Added Strategy
         """
         strat_name = trades_df['Strategy'].iloc[0]
-        self.trade_data[strat_name] = trades_df
+        self._staged[strat_name] = trades_df
+        # Replaced whole, so the old hash index no longer matches. It's built again on the next new Trade
+        self._trade_keys.pop(strat_name, None)
         self._set_index(strat_name)
         # read_parquet doesn't return all the correct Data Types, but at least the important ones "Entry time" "Exit time"
         # TODO: 1 option if we decide we need it is to re-apply DataTrades.strat_col_dtypes to ALL columns, but so far we don't need it
-        # Data Types:\n{self.trade_data[strat_name].dtypes}
-        return self.trade_data[strat_name]
+        # Data Types:\n{self._staged[strat_name].dtypes}
+        return self._staged[strat_name]
 
-    def add_trade_data(self, row: dict):
+    def add_trade_data(self, row: dict) -> bool:
         """
-        Add a trade to a Strategy from a CSV file. NOTE: We need to do 1 line at a time, because a .csv file may contain
-        multiple Strategy names in it.
+        Buffer a trade for a Strategy from a CSV file. NOTE: We need to do 1 line at a time, because a .csv file may
+        contain multiple Strategy names in it. Trades already stored are dropped here, so dedupe() only has new ones to
+        merge. Within the buffer a later row with the same key replaces the earlier one
         :param row: A Dictionary Row with same keys as self.strat_cols(Columns)
+        :return: True if the Trade is new, False if it's a duplicate of a stored or buffered Trade
+        """
+        return self.add_formatted_trade(formatted_row=SchemaDT.format_row(row=row))
+
+    def add_formatted_trade(self, formatted_row: dict) -> bool:
+        """
+        Buffer a Trade already converted by SchemaDT.format_row(). Ex: Parsed by an ingest worker process
+        :param formatted_row: A Dictionary Row with same keys as self.strat_cols(Columns), in the same order
+        :return: True if the Trade is new, False if it's a duplicate of a stored or buffered Trade
         """
-        formatted_row: dict = SchemaDT.format_row(row=row)
         try:
             strat_name = formatted_row['Strategy']
+            trade_key = (pd.Timestamp(formatted_row['Exit time']).value, pd.Timestamp(formatted_row['Entry time']).value)
+            if trade_key in self._get_trade_keys(strat_name=strat_name):
+                return False
+            pending_rows = self._pending_rows.setdefault(strat_name, {})
+            is_new = trade_key not in pending_rows
+            pending_rows[trade_key] = list(formatted_row.values())
+            return is_new
+        except KeyError as ke:
+            logger.error(f"Missing 'Strategy' column in row: {formatted_row}. Exception: {ke}")
+            return False
+
+    def has_trade(self, strat_name: str, trade_key: tuple[int, int]) -> bool:
+        """
+        :param strat_name: Strategy Name
+        :param trade_key: ('Exit time', 'Entry time') of the Trade in nanoseconds
+        :return: True if the Trade is stored or buffered. Ex: To drop a row without converting it
+        """
+        return trade_key in self._get_trade_keys(strat_name=strat_name) or trade_key in self._pending_rows.get(strat_name, {})
+
+    def has_uncommitted(self) -> bool:
+        """:return: True if Trades were staged or buffered, but not committed to a snapshot yet. Ex: A failed ingest"""
+        return len(self._staged) > 0 or any(len(pending_rows) > 0 for pending_rows in self._pending_rows.values())
+
+    def _get_trade_keys(self, strat_name: str) -> set[tuple[int, int]]:
+        """
+        :param strat_name: Strategy Name
+        :return: The hash index of the Strategy's stored Trade keys. Built from its Dataframe the 1st time it's needed
+        """
+        trade_keys = self._trade_keys.get(strat_name)
+        if trade_keys is None:
             # Creates a new Dataframe for the Strategy if one doesn't already Exist
             strat_df = self.get_strat_df(strat_name=strat_name)
-            row_df = pd.DataFrame(data=[formatted_row.values()], columns=SchemaDT.COL_NAMES_LIST)
-            self.trade_data[strat_name] = pd.concat([strat_df, row_df])
-        except KeyError as ke:
-            logger.error(f"Missing 'Strategy' column in row: {row}. Exception: {ke}")
+            exit_ns, entry_ns = (strat_df[col].to_numpy(dtype='datetime64[ns]').view('int64').tolist()
+                                 for col in SchemaDT.DT_INDEX_KEYS)
+            trade_keys = set(zip(exit_ns, entry_ns))
+            self._trade_keys[strat_name] = trade_keys
+        return trade_keys
 
     def _create_new_strat_df(self, strat_name: str) -> pd.DataFrame:
         """
@@ -47,38 +102,80 @@ class DataTrades(AnalyzeDataTrades, metaclass=Singleton):
         :param strat_name: Strategy Name
         :return: Pandas Dataframe of Strategy
         """
-        self.trade_data[strat_name] = pd.DataFrame(data=SchemaDT.DT_DATA_COL_DTYPES)
+        self._staged[strat_name] = pd.DataFrame(data=SchemaDT.DT_DATA_COL_DTYPES)
         self._set_index(strat_name)
-        return self.trade_data[strat_name]
+        return self._staged[strat_name]
 
     def dedupe(self, strat_name: str = None):
         """
-        Remove any duplicate Rows based on "Entry time" and "Exit time". Also sort by Index.
-        :param strat_name: Optional: Name of Strategy to dedupe. Default: is to dedupe ALL Strategy Dataframes
+        Merge buffered new Trades into their Strategies in 1 sorted merge each. Duplicates were already dropped by
+        add_trade_data(), so only Strategies that got new rows are touched & the cost follows the amount of new Trades.
+        :param strat_name: Optional: Name of Strategy to merge. Default: is to merge ALL Strategies with new Trades
         """
-        if strat_name is None:
-            for name in self.trade_data.keys():
-                self._dedupe_and_set_index(strat_name=name)
-        else:
-            self._dedupe_and_set_index(strat_name=strat_name)
+        strat_names = list(self._pending_rows.keys()) if strat_name is None else [strat_name]
+        for name in strat_names:
+            pending_rows = self._pending_rows.pop(name, None)
+            if pending_rows:
+                self._merge_pending_rows(strat_name=name, pending_rows=pending_rows)
 
-    def _dedupe_and_set_index(self, strat_name: str):
-        self.trade_data[strat_name].drop_duplicates(subset=SchemaDT.DT_INDEX_KEYS, keep='last', inplace=True)
-        self._set_index(strat_name)
-        self.trade_data[strat_name].sort_index(inplace=True, ascending=True)
+    def _merge_pending_rows(self, strat_name: str, pending_rows: dict[tuple[int, int], list]):
+        """
+        :param strat_name: Strategy Name
+        :param pending_rows: Buffered new Trades of the Strategy. {trade key: row values}
+        """
+        new_df = pd.DataFrame(data=list(pending_rows.values()), columns=SchemaDT.COL_NAMES_LIST)
+        new_df.set_index(keys=SchemaDT.DT_INDEX_KEYS, inplace=True, drop=False, verify_integrity=False)
+        new_df.sort_index(inplace=True, ascending=True)
+        # concat builds a new Dataframe, so the committed one readers may be using is left alone
+        strat_df = self.get_strat_df(strat_name=strat_name)
+        merged_df = pd.concat([strat_df, new_df]) if len(strat_df) > 0 else new_df
+        if len(strat_df) > 0 and new_df.index[0] < strat_df.index[-1]:
+            # Only re-sort when the new Trades aren't all after the stored ones. Ex: A re-export of older days
+            merged_df = merged_df.sort_index(ascending=True, kind='mergesort')
+        self._staged[strat_name] = merged_df
+        self._get_trade_keys(strat_name=strat_name).update(pending_rows.keys())
+        logger.debug(f"{strat_name}: Merged {len(new_df)} new Trades into {len(strat_df)} stored Trades")
 
     def _set_index(self, strat_name: str):
-        self.trade_data[strat_name].set_index(keys=SchemaDT.DT_INDEX_KEYS, inplace=True, drop=False, verify_integrity=False)
+        self._staged[strat_name].set_index(keys=SchemaDT.DT_INDEX_KEYS, inplace=True, drop=False, verify_integrity=False)
+
+    def commit(self) -> TradesSnapshot:
+        """
+        Publish every staged Strategy in a new snapshot & swap it in, in 1 step. Readers holding the old snapshot keep a
+        consistent view, new readers see every change at once.
+        :return: The new current TradesSnapshot
+        """
+        with self.write_lock:
+            # Buffered Trades are never left behind by a commit
+            self.dedupe()
+            if len(self._staged) == 0:
+                return self._snapshot
+            old_snapshot = self._snapshot
+            trade_data = dict(old_snapshot.trade_data)
+            strat_versions = dict(old_snapshot.strat_versions)
+            for strat_name, strat_df in self._staged.items():
+                trade_data[strat_name] = strat_df
+                strat_versions[strat_name] = old_snapshot.get_strat_version(strat_name) + 1
+            # Unchanged Strategies keep their content hash, so it's only worked out again for changed ones
+            strat_hashes = {strat_name: strat_hash for strat_name, strat_hash in old_snapshot.get_strat_hashes().items()
+                            if strat_name not in self._staged}
+            new_snapshot = TradesSnapshot(trade_data=trade_data, strat_versions=strat_versions,
+                                          version=old_snapshot.version + 1, strat_hashes=strat_hashes)
+            logger.debug(f"Committed Trades snapshot version {new_snapshot.version}. Strategies changed: {list(self._staged.keys())}")
+            # Swapping the class attribute is atomic, so readers see the old or the new snapshot and nothing in between
+            AnalyzeDataTrades._snapshot = new_snapshot
+            self._staged.clear()
+            return new_snapshot
 
     def get_strat_df(self, strat_name: str) -> pd.DataFrame:
         """
-        Retrieve a Strategies Dataframe. If it's not been created yet, then return an empty properly formatted Strategy
-        Dataframe
+        Retrieve a Strategies Dataframe for the ingest. Staged changes come 1st, then the current snapshot. If it's not
+        been created yet, then return an empty properly formatted Strategy Dataframe
         :param strat_name: A String Name representing the Strategy's Name
         :return: A Strategy Dataframe
         """
         try:
-            return self.trade_data[strat_name]
+            return self._staged[strat_name] if strat_name in self._staged else self._snapshot.get_strat_df(strat_name)
         except KeyError:
             logger.info(f"{strat_name} - Strategy does NOT exist in our database. Returning an Empty Strategy Dataframe")
             return self._create_new_strat_df(strat_name=strat_name)
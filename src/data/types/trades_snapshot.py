@@ -0,0 +1,66 @@
+import hashlib
+from types import MappingProxyType
+from typing import Mapping
+import pandas as pd
+
+
+class TradesSnapshot:
+    """
+    1 consistent, read only version of every Strategy's Trades. The ingest never changes a snapshot or the Dataframes in
+    it. It builds new Dataframes & swaps a whole new snapshot in with DataTrades.commit(), so readers holding a
+    snapshot never block on an ingest & never see half deduped data.
+    """
+
+    # Columns that decide a Strategy's results. Used for its content hash
+    HASH_COLS: list = ['Exit time', 'Entry time', 'Profit']
+
+    def __init__(self, trade_data: dict[str, pd.DataFrame] = None, strat_versions: dict[str, int] = None,
+                 version: int = 0, strat_hashes: dict[str, str] = None):
+        """
+        :param trade_data: [Optional] Dict of {'strat_name': Strategy Trades Dataframe}
+        :param strat_versions: [Optional] Dict of {'strat_name': version}. Bumped each time a Strategy's Trades change
+        :param version: [Optional] Version of the whole snapshot. Bumped on every commit
+        :param strat_hashes: [Optional] Already known content hashes of unchanged Strategies {'strat_name': hash}
+        """
+        self.version: int = version
+        self.trade_data: Mapping[str, pd.DataFrame] = MappingProxyType(dict(trade_data or {}))
+        self.strat_versions: Mapping[str, int] = MappingProxyType(dict(strat_versions or {}))
+        # Filled in lazily by get_strat_hash(). Hashes never change, because the Trades in a snapshot never change
+        self._strat_hashes: dict[str, str] = {strat_name: strat_hash for strat_name, strat_hash in
+                                              (strat_hashes or {}).items() if strat_name in self.trade_data}
+
+    def get_strat_df(self, strat_name: str) -> pd.DataFrame:
+        """
+        :param strat_name: A String Name representing the Strategy's Name
+        :return: The Strategy's Trades Dataframe. Must NOT be modified. Raises KeyError if the Strategy doesn't exist
+        """
+        return self.trade_data[strat_name]
+
+    def get_strat_version(self, strat_name: str) -> int:
+        """
+        :param strat_name: A String Name representing the Strategy's Name
+        :return: Version of the Strategy's Trades. 0 if the Strategy doesn't exist
+        """
+        return self.strat_versions.get(strat_name, 0)
+
+    def get_strat_hash(self, strat_name: str) -> str:
+        """
+        Content hash of a Strategy's Trades. Unlike the version, it's the same across restarts for the same Trades
+        :param strat_name: A String Name representing the Strategy's Name
+        :return: A hex digest string. Raises KeyError if the Strategy doesn't exist
+        """
+        strat_hash = self._strat_hashes.get(strat_name)
+        if strat_hash is None:
+            strat_df = self.get_strat_df(strat_name)
+            row_hashes = pd.util.hash_pandas_object(strat_df[self.HASH_COLS], index=False).to_numpy()
+            strat_hash = hashlib.sha1(row_hashes.tobytes()).hexdigest()
+            self._strat_hashes[strat_name] = strat_hash
+        return strat_hash
+
+    def get_strat_hashes(self) -> dict[str, str]:
+        """:return: Dict of {'strat_name': hash} of hashes that have already been worked out"""
+        return dict(self._strat_hashes)
+
+    def strats_to_list(self) -> list:
+        """:return: A list of Strategies in this snapshot"""
+        return list(self.trade_data.keys())
@@ -0,0 +1,76 @@
+import ast
+import re
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+# NOTE: Standard Library only, so it can be imported & started before anything it's timing
+
+
+class StartupProfiler:
+    """Times each Startup phase & how long every module takes to import. Used by: python main.py --profile-startup"""
+
+    # Modules that make up the headless Analysis API. Must import without Dash or Plotly
+    ANALYSIS_API_MODULES: tuple = ('src.data.types.data_trades', 'src.data.loaders.data_loader')
+    # Modules that should only be imported by the Dashboard
+    UI_ONLY_MODULES: tuple = ('dash', 'plotly', 'dash_bootstrap_components')
+    ANALYSIS_IMPORT_TARGET_MS: int = 300
+    IMPORT_TIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)\s*$')
+
+    def __init__(self, enabled: bool = True):
+        """
+        :param enabled: [Optional] False = timed() does nothing, so it can stay in the normal Startup path
+        """
+        self.enabled = enabled
+        self.phase_times: dict[str, float] = {}
+
+    @contextmanager
+    def timed(self, phase: str):
+        """
+        Time a Startup phase Ex: with profiler.timed('Load Strategy Databases'): DataLoaderCSV()
+        :param phase: Name of the phase to report
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                self.phase_times[phase] = time.perf_counter() - start_time
+
+    def profile_imports(self, modules: tuple = ANALYSIS_API_MODULES) -> tuple[list[tuple[str, float, float]], list]:
+        """
+        Import modules in a fresh interpreter with -X importtime, so the times aren't hidden by modules this process
+        already imported
+        :param modules: [Optional] Modules to import. Default: The Analysis API
+        :return: Tuple of ([(module, self ms, cumulative ms)], [UI only modules that were pulled in])
+        """
+        code = f"import sys; {'; '.join(f'import {module}' for module in modules)}; " \
+               f"print([m for m in {self.UI_ONLY_MODULES!r} if m in sys.modules])"
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True)
+        import_times = []
+        for line in result.stderr.splitlines():
+            match = self.IMPORT_TIME_RE.match(line)
+            if match:
+                import_times.append((match.group(4), int(match.group(1)) / 1000, int(match.group(2)) / 1000))
+        stdout_lines = result.stdout.strip().splitlines()
+        ui_modules = ast.literal_eval(stdout_lines[-1]) if stdout_lines and stdout_lines[-1].startswith('[') else []
+        return import_times, ui_modules
+
+    def report(self, top: int = 20) -> str:
+        """
+        :param top: [Optional] Amount of slowest modules to list
+        :return: A printable report of Startup phases, the Analysis API import time & the slowest modules
+        """
+        import_times, ui_modules = self.profile_imports()
+        api_ms = sum(cum_ms for module, _, cum_ms in import_times if module in self.ANALYSIS_API_MODULES)
+        lines = ['***** Startup Profile *****', 'Phases:']
+        lines.extend(f'  {phase:<35} {secs * 1000:>10.1f} ms' for phase, secs in self.phase_times.items())
+        status = 'OK' if api_ms <= self.ANALYSIS_IMPORT_TARGET_MS else 'OVER TARGET'
+        lines.append(f'Analysis API import (fresh interpreter): {api_ms:.1f} ms. Target: '
+                     f'{self.ANALYSIS_IMPORT_TARGET_MS} ms [{status}]')
+        lines.append(f'UI only modules pulled in by the Analysis API: {ui_modules or "None"}')
+        lines.append(f'Slowest {top} module imports (self ms / cumulative ms):')
+        for module, self_ms, cum_ms in sorted(import_times, key=lambda times: times[1], reverse=True)[:top]:
+            lines.append(f'  {module:<55} {self_ms:>8.1f} {cum_ms:>10.1f}')
+        return '\n'.join(lines)
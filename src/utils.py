@@ -20,8 +20,8 @@ def get_dt_from_str(dt_string: str, date_format='%Y-%m-%d') -> datetime:
     return datetime.strptime(dt_string.replace('T00:00:00', ''), date_format)
 
 def to_datetime(value) -> datetime:
-    """Converts String into a datetime object usable in Pandas"""
-    date_format = '%m/%d/%Y %H:%M:%S %p'
+    """Converts String into a datetime object usable in Pandas. 12 hour time with AM/PM Ex: 01/02/2024 1:10:0 PM"""
+    date_format = '%m/%d/%Y %I:%M:%S %p'
     return datetime.strptime(value, date_format)
 
 
@@ -41,7 +41,9 @@ class Singleton(type):
     __singleton_lock = Lock()
 
     def __call__(cls, *args, **kwargs):
-        # Check again for instance just in case another thread beat us to it
         if cls not in cls._instances:
-            cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
+            with cls.__singleton_lock:
+                # Check again for instance just in case another thread beat us to it
+                if cls not in cls._instances:
+                    cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
         return cls._instances[cls]
\ No newline at end of file
@@ -0,0 +1,68 @@
+import os
+import pytest
+
+import src.conf_setup.live_settings as live_settings
+import src.conf_setup.strategy_tags as strategy_tags
+import src.data.loaders.data_loader as data_loader
+from src.data.analyzers.analyze_data_trades import AnalyzeDataTrades
+from src.data.analyzers.live_state import LiveState
+from src.data.analyzers.optimizer_cache import OptimizerCache
+from src.data.loaders.data_loader import DataLoaderCSV
+from src.data.loaders.ingest_manifest import IngestManifest
+from src.data.loaders.strategy_store import StrategyStore
+from src.data.types.data_trades import DataTrades
+from src.data.types.trades_snapshot import TradesSnapshot
+from src.utils import Singleton
+
+
+class IngestEnv:
+    """Data directories in a temp dir & a way to start the ingest over, like the program restarting"""
+
+    def __init__(self, root: str, monkeypatch: pytest.MonkeyPatch):
+        self.root = root
+        self.monkeypatch = monkeypatch
+        self.in_dir = os.path.join(root, 'in')
+        self.arch_dir = os.path.join(self.in_dir, 'arch')
+        self.strat_dir = os.path.join(root, 'dbs', 'strategies')
+        self.manifest_file = os.path.join(root, 'dbs', 'ingest', 'ingest_manifest.parquet')
+        for directory in (self.arch_dir, self.strat_dir, os.path.dirname(self.manifest_file)):
+            os.makedirs(directory, exist_ok=True)
+        monkeypatch.setattr(data_loader, 'DATA_IN_DIR', self.in_dir)
+        monkeypatch.setattr(data_loader, 'DATA_IN_ARCH_DIR', self.arch_dir)
+        monkeypatch.setattr(data_loader, 'DATA_VERSION_FILE', os.path.join(self.strat_dir, 'data_version.json'))
+        monkeypatch.setattr(data_loader, 'TIME_MIGRATION_FILE', os.path.join(root, 'dbs', 'ingest', 'time_migration.json'))
+        monkeypatch.setattr(live_settings, 'LIVE_SETTINGS_FILE', os.path.join(root, 'live_settings.parquet'))
+        monkeypatch.setattr(strategy_tags, 'STRAT_TAGS_FILE', os.path.join(root, 'strategy_tags.parquet'))
+
+    def new_loader(self) -> DataLoaderCSV:
+        """:return: A DataLoaderCSV with nothing in memory, that loads the Strategy Databases saved so far"""
+        Singleton._instances.pop(DataTrades, None)
+        for attr, value in (('_staged', {}), ('_trade_keys', {}), ('_pending_rows', {})):
+            self.monkeypatch.setattr(DataTrades, attr, value)
+        for attr, value in (('_snapshot', TradesSnapshot()), ('_strat_stats', {}), ('_rollups', None),
+                            ('_strat_tags', None), ('_trade_analytics', None), ('_calendar_cubes', None),
+                            ('_opt_cache', OptimizerCache(cache_dir=os.path.join(self.root, 'dbs', 'optimizer')))):
+            self.monkeypatch.setattr(AnalyzeDataTrades, attr, value)
+        loader = DataLoaderCSV(load_dbs=False)
+        loader.manifest = IngestManifest(manifest_file=self.manifest_file)
+        loader.strat_store = StrategyStore(strat_dir=self.strat_dir)
+        loader._live_state = LiveState(state_file=os.path.join(self.root, 'live_state.parquet'),
+                                       events_file=os.path.join(self.root, 'live_events.parquet'))
+        loader._load_strat_dbs()
+        return loader
+
+    def in_file(self, file: str) -> str:
+        return os.path.join(self.in_dir, file)
+
+    def is_archived(self, file: str) -> bool:
+        return os.path.exists(os.path.join(self.arch_dir, file)) and not os.path.exists(self.in_file(file))
+
+
+@pytest.fixture
+def ingest_env(tmp_path, monkeypatch) -> IngestEnv:
+    singleton = Singleton._instances.pop(DataTrades, None)
+    yield IngestEnv(root=str(tmp_path), monkeypatch=monkeypatch)
+    # Put back whatever DataTrades the rest of the process was using
+    Singleton._instances.pop(DataTrades, None)
+    if singleton is not None:
+        Singleton._instances[DataTrades] = singleton
@@ -0,0 +1,92 @@
+import os
+import shutil
+from datetime import datetime
+
+import src.data.loaders.data_loader as data_loader
+from src.data.loaders.ingest_manifest import IngestManifest
+from tests.utils import trade_rows, write_csv
+
+
+def manifest_outcomes(loader, file: str) -> list:
+    manifest = loader.manifest.manifest
+    return manifest.loc[manifest['FILE_NAME'] == file, 'OUTCOME'].tolist()
+
+
+def fail_format_row(row: dict):
+    raise AssertionError(f"Row was converted: {row}")
+
+
+def test_identical_file_skipped_after_restart(ingest_env, monkeypatch):
+    write_csv(ingest_env.in_file('a.csv'), trade_rows('Strat0', range(20)))
+    loader = ingest_env.new_loader()
+    loader.load_strat_csvs(workers=0)
+    assert ingest_env.is_archived('a.csv')
+    assert len(loader.data_trades.get_snapshot().get_strat_df('Strat0')) == 20
+
+    loader = ingest_env.new_loader()
+    assert len(loader.data_trades.get_snapshot().get_strat_df('Strat0')) == 20
+    shutil.copy(os.path.join(ingest_env.arch_dir, 'a.csv'), ingest_env.in_file('b.csv'))
+    # Skipped on its hash alone, so none of its rows are converted
+    monkeypatch.setattr(data_loader.SchemaDT, 'format_row', fail_format_row)
+    snapshot = loader.data_trades.get_snapshot()
+    loader.load_strat_csvs(workers=0)
+    assert loader.data_trades.get_snapshot() is snapshot
+    assert ingest_env.is_archived('b.csv')
+    assert manifest_outcomes(loader, 'b.csv') == [IngestManifest.DUPLICATE]
+
+
+def test_partly_overlapping_export(ingest_env):
+    write_csv(ingest_env.in_file('a.csv'), trade_rows('Strat0', range(0, 20)))
+    loader = ingest_env.new_loader()
+    loader.load_strat_csvs(workers=0)
+
+    loader = ingest_env.new_loader()
+    # Trades 10-19 are stored, 20-29 are new & 1 Trade inside the stored range was missing from the 1st export
+    write_csv(ingest_env.in_file('b.csv'), trade_rows('Strat0', range(10, 30)) +
+              trade_rows('Strat0', [5], start=datetime(2024, 1, 2, 9, 40)))
+    loader.load_strat_csvs(workers=0)
+    strat_df = loader.data_trades.get_snapshot().get_strat_df('Strat0')
+    assert len(strat_df) == 31
+    assert strat_df.index.is_unique and strat_df.index.is_monotonic_increasing
+    manifest = loader.manifest.manifest
+    assert manifest.loc[manifest['FILE_NAME'] == 'b.csv', 'NEW_ROWS'].tolist() == [11]
+    assert ingest_env.is_archived('b.csv')
+
+    # What was saved is what a fresh ingest of both files gives
+    loader = ingest_env.new_loader()
+    assert loader.data_trades.get_snapshot().get_strat_df('Strat0')['Trade number'].tolist() == \
+        strat_df['Trade number'].tolist()
+
+
+def test_failed_file_retried_only_once_it_changes(ingest_env, monkeypatch):
+    parsed = []
+    parse_csv_file = data_loader._parse_csv_file
+    monkeypatch.setattr(data_loader, '_parse_csv_file', lambda csv_file, **kwargs:
+                        parsed.append(os.path.basename(csv_file)) or parse_csv_file(csv_file=csv_file, **kwargs))
+    bad_rows = trade_rows('Strat0', range(10))
+    bad_rows[3][9] = 'not a time'
+    write_csv(ingest_env.in_file('bad.csv'), bad_rows)
+    loader = ingest_env.new_loader()
+    loader.load_strat_csvs(workers=0)
+    assert parsed == ['bad.csv']
+    assert os.path.exists(ingest_env.in_file('bad.csv'))
+    assert loader.data_trades.get_snapshot().strats_to_list() == []
+
+    # Unchanged, so it isn't read again
+    loader.load_strat_csvs(workers=0)
+    assert parsed == ['bad.csv']
+
+    # After a restart it's only hashed. The manifest knows the exact same file failed
+    loader = ingest_env.new_loader()
+    loader.load_strat_csvs(workers=0)
+    assert parsed == ['bad.csv'] * 2
+    assert os.path.exists(ingest_env.in_file('bad.csv'))
+    assert manifest_outcomes(loader, 'bad.csv') == [IngestManifest.FAILED]
+    assert loader.data_trades.get_snapshot().strats_to_list() == []
+
+    write_csv(ingest_env.in_file('bad.csv'), trade_rows('Strat0', range(10)))
+    loader.load_strat_csvs(workers=0)
+    assert parsed == ['bad.csv'] * 3
+    assert ingest_env.is_archived('bad.csv')
+    assert manifest_outcomes(loader, 'bad.csv') == [IngestManifest.FAILED, IngestManifest.LOADED]
+    assert len(loader.data_trades.get_snapshot().get_strat_df('Strat0')) == 10
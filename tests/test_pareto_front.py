@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from src.data.analyzers.pareto_front import ParetoFront
+
+
+def random_stats(rng: np.random.Generator, count: int, levels: int) -> dict[str, np.ndarray]:
+    """Stats drawn from only a few levels, so there are plenty of ties & exact duplicates"""
+    stats = {stat: rng.integers(0, levels, count).astype(np.float64) for stat in ParetoFront.STATS}
+    stats['max_drawdown'] = -stats['max_drawdown']
+    return stats
+
+
+def brute_force_front(stats: dict[str, np.ndarray], seqs: np.ndarray) -> set:
+    """:return: seqs of every Portfolio that no other is at least as good as on every objective. Exact ties go to the
+    lowest seq"""
+    values = ParetoFront.objective_values(stats=stats)
+    front = set()
+    for idx in range(len(values)):
+        at_least = (values >= values[idx]).all(axis=1)
+        better = (values > values[idx]).any(axis=1) | (seqs < seqs[idx])
+        at_least[idx] = False
+        if not (at_least & better).any():
+            front.add(int(seqs[idx]))
+    return front
+
+
+@pytest.mark.parametrize('count, levels, batch_size', [(200, 3, 200), (500, 6, 64), (1500, 20, 300), (300, 1000, 7)])
+def test_pareto_front_matches_brute_force(count, levels, batch_size, monkeypatch):
+    # Small blocks, so candidates are checked against the front across several blocks
+    monkeypatch.setattr(ParetoFront, 'BLOCK_SIZE', 32)
+    rng = np.random.default_rng(count + levels)
+    n_strats = 4
+    stats = random_stats(rng=rng, count=count, levels=levels)
+    seqs = np.arange(count)
+    masks = rng.random((count, n_strats)) > 0.5
+    front = ParetoFront(n_strats=n_strats)
+    for start in range(0, count, batch_size):
+        batch = slice(start, start + batch_size)
+        front.add(stats={stat: values[batch] for stat, values in stats.items()}, seqs=seqs[batch], masks=masks[batch])
+    assert set(front.seqs.tolist()) == brute_force_front(stats=stats, seqs=seqs)
+    assert front.candidates_seen == count
+    np.testing.assert_array_equal(front.masks, masks[front.seqs])
+    for stat in ParetoFront.STATS:
+        np.testing.assert_array_equal(front.stats[stat], stats[stat][front.seqs])
+
+
+def test_pareto_front_merged_batch_fronts_match_brute_force():
+    rng = np.random.default_rng(7)
+    stats = random_stats(rng=rng, count=400, levels=4)
+    seqs = np.arange(400)
+    masks = rng.random((400, 3)) > 0.5
+    # Same as PortfolioOptimizer.run_pareto(). Each batch's front is built on its own & merged in enumeration order
+    front = ParetoFront(n_strats=3)
+    for start in range(0, 400, 50):
+        batch = slice(start, start + 50)
+        batch_front = ParetoFront(n_strats=3).add(stats={stat: values[batch] for stat, values in stats.items()},
+                                                  seqs=seqs[batch], masks=masks[batch])
+        front.merge(other=batch_front)
+    assert set(front.seqs.tolist()) == brute_force_front(stats=stats, seqs=seqs)
+    assert front.candidates_seen == 400
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.analyzers.strat_statistics import StratStatistics
+
+
+@pytest.mark.parametrize('window', [1, 2, 5, 7, 30, 60])
+def test_rolling_max_drawdown_matches_slices(window):
+    rng = np.random.default_rng(window)
+    n_days, n_strats = 60, 3
+    daily_pnl = np.round(rng.normal(5, 150, (n_days, n_strats)), 2)
+    # A losing streak & a flat stretch, so some windows start on a peak & some never draw down
+    daily_pnl[10:20, 0] = -abs(daily_pnl[10:20, 0])
+    daily_pnl[30:45, 1] = 0.0
+    metrics = StratStatistics.calc_rolling_metrics(daily_pnl=daily_pnl, window=window)
+    assert np.isnan(metrics['max_drawdown'][:window - 1]).all()
+    for col in range(n_strats):
+        cum_net_profit = pd.Series(daily_pnl[:, col].cumsum())
+        expected = [StratStatistics._calculate_drawdown(cum_net_profit.iloc[end - window + 1:end + 1])
+                    for end in range(window - 1, n_days)]
+        np.testing.assert_allclose(metrics['max_drawdown'][window - 1:, col], expected, rtol=0, atol=1e-9)
+
+
+def test_rolling_max_drawdown_window_longer_than_history():
+    metrics = StratStatistics.calc_rolling_metrics(daily_pnl=np.ones((5, 2)), window=6)
+    assert np.isnan(metrics['max_drawdown']).all()
@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta
+
+from src.data.types.schema_data_trades import SchemaDT
+
+
+def trade_rows(strat_name: str, trade_nums: range, start: datetime = datetime(2024, 1, 2, 9, 30)) -> list[list]:
+    """
+    :param strat_name: Strategy Name
+    :param trade_nums: Trade numbers. Trade n exits n days after start, so the same number is always the same Trade
+    :param start: [Optional] Entry time of Trade 0
+    :return: A list of NinjaTrader export rows in SchemaDT.COL_NAMES_LIST order
+    """
+    rows = []
+    for trade_num in trade_nums:
+        # Every other Trade is in the afternoon, so a time parsed without its AM/PM would collide with another day's
+        entry_time = start + timedelta(days=trade_num, hours=4 * (trade_num % 2))
+        exit_time = entry_time + timedelta(minutes=35)
+        profit = (trade_num % 7 - 3) * 25.5
+        rows.append([trade_num, 'NQ 12-24', 'Acct1', strat_name, 'Long', 1, 100, 101,
+                     f"{entry_time:%m/%d/%Y %I:%M:%S %p}", f"{exit_time:%m/%d/%Y %I:%M:%S %p}", 'E', 'X',
+                     f"${profit:,.2f}" if profit >= 0 else f"-${-profit:,.2f}", '$0.00', '$4.20', '$10.00', '$20.00',
+                     '$0.50', 5])
+    return rows
+
+
+def write_csv(file: str, rows: list[list]):
+    """Write rows as a NinjaTrader Trades export. Every line ends with a ',' like NinjaTrader's"""
+    with open(file, 'w') as fh:
+        fh.write(','.join(SchemaDT.COL_NAMES_LIST) + ',\n')
+        for row in rows:
+            fh.write(','.join(str(value) for value in row) + ',\n')